@@ -20,9 +20,13 @@ class AgentState:
 class BaseAgent(ABC):
     """Agent 抽象基类 - 通过 Runtime 共享依赖注入"""
 
-    def __init__(self, agent_id: str, agent_type: str):
+    # 默认并发槽位数：调度器最多同时向该 Agent 派发的任务数（子类可覆盖）
+    default_capacity: int = 1
+
+    def __init__(self, agent_id: str, agent_type: str, capacity: Optional[int] = None):
         self.agent_id = agent_id
         self.agent_type = agent_type
+        self.capacity = max(1, capacity if capacity is not None else self.default_capacity)
         self.state = AgentState(agent_id=agent_id, agent_type=agent_type)
         self.logger = get_logger(f"agent_{agent_id}")
         self.runtime: Optional[object] = None  # 由 Runtime.register_agent() 注入
@@ -130,6 +134,7 @@ class BaseAgent(ABC):
                 "target": target_agent_id,
                 "message": message,
             },
+            target=target_agent_id,
         )
         await self.event_bus.publish(event)
         self.logger.debug(f"消息已发送: {self.agent_id} -> {target_agent_id}")
@@ -151,6 +156,22 @@ class BaseAgent(ABC):
             priority=priority,
         ))
 
+    async def request(self, target_agent_id: str, method: str, params: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None) -> Any:
+        """
+        向目标 Agent 发起 RPC 调用并等待结果（请求 / 应答，按 correlation_id 匹配）
+        超时抛出 RpcTimeoutError，远端异常抛出 RpcError；取消本协程会通知对方取消处理
+        """
+        if self.runtime is None:
+            raise RuntimeError(f"Agent {self.agent_id} 未注册到 Runtime")
+        return await self.runtime.rpc.call(self.agent_id, target_agent_id, method, params, timeout)
+
+    def register_rpc(self, method: str, handler):
+        """注册本 Agent 的 RPC 方法；handler(params: dict) 可为普通函数或协程函数"""
+        if self.runtime is None:
+            raise RuntimeError(f"Agent {self.agent_id} 未注册到 Runtime")
+        self.runtime.rpc.register(self.agent_id, method, handler)
+
     @abstractmethod
     async def execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """执行任务（子类实现具体业务逻辑）"""
@@ -13,22 +13,22 @@ class AnalyzerAgent(BaseAgent):
     分析 Agent - 专注于数据分析、报表生成、趋势洞察
     """
 
-    def __init__(self, agent_id: str, agent_type: str = "analyzer"):
-        super().__init__(agent_id, agent_type)
+    def __init__(self, agent_id: str, agent_type: str = "analyzer", capacity: int | None = None):
+        super().__init__(agent_id, agent_type, capacity)
         self._reports_dir = Path(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
             os.path.abspath(__file__)))), "workspace", "reports"))
         os.makedirs(self._reports_dir, exist_ok=True)
 
     async def on_startup(self):
         """启动时注册事件监听"""
-        self.event_bus.subscribe(EventType.MESSAGE_RECEIVED, self._handle_message)
+        # 只接收发给自己的消息（事件总线按 target 路由）
+        self.event_bus.subscribe(EventType.MESSAGE_RECEIVED, self._handle_message, target=self.agent_id)
         self.event_bus.subscribe(EventType.TASK_COMPLETED, self._handle_task_completed)
+        # 其他 Agent 可直接 await self.request(<analyzer_id>, "generate_report", {...}) 取得报表
+        self.register_rpc("generate_report", self._rpc_generate_report)
 
     async def _handle_message(self, event: Event):
         """处理任务分配消息"""
-        target = event.data.get("target", "")
-        if target != self.agent_id:
-            return
         msg = event.data.get("message", {})
         if msg.get("type") == "task_assignment":
             task = msg.get("task", {})
@@ -38,6 +38,10 @@ class AnalyzerAgent(BaseAgent):
         """监听任务完成事件，可用于触发后续分析"""
         self.logger.info(f"分析 Agent 收到任务完成通知: {event.data.get('task_id')}")
 
+    async def _rpc_generate_report(self, params: dict) -> dict:
+        """RPC: 生成报表，params 同任务参数（report_type 等），可带 task_id"""
+        return await self.execute_task({"task_id": params.get("task_id", "rpc"), "params": params})
+
     async def execute_task(self, task: dict) -> dict:
         """执行分析任务"""
         self.update_state(status="running", load=0.7)
@@ -12,8 +12,8 @@ class CoordinatorAgent(BaseAgent):
     参考 kimi-cli 的 Coordinator + FlowRunner 模式
     """
 
-    def __init__(self, agent_id: str, agent_type: str = "coordinator"):
-        super().__init__(agent_id, agent_type)
+    def __init__(self, agent_id: str, agent_type: str = "coordinator", capacity: int | None = None):
+        super().__init__(agent_id, agent_type, capacity)
         self.logger = self.logger
 
     async def on_startup(self):
@@ -27,6 +27,9 @@ class CoordinatorAgent(BaseAgent):
 
     async def _handle_task_created(self, event: Event):
         """处理任务创建事件：触发调度分配"""
+        if event.data.get("bulk"):
+            self.logger.info(f"协调 Agent 收到批量任务创建事件: {event.data.get('count')} 个任务")
+            return
         task_id = event.data.get("task_id")
         self.logger.info(f"协调 Agent 收到任务创建事件: {task_id}")
         # 任务由调度器自动分配，此处可用于额外协调逻辑
@@ -14,23 +14,26 @@ class ExecutorAgent(BaseAgent):
     """
     执行 Agent - 处理数据处理、文件操作等实际任务
     支持真实业务：CSV/JSON 文件读写、数据转换、文件批量处理
+    各处理函数经 asyncio.to_thread 在线程池中执行（见 _dispatch），可并发处理多个任务，
+    状态与负载按在途任务数计算
     """
 
-    def __init__(self, agent_id: str, agent_type: str = "executor"):
-        super().__init__(agent_id, agent_type)
+    default_capacity = 4
+
+    def __init__(self, agent_id: str, agent_type: str = "executor", capacity: int | None = None):
+        super().__init__(agent_id, agent_type, capacity)
         self._work_dir = Path(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
             os.path.abspath(__file__)))), "workspace"))
         os.makedirs(self._work_dir, exist_ok=True)
+        self._active = 0  # 在途任务数
 
     async def on_startup(self):
         """启动时注册事件监听"""
-        self.event_bus.subscribe(EventType.MESSAGE_RECEIVED, self._handle_message)
+        # 只接收发给自己的消息（事件总线按 target 路由）
+        self.event_bus.subscribe(EventType.MESSAGE_RECEIVED, self._handle_message, target=self.agent_id)
 
     async def _handle_message(self, event: Event):
         """处理来自协调 Agent 的任务分配消息"""
-        target = event.data.get("target", "")
-        if target != self.agent_id:
-            return
         msg = event.data.get("message", {})
         if msg.get("type") == "task_assignment":
             task = msg.get("task", {})
@@ -38,8 +41,9 @@ class ExecutorAgent(BaseAgent):
             await self.execute_task(task)
 
     async def execute_task(self, task: dict) -> dict:
-        """执行任务入口"""
-        self.update_state(status="running", load=0.8)
+        """执行任务入口（可并发调用）"""
+        self._active += 1
+        self._refresh_load()
         try:
             task_id = task.get("task_id", "unknown")
             task_type = task.get("type", "data_process")
@@ -47,15 +51,25 @@ class ExecutorAgent(BaseAgent):
 
             self.logger.info(f"执行 Agent {self.agent_id} 开始执行任务: {task_id} ({task_type})")
 
-            result = await self._dispatch(task_type, params, task_id)
-
-            self.update_state(status="idle", load=0.0)
-            return result
+            return await self._dispatch(task_type, params, task_id)
 
         except Exception as e:
-            self.update_state(status="error", load=0.0, error_msg=str(e))
+            # 单个任务失败只记录错误，不把仍在处理其他任务的 Agent 整体标记为 error
+            self.update_state(error_msg=str(e))
             self.logger.error(f"执行 Agent {self.agent_id} 任务失败: {e}")
             return {"code": -1, "msg": str(e), "task_id": task.get("task_id")}
+        finally:
+            self._active -= 1
+            self._refresh_load()
+
+    def _refresh_load(self):
+        """按在途任务数更新状态与负载（已停止的 Agent 保持 stopped）"""
+        if self.state.status == "stopped":
+            return
+        self.update_state(
+            status="running" if self._active else "idle",
+            load=min(1.0, self._active / self.capacity),
+        )
 
     async def _dispatch(self, task_type: str, params: dict, task_id: str) -> dict:
         """根据任务类型分发到具体处理函数"""
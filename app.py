@@ -7,15 +7,21 @@ MCASys 生产级 FastAPI 应用
 - 速率限制
 - 结构化错误响应
 """
+import asyncio
+import base64
+import binascii
+import json
 import uuid
+from collections import Counter
 from contextlib import asynccontextmanager
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
 
-from fastapi import FastAPI, Depends, HTTPException, Request, Security
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Security
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
 
 from config.config import load_config, AppConfig
 from core.security import SecurityManager
@@ -40,6 +46,13 @@ class TaskCreateRequest(BaseModel):
         return v
 
 
+_task_list_adapter = TypeAdapter(List[TaskCreateRequest])
+BULK_INSERT_CHUNK = 500  # 批量创建时每条 INSERT 的行数
+TASK_BULK_MAX = 10000  # 单次批量创建的任务数上限（整批一个事务）
+TASK_PAGE_DEFAULT = 100  # 任务列表默认每页条数
+TASK_PAGE_MAX = 1000
+
+
 class TaskStatusUpdateRequest(BaseModel):
     status: str = Field(..., description="任务状态")
 
@@ -220,23 +233,66 @@ async def stop_agent(agent_id: str, ctx=Depends(get_ctx), api_key=Depends(verify
 
 # ---------- 任务管理 ----------
 
+def _encode_cursor(after) -> str:
+    """将 (create_time, task_id) 编码为不透明游标"""
+    create_time, task_id = after
+    raw = json.dumps([create_time.isoformat(), task_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """解析游标，格式非法时返回 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        create_time, task_id = json.loads(raw)
+        return datetime.fromisoformat(create_time), str(task_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
 @app.get(f"{API_PREFIX}/tasks")
 async def list_tasks(
     status: Optional[str] = None,
+    task_type: Optional[str] = Query(None, alias="type", description="按任务类型筛选"),
+    executor: Optional[str] = Query(None, description="按执行 Agent 筛选"),
+    created_after: Optional[datetime] = Query(None, description="创建时间下界（含）"),
+    created_before: Optional[datetime] = Query(None, description="创建时间上界（不含）"),
+    limit: int = Query(TASK_PAGE_DEFAULT, ge=1, le=TASK_PAGE_MAX, description="每页条数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，默认不含 params/result"),
     ctx=Depends(get_ctx),
     api_key=Depends(verify_api_key),
 ):
-    """获取所有任务，支持按状态筛选"""
+    """分页获取任务列表（按创建时间倒序），支持状态/类型/执行 Agent/时间窗口筛选"""
+    try:
+        task_status = TaskStatus(status.lower()) if status else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的任务状态: {status}")
+    after = _decode_cursor(cursor) if cursor else None
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    filters = dict(
+        status=task_status,
+        task_type=task_type,
+        executor_agent_id=executor,
+        created_after=created_after,
+        created_before=created_before,
+    )
+
     async with ctx.runtime.db_manager.session_factory() as session:
         from core.repository import TaskRepository
         repo = TaskRepository(session)
-        task_status = TaskStatus(status) if status else None
-        tasks = await repo.get_all(task_status)
+        try:
+            tasks, next_after = await repo.list_page(limit, after=after, fields=field_list, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total = await repo.count_listing(**filters)
 
     return {
-        "total": len(tasks),
+        "count": len(tasks),
+        "total": total,  # 满足筛选条件的任务总数
         "status_filter": status,
-        "tasks": [t.to_dict() for t in tasks],
+        "tasks": tasks,
+        "next_cursor": _encode_cursor(next_after) if next_after else None,
     }
 
 
@@ -288,6 +344,110 @@ async def create_task(
     return {"message": "任务已创建", "task": task.to_dict()}
 
 
+def _bulk_validation_detail(e: ValidationError, line_offset: int = 0) -> str:
+    """将批量校验错误整理为「第 N 条: 字段 - 原因」，最多列出 10 条"""
+    lines = []
+    for err in e.errors()[:10]:
+        loc = list(err["loc"])
+        index = loc.pop(0) + line_offset if loc and isinstance(loc[0], int) else line_offset
+        field = ".".join(str(x) for x in loc)
+        lines.append(f"第 {index + 1} 条: {field} - {err['msg']}")
+    return "; ".join(lines)
+
+
+async def _read_bulk_tasks(request: Request) -> List[TaskCreateRequest]:
+    """解析批量任务请求体：JSON 数组，或 NDJSON（每行一个任务，边接收边校验）"""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" not in content_type and "jsonl" not in content_type:
+        try:
+            items = _task_list_adapter.validate_json(await request.body())
+        except ValidationError as e:
+            if any(err["type"] == "json_invalid" for err in e.errors()):
+                raise HTTPException(status_code=400, detail="请求体不是合法的 JSON 数组")
+            raise HTTPException(status_code=422, detail=_bulk_validation_detail(e))
+        if len(items) > TASK_BULK_MAX:
+            raise HTTPException(status_code=413, detail=f"单次最多批量创建 {TASK_BULK_MAX} 个任务")
+        return items
+
+    items: List[TaskCreateRequest] = []
+    buffer = b""
+
+    def _consume(line: bytes):
+        if not line.strip():
+            return
+        if len(items) >= TASK_BULK_MAX:
+            raise HTTPException(status_code=413, detail=f"单次最多批量创建 {TASK_BULK_MAX} 个任务")
+        try:
+            items.append(TaskCreateRequest.model_validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=_bulk_validation_detail(e, len(items)))
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            _consume(line)
+    _consume(buffer)
+    return items
+
+
+@app.post(
+    f"{API_PREFIX}/tasks/bulk",
+    status_code=201,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/TaskCreateRequest"}}},
+        "application/x-ndjson": {"schema": {"type": "string", "description": "每行一个 TaskCreateRequest JSON"}},
+    }}},
+)
+async def create_tasks_bulk(
+    request: Request,
+    ctx=Depends(get_ctx),
+    api_key=Depends(verify_api_key),
+):
+    """批量创建任务：一次校验，多行 INSERT 分块写入，发布一条聚合的任务创建事件；超过 TASK_BULK_MAX 条返回 413"""
+    from core.event_bus import Event, EventType
+
+    bodies = await _read_bulk_tasks(request)
+    if not bodies:
+        raise HTTPException(status_code=422, detail="任务列表为空")
+
+    # 逐条递增创建时间，保证同优先级任务按提交顺序出队
+    now = datetime.now()
+    batch_id = uuid.uuid4().hex[:12]
+    rows = [
+        {
+            "task_id": f"task_{uuid.uuid4().hex[:12]}",
+            "name": body.name,
+            "type": body.type,
+            "params": body.params,
+            "status": TaskStatus.PENDING,
+            "priority": body.priority,
+            "create_time": now + timedelta(microseconds=i),
+        }
+        for i, body in enumerate(bodies)
+    ]
+
+    async with ctx.runtime.db_manager.session_factory() as session:
+        from core.repository import TaskRepository
+        repo = TaskRepository(session)
+        await repo.create_many(rows, chunk_size=BULK_INSERT_CHUNK)
+
+    task_ids = [row["task_id"] for row in rows]
+    await ctx.runtime.event_bus.publish(Event(
+        event_id=f"evt_bulk_{batch_id}_created",
+        event_type=EventType.TASK_CREATED,
+        source="api",
+        data={
+            "bulk": True,
+            "count": len(task_ids),
+            "task_ids": task_ids,
+            "task_types": dict(Counter(row["type"] for row in rows)),
+        },
+    ))
+
+    return {"message": f"已创建 {len(task_ids)} 个任务", "count": len(task_ids), "task_ids": task_ids}
+
+
 @app.put(f"{API_PREFIX}/tasks/{{task_id}}/status")
 async def update_task_status(
     task_id: str,
@@ -306,6 +466,7 @@ async def update_task_status(
         old_status = task.status.value if isinstance(task.status, TaskStatus) else task.status
         success = await repo.update_status(task_id, TaskStatus(body.status))
 
+    ctx.runtime.task_stats.invalidate()
     if not success:
         raise HTTPException(status_code=500, detail="状态更新失败")
 
@@ -326,6 +487,7 @@ async def delete_task(task_id: str, ctx=Depends(get_ctx), api_key=Depends(verify
         success = await repo.delete(task_id)
     if not success:
         raise HTTPException(status_code=404, detail=f"任务不存在: {task_id}")
+    ctx.runtime.task_stats.invalidate()
     return {"message": f"任务已删除", "task_id": task_id}
 
 
@@ -333,26 +495,31 @@ async def delete_task(task_id: str, ctx=Depends(get_ctx), api_key=Depends(verify
 
 @app.get(f"{API_PREFIX}/system/stats")
 async def system_stats(ctx=Depends(get_ctx), api_key=Depends(verify_api_key)):
-    """系统统计信息"""
-    async with ctx.runtime.db_manager.session_factory() as session:
-        from core.repository import TaskRepository
-        repo = TaskRepository(session)
-        stats = {}
-        for s in TaskStatus:
-            stats[s.value] = await repo.count_by_status(s)
+    """系统统计信息（任务统计走缓存，见 core/stats.py）"""
+    task_stats = await ctx.runtime.task_stats.get()
 
     agent_states = {}
+    scheduler = ctx.runtime.scheduler
     for aid, a in ctx.runtime._agents.items():
         agent_states[aid] = {
             "type": a.agent_type,
             "status": a.state.status,
             "load": a.state.load,
+            "capacity": a.capacity,
+            "in_flight": scheduler.in_flight_count(aid),
         }
 
     return {
-        "tasks": stats,
+        "tasks": task_stats["by_status"],
+        "tasks_by_type": task_stats["by_type"],
+        "tasks_by_agent": task_stats["by_agent"],
+        "task_durations": task_stats["durations"],
+        "stats_generated_at": task_stats["generated_at"],
         "agents": agent_states,
         "event_bus_subscribers": ctx.runtime.event_bus.subscriber_count,
+        "event_bus": ctx.runtime.event_bus.get_stats(),
+        "websocket": ctx.runtime.ws_hub.stats(),
+        "rpc": ctx.runtime.rpc.stats(),
         "system": {
             "version": "2.0.0",
             "api_key_masked": security_manager.mask_key(),
@@ -360,29 +527,49 @@ async def system_stats(ctx=Depends(get_ctx), api_key=Depends(verify_api_key)):
     }
 
 
+@app.get(f"{API_PREFIX}/system/metrics")
+async def system_metrics(
+    minutes: Optional[int] = Query(None, ge=1, description="返回最近 N 分钟的直方图，默认整个窗口"),
+    ctx=Depends(get_ctx),
+    api_key=Depends(verify_api_key),
+):
+    """任务指标快照（内存增量计数，不访问数据库）"""
+    return ctx.runtime.metrics.snapshot(minutes)
+
+
 @app.get(f"{API_PREFIX}/system/events")
 async def recent_events(
     event_type: Optional[str] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=1000),
+    since: Optional[datetime] = Query(None, description="起始时间（含）"),
+    until: Optional[datetime] = Query(None, description="结束时间（不含）"),
+    after_offset: Optional[int] = Query(None, ge=-1, description="从事件日志读取偏移量大于该值的事件（需启用 journal）"),
     ctx=Depends(get_ctx),
     api_key=Depends(verify_api_key),
 ):
-    """获取最近的事件"""
+    """
+    获取最近的 limit 条事件（可按类型与时间范围筛选，按时间正序返回）
+    since 早于内存历史且启用了事件日志时改从日志读取，同样取最近的 limit 条；
+    指定 after_offset 时从日志按偏移量顺序读取该偏移量之后的 limit 条（用于续读）
+    """
     from core.event_bus import EventType
-    et = EventType(event_type) if event_type else None
-    events = ctx.runtime.event_bus.get_history(et, limit=limit)
+    from core.ws_hub import event_payload
+    try:
+        et = EventType(event_type) if event_type else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的事件类型: {event_type}")
+    bus = ctx.runtime.event_bus
+    if after_offset is not None:
+        if bus.journal is None:
+            raise HTTPException(status_code=400, detail="未启用事件日志（event_bus_config.journal_enabled），不支持 after_offset")
+        events = await asyncio.to_thread(bus.replay, after_offset, limit, et, until)
+    elif bus.journal is not None and not bus.history_covers(since):
+        events = await asyncio.to_thread(bus.replay, since, limit, et, until, True)
+    else:
+        events = bus.get_history(et, limit=limit, since=since, until=until)
     return {
         "total": len(events),
-        "events": [
-            {
-                "event_id": e.event_id,
-                "event_type": e.event_type.value,
-                "source": e.source,
-                "data": e.data,
-                "timestamp": e.timestamp.isoformat(),
-            }
-            for e in events
-        ],
+        "events": [event_payload(e) for e in events],
     }
 
 
@@ -799,26 +986,68 @@ async def config_page():
 
 from fastapi import WebSocket, WebSocketDisconnect
 
+WS_REPLAY_PAGE = 10000  # 回放时每次从事件日志读取的事件数，逐页读取直至追上实时事件
+WS_REPLAY_FRAME = 200  # 回放时每帧合并的事件数
+
+
+def _split_param(value: Optional[str]) -> Optional[frozenset]:
+    """逗号分隔的查询参数 -> frozenset，未提供时为 None（不过滤）"""
+    if not value:
+        return None
+    items = frozenset(v.strip() for v in value.split(",") if v.strip())
+    return items or None
+
+
 @app.websocket("/ws/events")
 async def websocket_events(ws: WebSocket):
-    """WebSocket 事件推送"""
+    """
+    WebSocket 事件推送（经 WebSocketHub 广播：事件只序列化一次，按 flush 窗口合并成帧）
+    查询参数：
+    - event_types=task_completed,task_failed  只接收指定类型
+    - task_ids=id1,id2                        只接收 data.task_id 在其中的事件
+    - since_offset=N                          启用事件日志时先回放 N 之后的事件，
+                                              发送 {"type": "replay_complete", "offset": ...} 后转为实时推送
+    """
+    from core.event_bus import EventType
+    from core.ws_hub import build_frame, encode_event
     await ws.accept()
     ctx = get_agent_context()
+    bus = ctx.runtime.event_bus
+    hub = ctx.runtime.ws_hub
+    params = ws.query_params
+    try:
+        since_offset = int(params["since_offset"]) if "since_offset" in params else None
+        event_types = _split_param(params.get("event_types"))
+        if event_types is not None:
+            event_types = frozenset(EventType(t) for t in event_types)
+    except ValueError as e:
+        await ws.close(code=1008, reason=f"无效的查询参数: {e}")
+        return
+    task_ids = _split_param(params.get("task_ids"))
 
-    async def event_handler(event):
-        try:
-            await ws.send_json({
-                "type": "event",
-                "event_type": event.event_type.value if hasattr(event.event_type, "value") else str(event.event_type),
-                "source": event.source,
-                "data": event.data,
-                "timestamp": event.timestamp.isoformat() if hasattr(event, "timestamp") else None,
-            })
-        except Exception:
-            pass
-
-    ctx.runtime.event_bus.subscribe_all(event_handler)
+    # 回放期间实时事件照常进入该连接的发送队列，回放结束后按偏移量去重再开始发送
+    replaying = since_offset is not None and bus.journal is not None
+    client = hub.connect(ws.send_text, ws.close, event_types=event_types, task_ids=task_ids, paused=replaying)
     try:
+        if replaying:
+            last_offset = since_offset
+            texts = []
+            while True:
+                # 连接已注册，此后的事件都在发送队列中；日志读到不足一页即已追上，不会漏掉中间事件
+                page = await asyncio.to_thread(bus.replay, last_offset, WS_REPLAY_PAGE)
+                for event in page:
+                    last_offset = event.offset
+                    if client.matches(event):
+                        texts.append(encode_event(event))
+                    if len(texts) >= WS_REPLAY_FRAME:
+                        await ws.send_text(build_frame(texts))
+                        texts = []
+                if len(page) < WS_REPLAY_PAGE:
+                    break
+            if texts:
+                await ws.send_text(build_frame(texts))
+            await ws.send_json({"type": "replay_complete", "offset": last_offset})
+            hub.resume(client, last_offset)
         while True:
             # Keep connection alive, wait for client messages
             data = await ws.receive_text()
@@ -830,7 +1059,7 @@ async def websocket_events(ws: WebSocket):
     except Exception:
         pass
     finally:
-        ctx.runtime.event_bus.unsubscribe_all(event_handler)
+        await hub.disconnect(client)
 
 
 # ---------- Static Files ----------
@@ -0,0 +1 @@
+"""性能基准测试 - 用法: python -m benchmarks.<模块名> --help"""
@@ -0,0 +1,93 @@
+"""
+批量创建任务基准 - 对比逐个创建（POST /api/v1/tasks 路径）与批量创建（POST /api/v1/tasks/bulk 路径）
+
+只测数据访问与事件发布部分（不含 HTTP 开销，逐个创建时 HTTP 往返开销还会按任务数线性增加）。
+
+用法::
+
+    python -m benchmarks.bench_bulk_create --counts 1000 10000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from config.config import DatabaseConfig
+from core.database import Base, install_sqlite_pragmas
+from core.event_bus import Event, EventBus, EventType
+from core.models import TaskModel, TaskStatus
+from core.repository import TaskRepository
+
+
+def _payloads(count: int) -> list:
+    return [{"name": f"bench-{i}", "type": "data_process", "params": {"i": i}, "priority": i % 10} for i in range(count)]
+
+
+async def per_task(session_factory, bus: EventBus, payloads: list):
+    """逐个创建：每个任务一次提交 + refresh + 一条 TASK_CREATED 事件"""
+    for body in payloads:
+        task_id = f"task_{uuid.uuid4().hex[:12]}"
+        async with session_factory() as session:
+            await TaskRepository(session).create(TaskModel(
+                task_id=task_id, status=TaskStatus.PENDING, **body,
+            ))
+        await bus.publish(Event(
+            event_id=f"evt_{task_id}_created", event_type=EventType.TASK_CREATED,
+            source="bench", data={"task_id": task_id},
+        ))
+
+
+async def bulk(session_factory, bus: EventBus, payloads: list, chunk_size: int):
+    """批量创建：分块多行 INSERT + 一次提交 + 一条聚合事件"""
+    now = datetime.now()
+    rows = [
+        {"task_id": f"task_{uuid.uuid4().hex[:12]}", "status": TaskStatus.PENDING, "max_retries": 3,
+         "retry_count": 0, "create_time": now + timedelta(microseconds=i), **body}
+        for i, body in enumerate(payloads)
+    ]
+    async with session_factory() as session:
+        await TaskRepository(session).create_many(rows, chunk_size=chunk_size)
+    await bus.publish(Event(
+        event_id="evt_bulk_created", event_type=EventType.TASK_CREATED,
+        source="bench", data={"bulk": True, "task_ids": [r["task_id"] for r in rows]},
+    ))
+
+
+async def _timed(fn, *args) -> float:
+    path = os.path.join(tempfile.mkdtemp(prefix="mcasys_bench_"), "bulk.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    install_sqlite_pragmas(engine, DatabaseConfig())
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        t0 = time.perf_counter()
+        await fn(session_factory, EventBus(), *args)
+        return time.perf_counter() - t0
+    finally:
+        await engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="逐个创建 vs 批量创建任务")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    for count in args.counts:
+        payloads = _payloads(count)
+        single = await _timed(per_task, payloads)
+        batched = await _timed(bulk, payloads, args.chunk_size)
+        print(
+            f"{count:>8,} 个任务  逐个: {single:7.2f}s ({count / single:8.0f}/s)   "
+            f"批量: {batched:7.3f}s ({count / batched:8.0f}/s)   加速 {single / batched:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+事件总线优先级分发基准 - 大量 priority=0 事件（如 StreamTracker 步骤更新）洪泛时，
+priority=2 紧急事件从发布到被订阅者处理的端到端延迟（fifo 与 priority 模式对比）
+
+用法::
+
+    python -m benchmarks.bench_event_priority --flood 20000 --urgent 100 --handler-us 50 --interval-ms 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from config.config import EventBusConfig
+from core.event_bus import Event, EventBus, EventType
+
+
+def _busy(us: float):
+    """模拟订阅者处理开销（同步占用 CPU）"""
+    end = time.perf_counter() + us / 1e6
+    while time.perf_counter() < end:
+        pass
+
+
+async def bench(mode: str, flood: int, urgent: int, handler_us: float, interval: float) -> dict:
+    bus = EventBus(EventBusConfig(dispatch_mode=mode))
+    latencies = {0: [], 2: []}
+    total = flood + urgent
+    done = asyncio.Event()
+
+    def handler(event: Event):
+        _busy(handler_us)
+        latencies[event.priority].append(time.perf_counter() - event.data["t0"])
+        if len(latencies[0]) + len(latencies[2]) == total:
+            done.set()
+
+    # 信箱容量放大到容纳全部事件，只比较分发顺序而非溢出丢弃
+    bus.subscribe_all(handler, mailbox_size=total)
+    await bus.start()
+    # 每轮发布一批 priority=0 事件和 1 个 priority=2 事件，批量产生速度高于订阅者处理速度，积压持续增长
+    chunk = max(1, flood // urgent)
+    t_start = time.perf_counter()
+    sent = 0
+    for k in range(urgent):
+        n = chunk if k < urgent - 1 else flood - sent
+        for i in range(n):
+            bus.publish_sync(Event(f"flood_{sent + i}", EventType.SYSTEM_NOTIFICATION, "bench",
+                                   data={"t0": time.perf_counter()}))
+        sent += n
+        bus.publish_sync(Event(f"urgent_{k}", EventType.SYSTEM_NOTIFICATION, "bench",
+                               data={"t0": time.perf_counter()}, priority=2))
+        await asyncio.sleep(interval)
+    await done.wait()
+    elapsed = time.perf_counter() - t_start
+    stats = bus.get_stats()
+    await bus.stop()
+    return {"latencies": latencies, "elapsed": elapsed, "stats": stats}
+
+
+def _fmt(samples: list) -> str:
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"p50={statistics.median(ms):9.2f}ms  p95={p95:9.2f}ms  max={ms[-1]:9.2f}ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="事件总线优先级分发延迟基准")
+    parser.add_argument("--flood", type=int, default=20000, help="priority=0 事件数")
+    parser.add_argument("--urgent", type=int, default=100, help="priority=2 事件数")
+    parser.add_argument("--handler-us", type=float, default=50.0, help="订阅者每个事件的处理耗时（微秒）")
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="每轮发布间隔（毫秒）")
+    args = parser.parse_args()
+
+    print(f"洪泛 {args.flood:,} 个 priority=0 事件，穿插 {args.urgent} 个 priority=2 事件，"
+          f"订阅者耗时 {args.handler_us:.0f}us/事件")
+    for mode in ("fifo", "priority"):
+        r = await bench(mode, args.flood, args.urgent, args.handler_us, args.interval_ms / 1000)
+        print(f"\n== {mode} ==  总耗时 {r['elapsed']:.2f}s")
+        print(f"  priority=2  {_fmt(r['latencies'][2])}")
+        print(f"  priority=0  {_fmt(r['latencies'][0])}")
+        if mode == "priority":
+            s = r["stats"]
+            print(f"  最大积压 {s['max_depth_by_priority']}  老化分发 {s['aged_dispatches']} 次")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
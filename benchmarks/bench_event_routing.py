@@ -0,0 +1,76 @@
+"""
+点对点消息路由基准 - N 个 Agent 订阅 MESSAGE_RECEIVED 时，
+对比「全部订阅后在回调内按 target 过滤」与「按 target 键控订阅」的回调次数与吞吐
+
+用法::
+
+    python -m benchmarks.bench_event_routing --agents 10 100 500 --messages 5000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from core.event_bus import Event, EventBus, EventType
+
+
+class _Agent:
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.calls = 0
+        self.handled = 0
+
+    def on_message_filtered(self, event: Event):
+        self.calls += 1
+        if event.data["target"] != self.agent_id:
+            return
+        self.handled += 1
+
+    def on_message_keyed(self, event: Event):
+        self.calls += 1
+        self.handled += 1
+
+
+async def bench(n_agents: int, messages: int, keyed: bool) -> dict:
+    bus = EventBus()
+    agents = [_Agent(f"agent_{i:04d}") for i in range(n_agents)]
+    for agent in agents:
+        if keyed:
+            bus.subscribe(EventType.MESSAGE_RECEIVED, agent.on_message_keyed,
+                          target=agent.agent_id, mailbox_size=messages)
+        else:
+            bus.subscribe(EventType.MESSAGE_RECEIVED, agent.on_message_filtered, mailbox_size=messages)
+    await bus.start()
+
+    rng = random.Random(7)
+    t0 = time.perf_counter()
+    for i in range(messages):
+        target = agents[rng.randrange(n_agents)].agent_id
+        bus.publish_sync(Event(f"msg_{i}", EventType.MESSAGE_RECEIVED, "bench",
+                               data={"target": target, "message": {"seq": i}}, target=target))
+        if i % 200 == 199:
+            await asyncio.sleep(0)
+    while sum(a.handled for a in agents) < messages:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - t0
+    await bus.stop()
+    return {"elapsed": elapsed, "calls": sum(a.calls for a in agents)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="点对点消息路由基准")
+    parser.add_argument("--agents", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    for n in args.agents:
+        print(f"\n== {n} 个 Agent，{args.messages:,} 条点对点消息 ==")
+        for keyed in (False, True):
+            r = await bench(n, args.messages, keyed)
+            label = "按 target 键控订阅" if keyed else "回调内过滤 target"
+            print(f"  {label:<12} 回调 {r['calls'] / args.messages:7.1f} 次/消息  "
+                  f"吞吐 {args.messages / r['elapsed']:10,.0f} 条/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
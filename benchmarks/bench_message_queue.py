@@ -0,0 +1,86 @@
+"""
+MessageQueue 基准 - 积压 N 条消息（定向 + 广播，随机优先级）后逐条取完的吞吐，
+以及 get_pending_messages_count 的单次耗时；小规模时与旧实现（每次全量排序 + list.remove）对比
+
+用法::
+
+    python -m benchmarks.bench_message_queue --sizes 10000 100000 1000000 --agents 10 --broadcast-ratio 0.1
+"""
+import argparse
+import random
+import time
+
+from collaboration.communication import Message, MessageQueue
+
+
+class _LegacyQueue:
+    """旧实现：按接收者分组的列表，每次出队全量排序并 list.remove"""
+
+    def __init__(self):
+        self.queue = {}
+
+    def send_message(self, message: Message):
+        self.queue.setdefault(message.receiver_id, []).append(message)
+
+    def get_message(self, agent_id: str):
+        candidates = list(self.queue.get(agent_id, ())) + list(self.queue.get("broadcast", ()))
+        if not candidates:
+            return None
+        candidates.sort(key=lambda x: (-x.priority, x.timestamp))
+        message = candidates[0]
+        self.queue[message.receiver_id].remove(message)
+        return message
+
+    def get_pending_messages_count(self, agent_id: str) -> int:
+        return len(self.queue.get(agent_id, ())) + len(self.queue.get("broadcast", ()))
+
+
+def _messages(n: int, agents: list, broadcast_ratio: float):
+    rng = random.Random(42)
+    for i in range(n):
+        receiver = "broadcast" if rng.random() < broadcast_ratio else agents[rng.randrange(len(agents))]
+        yield Message(f"m{i}", "bench", receiver, "bench", {"i": i}, priority=rng.randrange(3))
+
+
+def bench(queue, n: int, agents: list, broadcast_ratio: float) -> dict:
+    t0 = time.perf_counter()
+    for message in _messages(n, agents, broadcast_ratio):
+        queue.send_message(message)
+    send = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        queue.get_pending_messages_count(agents[0])
+    count_us = (time.perf_counter() - t0) / 1000 * 1e6
+
+    t0 = time.perf_counter()
+    delivered = 0
+    for agent_id in agents:
+        while queue.get_message(agent_id) is not None:
+            delivered += 1
+    drain = time.perf_counter() - t0
+    return {"send": send, "drain": drain, "delivered": delivered, "count_us": count_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MessageQueue 入队 / 出队吞吐基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--broadcast-ratio", type=float, default=0.1)
+    parser.add_argument("--legacy-max", type=int, default=10000, help="旧实现只跑不超过该规模的用例")
+    args = parser.parse_args()
+
+    agents = [f"agent_{i}" for i in range(args.agents)]
+    for n in args.sizes:
+        print(f"\n== 积压 {n:,} 条消息，{args.agents} 个 Agent，广播占比 {args.broadcast_ratio:.0%} ==")
+        impls = [("堆 + 广播游标", MessageQueue())]
+        if n <= args.legacy_max:
+            impls.append(("旧实现(排序+remove)", _LegacyQueue()))
+        for label, queue in impls:
+            r = bench(queue, n, agents, args.broadcast_ratio)
+            print(f"  {label:<14} 入队 {n / r['send']:12,.0f} 条/s  出队 {r['delivered'] / r['drain']:12,.0f} 条/s"
+                  f"  (投递 {r['delivered']:,})  待处理计数 {r['count_us']:8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+投递记录内存浸泡测试 - 持续发送 / 投递 / 确认 N 条消息，按进度采样进程 RSS，
+验证已投递索引有界（容量 + TTL 淘汰，可选落盘 SQLite）时内存保持平稳
+
+用法::
+
+    python -m benchmarks.bench_message_retention --messages 10000000 --delivered-max 100000
+    python -m benchmarks.bench_message_retention --messages 10000000 --spill /tmp/messages.db
+    python -m benchmarks.bench_message_retention --messages 1000000 --unbounded   # 对照：不淘汰
+"""
+import argparse
+import gc
+import os
+import resource
+import time
+
+from collaboration.communication import Message, MessageQueue, MessageSpill
+
+
+def rss_mb() -> float:
+    """当前常驻内存（MB）；非 Linux 退回峰值 RSS"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="已投递消息索引内存浸泡测试")
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--delivered-max", type=int, default=100_000)
+    parser.add_argument("--ttl", type=float, default=3600.0)
+    parser.add_argument("--spill", default=None, help="淘汰记录落盘的 SQLite 文件路径")
+    parser.add_argument("--unbounded", action="store_true", help="不淘汰投递记录（对照组）")
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+
+    spill = MessageSpill(args.spill) if args.spill else None
+    if args.unbounded:
+        queue = MessageQueue(delivered_max=args.messages, delivered_ttl=0)
+    else:
+        queue = MessageQueue(delivered_max=args.delivered_max, delivered_ttl=args.ttl, spill=spill)
+    agents = [f"agent_{i}" for i in range(args.agents)]
+    step = max(1, args.messages // args.samples)
+
+    print(f"{args.messages:,} 条消息，索引上限 {'不限' if args.unbounded else f'{args.delivered_max:,}'}"
+          f"{'，淘汰落盘 ' + args.spill if spill else ''}")
+    print(f"{'已处理':>12} {'RSS(MB)':>10} {'索引条数':>10} {'已淘汰':>12} {'吞吐(条/s)':>12}")
+    gc.collect()
+    baseline = rss_mb()
+    t0 = t_last = time.perf_counter()
+    for i in range(1, args.messages + 1):
+        agent_id = agents[i % len(agents)]
+        queue.send_message(Message(f"m{i}", "soak", agent_id, "soak", {"seq": i}))
+        message = queue.get_message(agent_id)
+        queue.mark_message_processed(message.message_id)
+        if i % step == 0:
+            now = time.perf_counter()
+            index = queue.delivered_messages
+            print(f"{i:>12,} {rss_mb():>10.1f} {len(index):>10,} {index.evicted:>12,} {step / (now - t_last):>12,.0f}")
+            t_last = now
+    elapsed = time.perf_counter() - t0
+    if spill is not None:
+        spill.close()
+    print(f"\n总耗时 {elapsed:.1f}s，RSS 增长 {rss_mb() - baseline:.1f}MB"
+          + (f"，已落盘 {spill.spilled:,} 条" if spill else ""))
+
+
+if __name__ == "__main__":
+    main()
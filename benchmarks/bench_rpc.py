@@ -0,0 +1,58 @@
+"""
+Agent 间 RPC 基准 - 经事件总线的请求 / 应答往返延迟（串行 p50/p99）与并发吞吐
+
+用法::
+
+    python -m benchmarks.bench_rpc --calls 10000 --concurrency 1 100 1000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from config.config import EventBusConfig
+from core.event_bus import EventBus
+from core.rpc import RpcManager
+
+
+async def run(calls: int, concurrencies: list):
+    bus = EventBus(EventBusConfig())
+    await bus.start()
+    rpc = RpcManager(bus)
+    rpc.register("analyzer", "echo", lambda params: params)
+
+    latencies = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        await rpc.call("coordinator", "analyzer", "echo", {"i": i})
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    print(f"串行 {calls:,} 次：p50 {statistics.median(latencies) * 1e6:8.1f}us"
+          f"  p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f}us")
+
+    for concurrency in concurrencies:
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with sem:
+                await rpc.call("coordinator", "analyzer", "echo", {"i": i})
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(calls)))
+        elapsed = time.perf_counter() - t0
+        print(f"并发 {concurrency:>5}：{calls / elapsed:12,.0f} 次/s")
+
+    await rpc.stop()
+    await bus.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent 间 RPC 往返延迟与吞吐基准")
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 100, 1000])
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
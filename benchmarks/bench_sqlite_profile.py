@@ -0,0 +1,118 @@
+"""
+SQLite 性能配置基准 - 并发读写吞吐对比（默认 PRAGMA vs DatabaseConfig 性能配置）
+
+读者模拟 /api/v1/tasks 列表查询，写者模拟调度器的状态更新与新任务写入。
+
+用法::
+
+    python -m benchmarks.bench_sqlite_profile --readers 4 --writers 2 --duration 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from config.config import DatabaseConfig
+from core.database import Base, install_sqlite_pragmas
+from core.models import TaskModel, TaskStatus
+
+
+async def _seed(session_factory, rows: int):
+    async with session_factory() as session:
+        await session.execute(insert(TaskModel.__table__), [
+            {"task_id": f"seed_{i:07d}", "name": f"seed-{i}", "type": "data_process",
+             "params": {"i": i}, "status": TaskStatus.PENDING, "priority": i % 10,
+             "max_retries": 3, "retry_count": 0}
+            for i in range(rows)
+        ])
+        await session.commit()
+
+
+async def _reader(session_factory, stop: asyncio.Event, stats: dict):
+    while not stop.is_set():
+        try:
+            async with session_factory() as session:
+                result = await session.execute(
+                    select(TaskModel).order_by(TaskModel.create_time.desc()).limit(100)
+                )
+                result.scalars().all()
+            stats["reads"] += 1
+        except OperationalError:
+            stats["errors"] += 1
+
+
+async def _writer(session_factory, stop: asyncio.Event, stats: dict, rows: int, writer_id: int):
+    rng = random.Random(writer_id)
+    seq = 0
+    while not stop.is_set():
+        try:
+            async with session_factory() as session:
+                await session.execute(
+                    update(TaskModel)
+                    .where(TaskModel.task_id == f"seed_{rng.randrange(rows):07d}")
+                    .values(status=TaskStatus.RUNNING, executor_agent_id=f"bench_{writer_id}")
+                )
+                session.add(TaskModel(task_id=f"w{writer_id}_{seq}", name="bench", type="analysis", params={}))
+                await session.commit()
+            seq += 1
+            stats["writes"] += 1
+        except OperationalError:
+            stats["errors"] += 1
+
+
+async def bench(label: str, config: DatabaseConfig, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="mcasys_bench_"), "profile.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=args.readers + args.writers)
+    install_sqlite_pragmas(engine, config)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await _seed(session_factory, args.rows)
+
+        stats = {"reads": 0, "writes": 0, "errors": 0}
+        stop = asyncio.Event()
+        workers = [asyncio.create_task(_reader(session_factory, stop, stats)) for _ in range(args.readers)]
+        workers += [
+            asyncio.create_task(_writer(session_factory, stop, stats, args.rows, i))
+            for i in range(args.writers)
+        ]
+        t0 = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - t0
+
+        print(
+            f"  {label:<10} 读 {stats['reads'] / elapsed:8.1f} ops/s   "
+            f"写 {stats['writes'] / elapsed:8.1f} ops/s   锁错误 {stats['errors']}"
+        )
+        return stats
+    finally:
+        await engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SQLite 性能配置并发读写基准")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"== {args.readers} 读 / {args.writers} 写，{args.duration:.0f}s，{args.rows:,} 行 ==")
+    await bench("默认", DatabaseConfig(sqlite_tuning=False), args)
+    await bench("性能配置", DatabaseConfig(), args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+SwarmBatch 执行方式基准 - 对比 I/O 密集与 CPU 密集子任务在不同执行方式下的吞吐：
+
+- I/O 密集（每项等待 --io-ms 毫秒）：全局默认线程池（min(32, cpu+4) 线程，旧行为）
+  vs 批次专用线程池（max_concurrency 线程）vs 协程执行函数直接 await
+- CPU 密集（每项纯 Python 计算）：线程池（受 GIL 限制）vs 进程池
+
+用法::
+
+    python -m benchmarks.bench_swarm_executors --items 2000 --max-concurrency 128
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core.swarm import SwarmBatch, SwarmConfig, SwarmTaskSpec
+
+# 负载参数放在 spec.item 中随子任务传递（进程池中的子进程看不到主进程修改的全局变量）
+
+def io_work(spec: SwarmTaskSpec) -> dict:
+    time.sleep(spec.item)
+    return {"index": spec.index}
+
+
+async def io_work_async(spec: SwarmTaskSpec) -> dict:
+    await asyncio.sleep(spec.item)
+    return {"index": spec.index}
+
+
+def cpu_work(spec: SwarmTaskSpec) -> dict:
+    total = 0
+    for i in range(spec.item):
+        total += i * i
+    return {"index": spec.index, "total": total}
+
+
+async def bench(items: int, load, executor, max_concurrency: int, pool=None) -> float:
+    specs = [SwarmTaskSpec(i + 1, load, "") for i in range(items)]
+    config = SwarmConfig(max_concurrency=max_concurrency)
+    t0 = time.perf_counter()
+    results = await SwarmBatch(specs, executor, config, pool=pool).run()
+    elapsed = time.perf_counter() - t0
+    assert all(r.status.value == "completed" for r in results)
+    return items / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SwarmBatch 协程 / 线程池 / 进程池执行吞吐基准")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--cpu-items", type=int, default=200)
+    parser.add_argument("--max-concurrency", type=int, default=128)
+    parser.add_argument("--io-ms", type=float, default=10.0)
+    parser.add_argument("--cpu-loops", type=int, default=200_000)
+    args = parser.parse_args()
+    cpus = os.cpu_count() or 1
+
+    print(f"== I/O 密集：{args.items:,} 项 × {args.io_ms:g}ms，最大并发 {args.max_concurrency} ==")
+    default_workers = min(32, cpus + 4)
+    cases = [
+        (f"默认线程池({default_workers} 线程)", io_work, ThreadPoolExecutor(default_workers)),
+        (f"专用线程池({args.max_concurrency} 线程)", io_work, None),
+        ("协程直接 await", io_work_async, None),
+    ]
+    for label, executor, pool in cases:
+        rate = asyncio.run(bench(args.items, args.io_ms / 1000, executor, args.max_concurrency, pool))
+        print(f"  {label:<22} {rate:10,.0f} 项/s")
+        if pool is not None:
+            pool.shutdown()
+
+    print(f"\n== CPU 密集：{args.cpu_items:,} 项 × {args.cpu_loops:,} 次循环，{cpus} 核 ==")
+    with ThreadPoolExecutor(cpus) as threads, ProcessPoolExecutor(cpus) as processes:
+        for label, pool in ((f"线程池({cpus} 线程)", threads), (f"进程池({cpus} 进程)", processes)):
+            rate = asyncio.run(bench(args.cpu_items, args.cpu_loops, cpu_work, cpus, pool))
+            print(f"  {label:<22} {rate:10,.1f} 项/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+SwarmBatch 启动调度基准 - N 个短子任务（默认 10k × 5ms）的总耗时：
+
+- 旧循环：asyncio.wait(timeout=launch_interval) 轮询，每次唤醒最多补 1 个，待处理队列 list.pop(0)
+- 完成驱动：子任务结束回调立即唤醒补位，一次补满空闲槽位，队列为 deque
+- 完成驱动 + 令牌桶：按 --launch-rate 匀速启动
+
+用法::
+
+    python -m benchmarks.bench_swarm_launch --items 10000 --task-ms 5 --max-concurrency 64
+"""
+import argparse
+import asyncio
+import time
+
+from core.swarm import SwarmBatch, SwarmConfig, SwarmTaskSpec
+
+
+async def work(spec: SwarmTaskSpec) -> dict:
+    await asyncio.sleep(spec.item)
+    return {"index": spec.index}
+
+
+async def legacy_loop(specs, executor, max_concurrency: int, initial_launch: int, launch_interval: float) -> int:
+    """旧 SwarmBatch.run 的启动逻辑（不含重试），作为对照"""
+    queue = list(specs)
+    active = set()
+    completed = 0
+    for _ in range(min(initial_launch, len(queue))):
+        active.add(asyncio.create_task(executor(queue.pop(0))))
+    while queue or active:
+        if active:
+            done, active = await asyncio.wait(active, timeout=launch_interval, return_when=asyncio.FIRST_COMPLETED)
+            completed += len(done)
+        if queue and len(active) < max_concurrency:
+            active.add(asyncio.create_task(executor(queue.pop(0))))
+    return completed
+
+
+async def bench(args, mode: str) -> float:
+    specs = [SwarmTaskSpec(i + 1, args.task_ms / 1000, "") for i in range(args.items)]
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        done = await legacy_loop(specs, work, args.max_concurrency, args.initial_launch, args.launch_interval)
+    else:
+        config = SwarmConfig(
+            max_concurrency=args.max_concurrency,
+            launch_rate=args.launch_rate if mode == "bucket" else None,
+        )
+        done = sum(1 for r in await SwarmBatch(specs, work, config).run() if r.status.value == "completed")
+    assert done == args.items
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SwarmBatch 轮询启动 vs 完成驱动启动")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--task-ms", type=float, default=5.0)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--initial-launch", type=int, default=5, help="旧循环首批启动数（默认同 SwarmConfig）")
+    parser.add_argument("--launch-interval", type=float, default=0.7, help="旧循环轮询间隔（秒）")
+    parser.add_argument("--launch-rate", type=float, default=20000, help="令牌桶每秒启动数")
+    args = parser.parse_args()
+
+    ideal = args.items * args.task_ms / 1000 / args.max_concurrency
+    print(f"{args.items:,} 个 {args.task_ms:g}ms 子任务，最大并发 {args.max_concurrency}，理想耗时 {ideal:.2f}s")
+    for label, mode in (("旧循环(轮询, 每次补 1 个)", "legacy"), ("完成驱动", "event"),
+                        (f"完成驱动 + 令牌桶({args.launch_rate:,.0f}/s)", "bucket")):
+        elapsed = asyncio.run(bench(args, mode))
+        print(f"  {label:<30} 总耗时 {elapsed:7.2f}s  吞吐 {args.items / elapsed:10,.0f} 项/s")
+
+
+if __name__ == "__main__":
+    main()
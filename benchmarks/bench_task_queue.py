@@ -0,0 +1,127 @@
+"""
+任务队列出队基准 - 对比队列索引 (ix_tasks_queue) 有无时的出队延迟
+
+用法::
+
+    python -m benchmarks.bench_task_queue --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database import Base
+from core.models import TaskModel, TaskStatus
+from core.repository import TaskRepository
+
+QUEUE_INDEXES = ("ix_tasks_queue",)
+TASK_TYPES = ["data_process", "analysis", "file_convert", "batch_process", "data_import"]
+DONE_STATUSES = [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]
+
+
+async def _populate(engine, rows: int, pending_ratio: float, chunk: int = 10000):
+    """批量写入测试数据：pending_ratio 比例为 PENDING，其余为已结束任务"""
+    base = datetime.now() - timedelta(days=30)
+    rng = random.Random(42)
+    async with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for i in range(start, min(start + chunk, rows)):
+                pending = rng.random() < pending_ratio
+                batch.append({
+                    "task_id": f"task_{i:08d}",
+                    "name": f"bench-{i}",
+                    "type": rng.choice(TASK_TYPES),
+                    "params": {},
+                    "status": TaskStatus.PENDING if pending else rng.choice(DONE_STATUSES),
+                    "priority": rng.randint(0, 10),
+                    "max_retries": 3,
+                    "retry_count": 0,
+                    "create_time": base + timedelta(seconds=i),
+                })
+            await conn.execute(insert(TaskModel.__table__), batch)
+        await conn.execute(text("ANALYZE"))
+
+
+async def _measure(session_factory, fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        async with session_factory() as session:
+            t0 = time.perf_counter()
+            await fn(TaskRepository(session))
+            samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+async def _reset_claimed(session_factory):
+    async with session_factory() as session:
+        await session.execute(
+            update(TaskModel)
+            .where(TaskModel.executor_agent_id == "bench")
+            .values(status=TaskStatus.PENDING, executor_agent_id=None, start_time=None)
+        )
+        await session.commit()
+
+
+async def _run_phase(session_factory, repeat: int, claim_size: int) -> dict:
+    slots = {"executor": ["bench"] * claim_size}
+    routes = {t: "executor" for t in TASK_TYPES}
+
+    next_pending = await _measure(session_factory, lambda r: r.get_next_pending(), repeat)
+    claim = await _measure(session_factory, lambda r: r.claim_batch(claim_size, slots, routes), repeat)
+    await _reset_claimed(session_factory)
+    return {"get_next_pending": next_pending, f"claim_batch({claim_size})": claim}
+
+
+def _fmt(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"p50={statistics.median(samples):8.3f}ms  p95={p95:8.3f}ms"
+
+
+async def bench(rows: int, pending_ratio: float, repeat: int, claim_size: int):
+    path = os.path.join(tempfile.mkdtemp(prefix="mcasys_bench_"), "queue.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        t0 = time.perf_counter()
+        await _populate(engine, rows, pending_ratio)
+        print(f"\n== {rows:,} 行（PENDING 约 {pending_ratio:.0%}），写入耗时 {time.perf_counter() - t0:.1f}s ==")
+
+        indexed = await _run_phase(session_factory, repeat, claim_size)
+
+        async with engine.begin() as conn:
+            for name in QUEUE_INDEXES:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            await conn.execute(text("ANALYZE"))
+        baseline = await _run_phase(session_factory, repeat, claim_size)
+
+        for op in indexed:
+            print(f"  {op:<18} 队列索引: {_fmt(indexed[op])}   无队列索引: {_fmt(baseline[op])}")
+    finally:
+        await engine.dispose()
+        os.remove(path)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="任务队列出队延迟基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--pending-ratio", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--claim-size", type=int, default=8)
+    args = parser.parse_args()
+    for rows in args.sizes:
+        await bench(rows, args.pending_ratio, args.repeat, args.claim_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,6 @@
 """协作模块 - 包含Agent间通信、状态管理、冲突解决和任务分配功能"""
 
-from .communication import Message, MessageQueue, CommunicationManager
+from .communication import Message, MessageQueue, CommunicationManager, InboxFullError
 from .state_manager import StateManager
 from .task_allocation import TaskAllocator
 from .conflict_resolution import (
@@ -17,6 +17,7 @@ __all__ = [
     "Message",
     "MessageQueue",
     "CommunicationManager",
+    "InboxFullError",
     
     # 状态管理
     "StateManager",
@@ -1,5 +1,16 @@
 # collaboration/communication.py
-from typing import Dict, List, Optional, Any, Callable
+import asyncio
+import heapq
+import inspect
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import closing
+from typing import Deque, Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from utils.logger import get_logger
@@ -17,72 +28,383 @@ class Message:
     content: Dict[str, Any]     # 消息内容
     timestamp: datetime = field(default_factory=datetime.now)
     priority: int = field(default=0)  # 消息优先级：0-低, 1-中, 2-高
-    status: str = field(default="pending")  # 消息状态：pending, delivered, processed
+    status: str = field(default="pending")  # 消息状态：pending, delivered, processed, failed（超过重投次数）
+
+
+class DeliveredRecord:
+    """已投递消息的精简记录（不保留 content，时间用浮点秒）"""
+    __slots__ = ("message_id", "sender_id", "receiver_id", "message_type", "priority", "status",
+                 "timestamp", "touched_at")
+
+    def __init__(self, message: Message):
+        self.message_id = message.message_id
+        self.sender_id = message.sender_id
+        self.receiver_id = message.receiver_id
+        self.message_type = message.message_type
+        self.priority = message.priority
+        self.status = message.status
+        self.timestamp = message.timestamp.timestamp()  # 消息创建时间（epoch 秒）
+        self.touched_at = time.monotonic()  # 最近一次投递 / 状态变更，用于 TTL 与 LRU
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "message_id": self.message_id,
+            "sender_id": self.sender_id,
+            "receiver_id": self.receiver_id,
+            "message_type": self.message_type,
+            "priority": self.priority,
+            "status": self.status,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+        }
+
+
+class MessageSpill:
+    """
+    已淘汰投递记录的 SQLite 落盘：后台线程按批写入，淘汰路径只做一次非阻塞入队
+    写入跟不上、积压达到 max_pending 时新记录直接丢弃并计入 dropped，不阻塞事件循环
+    表 delivered_messages 以 message_id 为主键，可通过 query() 查询历史
+    """
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS delivered_messages ("
+        "message_id TEXT PRIMARY KEY, sender_id TEXT, receiver_id TEXT, message_type TEXT, "
+        "priority INTEGER, status TEXT, timestamp REAL, spilled_at REAL)",
+        "CREATE INDEX IF NOT EXISTS ix_delivered_messages_receiver ON delivered_messages (receiver_id, timestamp)",
+    )
+
+    def __init__(self, db_path: str, batch_size: int = 2000, flush_interval: float = 1.0,
+                 max_pending: int = 50000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = get_logger("message_spill")
+        self.spilled = 0
+        self.dropped = 0  # 队列满被丢弃的记录数
+        # 有界：内存不随积压增长
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+        self._thread = threading.Thread(target=self._run, name="message_spill", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def put(self, record: DeliveredRecord) -> bool:
+        """入队一条淘汰记录；队列已满时丢弃并返回 False"""
+        try:
+            self._queue.put_nowait((record.message_id, record.sender_id, record.receiver_id, record.message_type,
+                                    record.priority, record.status, record.timestamp, time.time()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 10000 == 0:
+                self.logger.warning(f"投递记录落盘积压已满（{self._queue.maxsize}），累计丢弃 {self.dropped} 条")
+            return False
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                batch.append(item)
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            stopping = any(row is None for row in batch)
+            rows = [row for row in batch if row is not None]
+            if rows:
+                try:
+                    conn.executemany("INSERT OR REPLACE INTO delivered_messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    conn.commit()
+                    self.spilled += len(rows)
+                except sqlite3.Error as e:
+                    self.logger.error(f"投递记录落盘失败（{len(rows)} 条）: {e}")
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    async def flush(self):
+        """等待已入队记录全部写入（在线程中等待，不阻塞事件循环）"""
+        await asyncio.to_thread(self._queue.join)
+
+    def close(self):
+        """写完积压后停止后台线程（同步阻塞，在事件循环中请用 asyncio.to_thread 调用）"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def query(self, message_id: Optional[str] = None, receiver_id: Optional[str] = None,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        """查询已落盘的投递记录（按消息时间倒序）"""
+        sql = "SELECT message_id, sender_id, receiver_id, message_type, priority, status, timestamp FROM delivered_messages"
+        clauses, params = [], []
+        if message_id is not None:
+            clauses.append("message_id = ?")
+            params.append(message_id)
+        if receiver_id is not None:
+            clauses.append("receiver_id = ?")
+            params.append(receiver_id)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        keys = ("message_id", "sender_id", "receiver_id", "message_type", "priority", "status", "timestamp")
+        return [
+            {**dict(zip(keys, row)), "timestamp": datetime.fromtimestamp(row[6]).isoformat()}
+            for row in rows
+        ]
+
+
+class DeliveredIndex:
+    """
+    已投递消息索引：message_id -> DeliveredRecord，按最近访问排序（LRU）
+    超过 max_entries 或 ttl 秒未被访问的记录被淘汰；配置了 spill 时淘汰记录写入 SQLite
+    各状态计数增量维护，统计不需要遍历
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl: float = 3600.0, spill: Optional[MessageSpill] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl  # 0 为不按时间淘汰
+        self.spill = spill
+        self._items: "OrderedDict[str, DeliveredRecord]" = OrderedDict()
+        self.counts: Counter = Counter()  # {状态: 条数}
+        self.added = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self._items
+
+    def __getitem__(self, message_id: str) -> DeliveredRecord:
+        return self._items[message_id]
+
+    def get(self, message_id: str) -> Optional[DeliveredRecord]:
+        return self._items.get(message_id)
+
+    def values(self):
+        return self._items.values()
+
+    def add(self, message: Message) -> DeliveredRecord:
+        record = self._items.get(message.message_id)
+        if record is None:
+            record = self._items[message.message_id] = DeliveredRecord(message)
+            self.added += 1
+        else:
+            # 同一条广播投递给多个接收者时共用一条记录
+            self.counts[record.status] -= 1
+            record.status = message.status
+            record.touched_at = time.monotonic()
+            self._items.move_to_end(message.message_id)
+        self.counts[record.status] += 1
+        self.expire()
+        return record
+
+    def set_status(self, message_id: str, status: str) -> bool:
+        record = self._items.get(message_id)
+        if record is None:
+            return False
+        self.counts[record.status] -= 1
+        record.status = status
+        self.counts[status] += 1
+        record.touched_at = time.monotonic()
+        self._items.move_to_end(message_id)
+        return True
+
+    def expire(self):
+        """淘汰超出容量与过期的记录（从最久未访问的一端开始，摊还 O(1)）"""
+        cutoff = time.monotonic() - self.ttl if self.ttl > 0 else None
+        while self._items:
+            oldest = next(iter(self._items.values()))
+            if len(self._items) <= self.max_entries and (cutoff is None or oldest.touched_at >= cutoff):
+                break
+            self._items.popitem(last=False)
+            self.counts[oldest.status] -= 1
+            self.evicted += 1
+            if self.spill is not None:
+                self.spill.put(oldest)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._items),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "added": self.added,
+            "evicted": self.evicted,
+            "spilled": self.spill.spilled if self.spill is not None else None,
+            "spill_dropped": self.spill.dropped if self.spill is not None else None,
+        }
+
+
+class _BroadcastLog:
+    """
+    单一优先级的广播日志：只追加，按绝对下标寻址
+    各接收者以游标记录读到的位置，所有游标都越过的前缀会被回收
+    """
+    __slots__ = ("items", "base")
+
+    def __init__(self):
+        self.items: List[Tuple[int, Message]] = []  # [(序号, 消息)]
+        self.base = 0  # items[0] 的绝对下标
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.items)
+
+    def entry(self, index: int) -> Tuple[int, Message]:
+        return self.items[index - self.base]
+
+    def trim(self, upto: int):
+        """回收绝对下标 upto 之前的条目"""
+        if upto > self.base:
+            del self.items[:upto - self.base]
+            self.base = upto
+
+
+class _Receiver:
+    """单个接收者的队列状态：定向消息堆 + 各优先级广播日志的游标"""
+    __slots__ = ("heap", "cursors", "broadcasts_seen")
+
+    def __init__(self, broadcasts_seen: int):
+        self.heap: List[Tuple[int, int, Message]] = []  # [(-优先级, 序号, 消息)]
+        self.cursors: Dict[int, int] = {}  # {优先级: 下一条要读的广播绝对下标}
+        self.broadcasts_seen = broadcasts_seen  # 已读（或加入前已回收）的广播条数
 
 
 class MessageQueue:
     """
     消息队列：实现Agent间的异步通信机制
+    - 定向消息：每个接收者一个二叉堆，键为 (-优先级, 序号)，入队 / 出队 O(log n)
+    - 广播消息：按优先级分别追加到共享日志，每个接收者持有游标，每条广播对每个接收者各投递一次
+    - 出队时比较堆顶与各优先级广播游标处的消息，序号单调递增保证同优先级先进先出
+    - 待处理数量由计数器维护，O(1)
     """
-    def __init__(self):
-        self.queue: Dict[str, List[Message]] = {}  # 按接收者ID分组存储消息
+    BROADCAST = "broadcast"
+    _TRIM_THRESHOLD = 1024  # 广播日志已读前缀超过该长度时尝试回收
+
+    def __init__(self, delivered_max: int = 100000, delivered_ttl: float = 3600.0,
+                 spill: Optional[MessageSpill] = None):
+        self._receivers: Dict[str, _Receiver] = {}
+        self._broadcasts: Dict[int, _BroadcastLog] = {}  # {优先级: 广播日志}
+        self._broadcast_total = 0  # 累计广播条数
+        self._direct_pending = 0
+        self._seq = itertools.count()
         self.logger = get_logger("message_queue")
-        self.delivered_messages: Dict[str, Message] = {}  # 已投递的消息
+        # 已投递消息的精简记录（容量 / TTL 有界，可选淘汰落盘）
+        self.delivered_messages = DeliveredIndex(delivered_max, delivered_ttl, spill)
+
+    def _receiver(self, agent_id: str) -> _Receiver:
+        receiver = self._receivers.get(agent_id)
+        if receiver is None:
+            # 新接收者从「仍有接收者未读」的位置开始读
+            cursors = {p: self._low_water(p) for p in self._broadcasts}
+            unread = sum(log.end - cursors[p] for p, log in self._broadcasts.items())
+            receiver = _Receiver(self._broadcast_total - unread)
+            receiver.cursors = cursors
+            self._receivers[agent_id] = receiver
+        return receiver
+
+    def add_receiver(self, agent_id: str):
+        """登记接收者；登记后发出的广播保证投递给它（收到定向消息的接收者也会自动登记）"""
+        self._receiver(agent_id)
+
+    def remove_receiver(self, agent_id: str):
+        """移除接收者（丢弃其未读定向消息，不再阻止广播日志回收）"""
+        receiver = self._receivers.pop(agent_id, None)
+        if receiver is not None:
+            self._direct_pending -= len(receiver.heap)
 
     def send_message(self, message: Message) -> str:
         """
         发送消息到队列
         """
-        # 将消息添加到对应接收者ID的分组中
-        if message.receiver_id not in self.queue:
-            self.queue[message.receiver_id] = []
-        self.queue[message.receiver_id].append(message)
+        seq = next(self._seq)
+        if message.receiver_id == self.BROADCAST:
+            log = self._broadcasts.get(message.priority)
+            if log is None:
+                log = self._broadcasts[message.priority] = _BroadcastLog()
+            log.items.append((seq, message))
+            self._broadcast_total += 1
+        else:
+            heapq.heappush(self._receiver(message.receiver_id).heap, (-message.priority, seq, message))
+            self._direct_pending += 1
         self.logger.debug(f"消息已发送：{message.message_id} (发送者: {message.sender_id}, 接收者: {message.receiver_id})")
         return message.message_id
 
+    def requeue(self, agent_id: str, message: Message) -> bool:
+        """
+        把已取出的消息重新放回指定接收者的队列（广播消息也只重投给该接收者）
+        接收者已移除时丢弃消息并返回 False，不重新登记
+        """
+        receiver = self._receivers.get(agent_id)
+        if receiver is None:
+            self.logger.debug(f"接收者 {agent_id} 已移除，丢弃重投消息 {message.message_id}")
+            return False
+        message.status = "pending"
+        heapq.heappush(receiver.heap, (-message.priority, next(self._seq), message))
+        self._direct_pending += 1
+        return True
+
     def get_message(self, agent_id: str) -> Optional[Message]:
         """
-        获取指定Agent的下一条消息（优先处理高优先级消息）
+        获取指定Agent的下一条消息（优先处理高优先级消息）；未登记的接收者返回 None，不会因此被登记
         """
-        # 收集目标为该Agent或广播的消息
-        all_target_messages = []
-        
-        # 获取直接发送给该Agent的消息
-        if agent_id in self.queue:
-            all_target_messages.extend(self.queue[agent_id])
-        
-        # 获取广播消息
-        if "broadcast" in self.queue:
-            all_target_messages.extend(self.queue["broadcast"])
-        
-        if not all_target_messages:
+        receiver = self._receivers.get(agent_id)
+        if receiver is None:
+            return None
+        best = receiver.heap[0][:2] if receiver.heap else None
+        best_level = None
+        for priority, log in self._broadcasts.items():
+            index = receiver.cursors.get(priority, log.base)
+            if index < log.end:
+                key = (-priority, log.entry(index)[0])
+                if best is None or key < best:
+                    best, best_level = key, priority
+        if best is None:
             return None
 
-        # 按优先级和时间排序
-        all_target_messages.sort(key=lambda x: (-x.priority, x.timestamp))
-        
-        # 获取第一条消息
-        message = all_target_messages[0]
-        
-        # 从对应的队列中移除该消息
-        if message.receiver_id == agent_id:
-            self.queue[agent_id].remove(message)
-            # 如果该队列空了，移除该键
-            if not self.queue[agent_id]:
-                del self.queue[agent_id]
-        else:  # 广播消息
-            self.queue["broadcast"].remove(message)
-            # 如果广播队列空了，移除该键
-            if not self.queue["broadcast"]:
-                del self.queue["broadcast"]
-        
+        if best_level is None:
+            message = heapq.heappop(receiver.heap)[2]
+            self._direct_pending -= 1
+        else:
+            log = self._broadcasts[best_level]
+            index = receiver.cursors.get(best_level, log.base)
+            message = log.entry(index)[1]
+            receiver.cursors[best_level] = index + 1
+            receiver.broadcasts_seen += 1
+            self._maybe_trim(best_level)
+
         # 更新消息状态为已投递
         message.status = "delivered"
-        self.delivered_messages[message.message_id] = message
-        
+        self.delivered_messages.add(message)
+
         self.logger.debug(f"消息已投递：{message.message_id} 给 Agent {agent_id}")
         return message
 
+    def _low_water(self, priority: int) -> int:
+        """该优先级广播日志中所有接收者都已读过的位置"""
+        log = self._broadcasts[priority]
+        return min((r.cursors.get(priority, log.base) for r in self._receivers.values()), default=log.base)
+
+    def _maybe_trim(self, priority: int):
+        """回收所有接收者都已读过的广播前缀（摊还 O(1)）"""
+        log = self._broadcasts[priority]
+        if len(log.items) < self._TRIM_THRESHOLD:
+            return
+        upto = self._low_water(priority)
+        if (upto - log.base) * 2 >= len(log.items):
+            log.trim(upto)
+
     def broadcast_message(self, sender_id: str, message_type: str, content: Dict[str, Any], priority: int = 0) -> str:
         """
         广播消息给所有Agent
@@ -91,7 +413,7 @@ class MessageQueue:
         message = Message(
             message_id=str(uuid4()),
             sender_id=sender_id,
-            receiver_id="broadcast",
+            receiver_id=self.BROADCAST,
             message_type=message_type,
             content=content,
             priority=priority
@@ -102,40 +424,124 @@ class MessageQueue:
         """
         标记消息为已处理
         """
-        if message_id in self.delivered_messages:
-            self.delivered_messages[message_id].status = "processed"
+        if self.delivered_messages.set_status(message_id, "processed"):
             self.logger.debug(f"消息已处理：{message_id}")
             return True
         return False
 
+    async def get_delivered(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """查询投递记录：先查内存索引，已淘汰的再查落盘历史（落盘读写都在线程中进行）"""
+        record = self.delivered_messages.get(message_id)
+        if record is not None:
+            return record.to_dict()
+        spill = self.delivered_messages.spill
+        if spill is not None:
+            await spill.flush()
+            rows = await asyncio.to_thread(spill.query, message_id=message_id, limit=1)
+            return rows[0] if rows else None
+        return None
+
     def get_pending_messages_count(self, agent_id: str) -> int:
         """
-        获取指定Agent的待处理消息数量
+        获取指定Agent的待处理消息数量（定向 + 未读广播），O(1)
+        未登记的接收者没有待处理消息，返回 0（查询不会登记接收者，否则其游标会卡住广播日志回收）
         """
-        count = 0
-        # 计算直接发送给该Agent的消息数量
-        if agent_id in self.queue:
-            count += len(self.queue[agent_id])
-        # 计算广播消息数量
-        if "broadcast" in self.queue:
-            count += len(self.queue["broadcast"])
-        return count
+        receiver = self._receivers.get(agent_id)
+        if receiver is None:
+            return 0
+        return len(receiver.heap) + self._broadcast_total - receiver.broadcasts_seen
+
+    @property
+    def pending_direct_count(self) -> int:
+        """所有接收者未读定向消息总数"""
+        return self._direct_pending
+
+    @property
+    def unread_broadcast_count(self) -> int:
+        """尚有接收者未读的广播条数"""
+        return sum(log.end - self._low_water(p) for p, log in self._broadcasts.items())
+
+
+class InboxFullError(Exception):
+    """接收者收件箱已满"""
+
+
+class _ConsumerStats:
+    """单个接收者的投递统计"""
+    __slots__ = ("delivered", "processed", "errors", "redelivered", "dead_lettered",
+                 "latency_total", "latency_max", "handle_total", "recent", "started_at")
+
+    def __init__(self):
+        self.delivered = 0
+        self.processed = 0
+        self.errors = 0
+        self.redelivered = 0
+        self.dead_lettered = 0
+        self.latency_total = 0.0  # 入队到处理完成（秒）
+        self.latency_max = 0.0
+        self.handle_total = 0.0  # 处理器耗时（秒）
+        self.recent: Deque[float] = deque(maxlen=1000)  # 最近的端到端延迟样本，用于 p95
+        self.started_at = time.monotonic()
+
+    def record(self, latency: float, handle: float):
+        self.processed += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.handle_total += handle
+        self.recent.append(latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        recent = sorted(self.recent)
+        return {
+            "delivered": self.delivered,
+            "processed": self.processed,
+            "errors": self.errors,
+            "redelivered": self.redelivered,
+            "dead_lettered": self.dead_lettered,
+            "throughput_per_sec": round(self.processed / elapsed, 2),
+            "latency_ms": {
+                "avg": round(self.latency_total / self.processed * 1000, 3) if self.processed else None,
+                "p95": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 3) if recent else None,
+                "max": round(self.latency_max * 1000, 3),
+            },
+            "avg_handle_ms": round(self.handle_total / self.processed * 1000, 3) if self.processed else None,
+        }
 
 
 class CommunicationManager:
     """
     通信管理器：管理Agent间的通信，提供发送、接收和广播消息的接口
+    - start() 后每个已注册处理器一个消费协程，有消息即投递，慢处理器只拖慢自己
+    - 处理器可为普通函数或协程函数；成功后自动 ack（mark_message_processed），
+      抛异常则重新入队，超过 max_redeliveries 次后记为死信
+    - 未注册处理器的 Agent 可 await receive() 拉取，处理完自行 mark_message_processed，失败可 nack()
+    - 收件箱有界：某接收者待处理消息达到 inbox_size 时，发给它的定向消息抛出 InboxFullError
+    - process_messages() 仍可用于同步环境下的一次性清扫
     """
-    def __init__(self):
-        self.message_queue = MessageQueue()
+    def __init__(self, inbox_size: int = 10000, max_redeliveries: int = 3, redelivery_delay: float = 0.0,
+                 delivered_max: int = 100000, delivered_ttl: float = 3600.0, spill_path: Optional[str] = None):
+        spill = MessageSpill(spill_path) if spill_path else None
+        self.message_queue = MessageQueue(delivered_max, delivered_ttl, spill)
         self.logger = get_logger("communication_manager")
         self.agent_handlers: Dict[str, Callable[[Message], None]] = {}  # Agent消息处理器映射
+        self.inbox_size = inbox_size
+        self.max_redeliveries = max_redeliveries
+        self.redelivery_delay = redelivery_delay
+        self._wakeups: Dict[str, asyncio.Event] = {}  # {agent_id: 有新消息}
+        self._consumers: Dict[str, asyncio.Task] = {}  # {agent_id: 消费协程}
+        self._stats: Dict[str, _ConsumerStats] = {}
+        self._attempts: Dict[Tuple[str, str], int] = {}  # {(agent_id, message_id): 已失败次数}
+        self._running = False
 
     def register_agent_handler(self, agent_id: str, handler: Callable[[Message], None]):
         """
         注册Agent的消息处理器
         """
         self.agent_handlers[agent_id] = handler
+        self.message_queue.add_receiver(agent_id)
+        if self._running:
+            self._start_consumer(agent_id)
         self.logger.info(f"Agent {agent_id} 的消息处理器已注册")
 
     def unregister_agent_handler(self, agent_id: str):
@@ -144,19 +550,172 @@ class CommunicationManager:
         """
         if agent_id in self.agent_handlers:
             del self.agent_handlers[agent_id]
+            task = self._consumers.pop(agent_id, None)
+            if task is not None:
+                task.cancel()
+            self.message_queue.remove_receiver(agent_id)
             self.logger.info(f"Agent {agent_id} 的消息处理器已注销")
 
     def send_message(self, message: Message) -> str:
         """
-        发送消息
+        发送消息（定向消息的接收者收件箱已满时抛出 InboxFullError）
         """
-        return self.message_queue.send_message(message)
+        if message.receiver_id == MessageQueue.BROADCAST:
+            message_id = self.message_queue.send_message(message)
+            for wakeup in self._wakeups.values():
+                wakeup.set()
+            return message_id
+        if self.message_queue.get_pending_messages_count(message.receiver_id) >= self.inbox_size:
+            raise InboxFullError(f"Agent {message.receiver_id} 收件箱已满（{self.inbox_size}）")
+        message_id = self.message_queue.send_message(message)
+        self._wakeup(message.receiver_id).set()
+        return message_id
 
     def broadcast_message(self, sender_id: str, message_type: str, content: Dict, priority: int = 0) -> str:
         """
         广播消息
         """
-        return self.message_queue.broadcast_message(sender_id, message_type, content, priority)
+        message_id = self.message_queue.broadcast_message(sender_id, message_type, content, priority)
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+        return message_id
+
+    # ---------- 异步投递 ----------
+
+    def _wakeup(self, agent_id: str) -> asyncio.Event:
+        wakeup = self._wakeups.get(agent_id)
+        if wakeup is None:
+            wakeup = self._wakeups[agent_id] = asyncio.Event()
+        return wakeup
+
+    def _agent_stats(self, agent_id: str) -> _ConsumerStats:
+        stats = self._stats.get(agent_id)
+        if stats is None:
+            stats = self._stats[agent_id] = _ConsumerStats()
+        return stats
+
+    async def start(self):
+        """启动投递：为每个已注册处理器启动消费协程"""
+        if self._running:
+            return
+        self._running = True
+        for agent_id in self.agent_handlers:
+            self._start_consumer(agent_id)
+        self.logger.info(f"消息投递已启动（{len(self._consumers)} 个消费者）")
+
+    async def stop(self):
+        """停止投递：取消全部消费协程（未处理消息留在队列中），并等待淘汰记录落盘"""
+        self._running = False
+        consumers, self._consumers = list(self._consumers.values()), {}
+        for task in consumers:
+            task.cancel()
+        for task in consumers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        spill = self.message_queue.delivered_messages.spill
+        if spill is not None:
+            await spill.flush()
+        self.logger.info("消息投递已停止")
+
+    def _start_consumer(self, agent_id: str):
+        if agent_id not in self._consumers:
+            self._consumers[agent_id] = asyncio.create_task(
+                self._consume(agent_id), name=f"message_consumer:{agent_id}"
+            )
+
+    async def _consume(self, agent_id: str):
+        wakeup = self._wakeup(agent_id)
+        while True:
+            message = self.message_queue.get_message(agent_id)
+            if message is None:
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            handler = self.agent_handlers.get(agent_id)
+            if handler is None:
+                self.message_queue.requeue(agent_id, message)
+                return
+            self._agent_stats(agent_id).delivered += 1
+            await self._handle(agent_id, handler, message)
+
+    async def _handle(self, agent_id: str, handler: Callable, message: Message):
+        started = time.monotonic()
+        try:
+            result = handler(message)
+            if inspect.isawaitable(result):
+                await result
+        except asyncio.CancelledError:
+            # 停止时正在处理的消息放回队列，重启后重新投递（已注销的 Agent 直接丢弃）
+            if agent_id in self.agent_handlers:
+                self.message_queue.requeue(agent_id, message)
+            raise
+        except Exception as e:
+            self.logger.error(f"处理消息 {message.message_id} 失败：{e}")
+            await self.nack(agent_id, message)
+            return
+        self._ack(agent_id, message.message_id, message.timestamp.timestamp(), time.monotonic() - started)
+
+    def _ack(self, agent_id: str, message_id: str, created_at: float, handle_seconds: float):
+        self._attempts.pop((agent_id, message_id), None)
+        self.message_queue.mark_message_processed(message_id)
+        self._agent_stats(agent_id).record(time.time() - created_at, handle_seconds)
+
+    async def nack(self, agent_id: str, message: Message):
+        """处理失败：重新入队，失败次数超过 max_redeliveries 后记为死信"""
+        stats = self._agent_stats(agent_id)
+        stats.errors += 1
+        key = (agent_id, message.message_id)
+        attempts = self._attempts.get(key, 0) + 1
+        if attempts > self.max_redeliveries:
+            self._attempts.pop(key, None)
+            message.status = "failed"
+            self.message_queue.delivered_messages.set_status(message.message_id, "failed")
+            stats.dead_lettered += 1
+            self.logger.error(f"消息 {message.message_id} 投递给 Agent {agent_id} 失败 {attempts} 次，已丢弃")
+            return
+        if self.redelivery_delay > 0:
+            await asyncio.sleep(self.redelivery_delay)
+        if not self.message_queue.requeue(agent_id, message):
+            return
+        self._attempts[key] = attempts
+        stats.redelivered += 1
+        self._wakeup(agent_id).set()
+
+    async def receive(self, agent_id: str, timeout: Optional[float] = None) -> Optional[Message]:
+        """
+        等待并取出指定Agent的下一条消息；超时返回 None
+        处理完成后调用 mark_message_processed(message_id)，失败调用 nack()
+        """
+        self.message_queue.add_receiver(agent_id)
+        wakeup = self._wakeup(agent_id)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            message = self.message_queue.get_message(agent_id)
+            if message is not None:
+                self._agent_stats(agent_id).delivered += 1
+                return message
+            wakeup.clear()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def mark_message_processed(self, message_id: str, agent_id: Optional[str] = None) -> bool:
+        """
+        确认消息已处理（receive() 拉取模式下使用；传入 agent_id 时计入该 Agent 的延迟统计）
+        """
+        record = self.message_queue.delivered_messages.get(message_id)
+        if record is None:
+            return False
+        if agent_id is not None:
+            self._ack(agent_id, message_id, record.timestamp, 0.0)
+            return True
+        return self.message_queue.mark_message_processed(message_id)
 
     def process_messages(self):
         """
@@ -180,27 +739,34 @@ class CommunicationManager:
         """
         获取通信统计信息
         """
-        # 计算待处理消息总数
-        pending_count = 0
-        for messages in self.message_queue.queue.values():
-            pending_count += len(messages)
+        # 计算待处理消息总数（定向消息 + 尚有接收者未读的广播）
+        pending_count = self.message_queue.pending_direct_count + self.message_queue.unread_broadcast_count
         
-        # 计算已投递和已处理消息数量
-        delivered_count = 0
-        processed_count = 0
-        for msg in self.message_queue.delivered_messages.values():
-            if msg.status == "delivered":
-                delivered_count += 1
-            elif msg.status == "processed":
-                processed_count += 1
+        # 已投递和已处理消息数量（内存索引中的记录，增量计数）
+        delivered_index = self.message_queue.delivered_messages
+        delivered_count = delivered_index.counts["delivered"]
+        processed_count = delivered_index.counts["processed"]
         
+        agents = {}
+        for agent_id, stats in self._stats.items():
+            agents[agent_id] = {
+                "pending": self.message_queue.get_pending_messages_count(agent_id),
+                "consumer_running": agent_id in self._consumers,
+                **stats.to_dict(),
+            }
         return {
             "total_messages": pending_count + len(self.message_queue.delivered_messages),
             "pending_messages": pending_count,
             "delivered_messages": delivered_count,
-            "processed_messages": processed_count
+            "processed_messages": processed_count,
+            "running": self._running,
+            "redelivered": sum(s.redelivered for s in self._stats.values()),
+            "dead_lettered": sum(s.dead_lettered for s in self._stats.values()),
+            "delivered_index": delivered_index.stats(),
+            "agents": agents,
         }
 
 
 # 导出核心类
-__all__ = ["Message", "MessageQueue", "CommunicationManager"]
\ No newline at end of file
+__all__ = ["Message", "MessageQueue", "CommunicationManager", "InboxFullError",
+           "DeliveredRecord", "DeliveredIndex", "MessageSpill"]
\ No newline at end of file
@@ -8,7 +8,7 @@ from .scheduler import TaskScheduler
 from .security import SecurityManager, get_api_key
 from .di import ServiceCollection, ServiceContainer, ServiceNotFoundError, CyclicDependencyError
 from .lock import ServerLockManager, ServerLockError, ServerLockedError, LockInfo
-from .swarm import SwarmBatch, SwarmTaskSpec, SwarmTaskResult, SwarmConfig, SwarmStatus, swarm_execute
+from .swarm import SwarmBatch, SwarmTaskSpec, SwarmTaskResult, SwarmConfig, SwarmStatus, swarm_execute, swarm_stream
 from .kaos import Kaos, LocalKaos, Environment, StatResult, KaosProcess, KaosError, KaosFileNotFoundError
 from .result import AgentResult, ResultCode
 from .retry import RetryTemplate, RetryExhaustedError, retry, retry_async
@@ -34,7 +34,7 @@ __all__ = [
     # 锁
     "ServerLockManager", "ServerLockError", "ServerLockedError", "LockInfo",
     # Swarm
-    "SwarmBatch", "SwarmTaskSpec", "SwarmTaskResult", "SwarmConfig", "SwarmStatus", "swarm_execute",
+    "SwarmBatch", "SwarmTaskSpec", "SwarmTaskResult", "SwarmConfig", "SwarmStatus", "swarm_execute", "swarm_stream",
     # Kaos
     "Kaos", "LocalKaos", "Environment", "StatResult", "KaosProcess", "KaosError", "KaosFileNotFoundError",
     # AgentResult
@@ -1,40 +1,131 @@
 """
-数据库管理层 - SQLAlchemy + aiosqlite
+数据库管理层 - SQLAlchemy 异步引擎
 提供异步、并发安全的数据库访问，替代原来的 JSON 文件存储。
+默认使用 SQLite (aiosqlite)，配置 database_config.url 后可切换到 PostgreSQL (asyncpg) 等服务端数据库。
 """
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import List, Optional, Tuple
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from config.config import DatabaseConfig
 
 
 class Base(DeclarativeBase):
     pass
 
 
+# 同步驱动 URL → 异步驱动
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+# 旧版本创建、现已移除的索引，迁移时删除（ix_tasks_pending_queue：规划器始终选用 ix_tasks_queue，只增加写入开销）
+OBSOLETE_INDEXES = ("ix_tasks_pending_queue",)
+
+
+def resolve_database_url(config: DatabaseConfig, db_path: Optional[str] = None) -> URL:
+    """
+    解析数据库 URL：显式 db_path > config.url > 默认 data_storage/mcasys.db
+    未指定驱动的 URL 自动补全异步驱动（如 postgresql:// → postgresql+asyncpg://）
+    """
+    if db_path is None and config.url:
+        url = make_url(config.url)
+        async_driver = _ASYNC_DRIVERS.get(url.drivername)
+        return url.set(drivername=async_driver) if async_driver else url
+
+    if db_path is None:
+        db_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_storage")
+        os.makedirs(db_dir, exist_ok=True)
+        db_path = os.path.join(db_dir, "mcasys.db")
+    return make_url(f"sqlite+aiosqlite:///{db_path}")
+
+
+def engine_options(url: URL, config: DatabaseConfig) -> dict:
+    """
+    create_async_engine 参数：连接池配置（SQLite 内存库使用 StaticPool，不适用池大小）
+    pool_pre_ping 未显式配置时只对服务端数据库开启：SQLite 本地文件连接不会被服务端断开，预检只多一次往返
+    """
+    sqlite = url.get_backend_name() == "sqlite"
+    pre_ping = config.pool_pre_ping if config.pool_pre_ping is not None else not sqlite
+    options = {"echo": config.echo, "pool_pre_ping": pre_ping}
+    if sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            return options
+    options.update(
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_recycle=config.pool_recycle,
+        pool_timeout=config.pool_timeout,
+    )
+    return options
+
+
+_SQLITE_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+
+def sqlite_pragmas(config: DatabaseConfig) -> List[Tuple[str, object]]:
+    """根据配置生成 SQLite PRAGMA 列表（sqlite_tuning 关闭时为空）"""
+    if not config.sqlite_tuning:
+        return []
+    pragmas = [
+        ("journal_mode", config.sqlite_journal_mode.upper()),
+        ("synchronous", config.sqlite_synchronous.upper()),
+        ("temp_store", config.sqlite_temp_store.upper()),
+        ("mmap_size", int(config.sqlite_mmap_size)),
+        ("cache_size", int(config.sqlite_cache_size)),
+        ("busy_timeout", int(config.sqlite_busy_timeout)),
+    ]
+    for name, value in pragmas:
+        choices = _SQLITE_PRAGMA_CHOICES.get(name)
+        if choices and value not in choices:
+            raise ValueError(f"非法的 SQLite {name}: {value}，允许: {sorted(choices)}")
+    return pragmas
+
+
+def install_sqlite_pragmas(engine: AsyncEngine, config: DatabaseConfig) -> None:
+    """在连接池每个新连接建立时应用 SQLite 性能配置"""
+    pragmas = sqlite_pragmas(config)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
 class DatabaseManager:
     """异步数据库管理器（单例）"""
 
     _instance = None
 
-    def __new__(cls, db_path: str = None):
+    def __new__(cls, db_path: str = None, config: Optional[DatabaseConfig] = None):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, config: Optional[DatabaseConfig] = None):
         if self._initialized:
             return
-        if db_path is None:
-            db_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_storage")
-            os.makedirs(db_dir, exist_ok=True)
-            db_path = os.path.join(db_dir, "mcasys.db")
-        self._db_path = db_path
-        self._engine = create_async_engine(
-            f"sqlite+aiosqlite:///{db_path}",
-            echo=False,
-            connect_args={"check_same_thread": False},
-        )
+        self._config = config or DatabaseConfig()
+        self._url = resolve_database_url(self._config, db_path)
+        self._engine = create_async_engine(self._url, **engine_options(self._url, self._config))
+        if self._url.get_backend_name() == "sqlite":
+            install_sqlite_pragmas(self._engine, self._config)
         self._session_factory = async_sessionmaker(
             self._engine, class_=AsyncSession, expire_on_commit=False
         )
@@ -48,19 +139,43 @@ class DatabaseManager:
     def engine(self):
         return self._engine
 
+    @property
+    def backend(self) -> str:
+        """数据库后端名称：sqlite / postgresql / ..."""
+        return self._url.get_backend_name()
+
     async def create_tables(self):
-        """创建所有表"""
+        """创建所有表，并对已存在的表执行轻量迁移"""
         async with self._engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(self._migrate)
+
+    @staticmethod
+    def _migrate(sync_conn):
+        """轻量迁移：create_all 跳过已存在的表，此处补建后续版本新增的可空列与索引，并删除已废弃的索引"""
+        inspector = inspect(sync_conn)
+        quote = sync_conn.dialect.identifier_preparer.quote
+        for name in OBSOLETE_INDEXES:
+            sync_conn.execute(text(f"DROP INDEX IF EXISTS {quote(name)}"))
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=sync_conn.dialect)
+                    sync_conn.execute(text(
+                        f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                    ))
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
 
     async def close(self):
         """关闭数据库连接"""
         await self._engine.dispose()
 
 
-async def init_db(db_path: str = None):
+async def init_db(db_path: str = None, config: Optional[DatabaseConfig] = None):
     """初始化数据库：创建引擎、建表"""
-    db = DatabaseManager(db_path)
+    db = DatabaseManager(db_path, config)
     await db.create_tables()
     return db
 
@@ -3,11 +3,14 @@
 实现 Agent 间异步事件驱动通信
 """
 import asyncio
+import time
+from collections import Counter, deque
 from datetime import datetime
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from utils.logger import get_logger
+from config.config import EventBusConfig
 
 
 class EventType(str, Enum):
@@ -26,6 +29,8 @@ class EventType(str, Enum):
     CONFLICT_RESOLVED = "conflict_resolved"
     MESSAGE_RECEIVED = "message_received"
     SYSTEM_NOTIFICATION = "system_notification"
+    RPC_REQUEST = "rpc_request"
+    RPC_RESPONSE = "rpc_response"
 
 
 @dataclass
@@ -37,6 +42,389 @@ class Event:
     data: Dict[str, Any] = field(default_factory=dict)
     timestamp: datetime = field(default_factory=datetime.now)
     priority: int = 0  # 0=普通, 1=重要, 2=紧急
+    target: Optional[str] = None  # 点对点目标 Agent ID，只投递给按该 target 订阅的回调（及不限 target 的订阅者）
+    offset: Optional[int] = None  # 事件日志偏移量（启用 journal 时发布即分配，跨重启单调递增）
+    internal: bool = False  # 内部控制消息（如 RPC）：不进历史与事件日志，不投递给通配符订阅者
+
+
+class FifoEventQueue:
+    """按发布顺序出队的事件队列（dispatch_mode=fifo）"""
+
+    def __init__(self):
+        self._items: Deque[Tuple[float, Event]] = deque()  # [(入队时间, 事件)]
+        self._not_empty = asyncio.Event()
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def oldest(self) -> Optional[float]:
+        """最早入队事件的入队时间"""
+        return self._items[0][0] if self._items else None
+
+    def put_nowait(self, event: Event, enqueued_at: Optional[float] = None):
+        self._items.append((enqueued_at or time.monotonic(), event))
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._not_empty.set()
+
+    async def put(self, event: Event):
+        self.put_nowait(event)
+
+    async def get_entry(self) -> Tuple[float, Event]:
+        """取出 (入队时间, 事件)"""
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._items.popleft()
+
+    async def get(self) -> Event:
+        return (await self.get_entry())[1]
+
+    def drop_oldest(self):
+        self._items.popleft()
+
+    def coalesce(self, event: Event) -> bool:
+        """用新事件替换队列中同类型、同 event_id 的待处理事件（保留原入队时间）"""
+        return _replace_pending(self._items, event)
+
+    def clear(self):
+        self._items.clear()
+
+
+class PriorityEventQueue:
+    """
+    按 Event.priority 出队的事件队列（同优先级 FIFO）
+    老化：某优先级队列自上次被服务（或队首入队）起每等待 aging_seconds，有效优先级 +1，
+    持续的高优先级流量下低优先级事件仍能定期得到分发；低优先级积压本身不会抢占紧急事件
+    """
+
+    def __init__(self, aging_seconds: float = 1.0):
+        self._aging = aging_seconds
+        self._levels: Dict[int, Deque[Tuple[float, Event]]] = {}  # {priority: deque[(入队时间, 事件)]}
+        self._last_served: Dict[int, float] = {}
+        self._size = 0
+        self._not_empty = asyncio.Event()
+        self.max_depth: Counter = Counter()
+        self.dispatched: Counter = Counter()
+        self.aged = 0  # 因老化先于更高优先级事件分发的次数
+
+    def __len__(self) -> int:
+        return self._size
+
+    def qsize(self) -> int:
+        return self._size
+
+    def depths(self) -> Dict[int, int]:
+        """各优先级当前积压数"""
+        return {p: len(items) for p, items in sorted(self._levels.items())}
+
+    def oldest(self) -> Optional[float]:
+        """最早入队事件的入队时间"""
+        heads = [items[0][0] for items in self._levels.values() if items]
+        return min(heads) if heads else None
+
+    def put_nowait(self, event: Event, enqueued_at: Optional[float] = None):
+        items = self._levels.setdefault(event.priority, deque())
+        items.append((enqueued_at or time.monotonic(), event))
+        self._size += 1
+        if len(items) > self.max_depth[event.priority]:
+            self.max_depth[event.priority] = len(items)
+        self._not_empty.set()
+
+    async def put(self, event: Event):
+        self.put_nowait(event)
+
+    async def get_entry(self) -> Tuple[float, Event]:
+        """取出 (入队时间, 事件)"""
+        while not self._size:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._pop()
+
+    async def get(self) -> Event:
+        return (await self.get_entry())[1]
+
+    def _pop(self) -> Tuple[float, Event]:
+        now = time.monotonic()
+        best_key, best_priority, top = None, None, None
+        for priority, items in self._levels.items():
+            if not items:
+                continue
+            top = priority if top is None else max(top, priority)
+            starving_since = max(items[0][0], self._last_served.get(priority, 0.0))
+            effective = priority
+            if self._aging > 0:
+                effective += int((now - starving_since) / self._aging)
+            key = (effective, priority)
+            if best_key is None or key > best_key:
+                best_key, best_priority = key, priority
+        entry = self._levels[best_priority].popleft()
+        self._size -= 1
+        self._last_served[best_priority] = now
+        self.dispatched[best_priority] += 1
+        if best_priority < top:
+            self.aged += 1
+        return entry
+
+    def drop_oldest(self):
+        """丢弃最低优先级中最早的事件"""
+        lowest = min(p for p, items in self._levels.items() if items)
+        self._levels[lowest].popleft()
+        self._size -= 1
+
+    def coalesce(self, event: Event) -> bool:
+        """用新事件替换同优先级中同类型、同 event_id 的待处理事件（保留原入队时间）"""
+        return _replace_pending(self._levels.get(event.priority, ()), event)
+
+    def clear(self):
+        self._levels.clear()
+        self._size = 0
+
+
+def _replace_pending(items, event: Event) -> bool:
+    key = (event.event_type, event.event_id)
+    for i in range(len(items) - 1, -1, -1):
+        enqueued_at, pending = items[i]
+        if (pending.event_type, pending.event_id) == key:
+            items[i] = (enqueued_at, event)
+            return True
+    return False
+
+
+OVERFLOW_POLICIES = ("drop_oldest", "block", "coalesce")
+
+
+class _Mailbox:
+    """
+    单个订阅者的有界信箱 + 独立 worker
+    慢订阅者只会让自己的信箱积压，不影响其他订阅者的投递；信箱内同样按 dispatch_mode 排序
+    block 策略下信箱满时事件按到达顺序暂存到该订阅者自己的等待队列，worker 腾出空位后再移入信箱，
+    不丢事件，也不阻塞分发循环与其他订阅者（代价是慢订阅者的积压不受 size 限制）
+    """
+    __slots__ = (
+        "callback", "name", "size", "overflow", "timeout", "_items", "_waiting", "_worker", "_closed",
+        "_logger", "max_depth", "delivered", "dropped", "coalesced", "deferred", "timeouts", "errors",
+        "busy_seconds", "last_lag",
+    )
+
+    def __init__(self, callback: Callable, items, size: int, overflow: str, timeout: float, logger):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的信箱溢出策略: {overflow}（可选 {', '.join(OVERFLOW_POLICIES)}）")
+        self.callback = callback
+        self.name = getattr(callback, "__qualname__", repr(callback))
+        owner_id = getattr(getattr(callback, "__self__", None), "agent_id", None)
+        if owner_id:
+            self.name = f"{self.name}@{owner_id}"  # 同类多个 Agent 实例区分开
+        self.size = size
+        self.overflow = overflow
+        self.timeout = timeout
+        self._items = items
+        self._waiting: Deque[Tuple[float, Event]] = deque()  # block 策略下信箱满时暂存的 (到达时间, 事件)
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+        self._logger = logger
+        self.max_depth = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.deferred = 0  # block 策略下进入等待队列的事件数
+        self.timeouts = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.last_lag = 0.0
+
+    def offer(self, event: Event):
+        """按溢出策略放入信箱：drop_oldest 丢最旧 / block 暂存等待空位 / coalesce 合并同键事件"""
+        if self._closed:
+            return
+        if self.overflow == "block" and (self._waiting or len(self._items) >= self.size):
+            # 已有事件在等待时新事件也排在其后，保持到达顺序
+            self._waiting.append((time.monotonic(), event))
+            self.deferred += 1
+            return
+        if len(self._items) >= self.size:
+            if self.overflow == "coalesce" and self._items.coalesce(event):
+                self.coalesced += 1
+                return
+            self._items.drop_oldest()
+            self.dropped += 1
+        self._items.put_nowait(event)
+        self.max_depth = max(self.max_depth, len(self._items))
+
+    def _refill(self):
+        """把等待队列中的事件按到达顺序移入信箱空位"""
+        while self._waiting and len(self._items) < self.size:
+            enqueued_at, event = self._waiting.popleft()
+            self._items.put_nowait(event, enqueued_at)
+            self.max_depth = max(self.max_depth, len(self._items))
+
+    def start(self):
+        if self._worker is None and not self._closed:
+            self._worker = asyncio.create_task(self._run(), name=f"event_bus:{self.name}")
+
+    async def stop(self):
+        """停止 worker（保留积压事件，重新 start 后继续投递）"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def close(self):
+        """关闭信箱：丢弃积压事件并停止 worker（回调内退订自身时，当前回调结束后退出）"""
+        self._closed = True
+        self._items.clear()
+        self._waiting.clear()
+        if self._worker is not None and self._worker is not asyncio.current_task():
+            self._worker.cancel()
+
+    async def _run(self):
+        while not self._closed:
+            enqueued_at, event = await self._items.get_entry()
+            self._refill()
+            started = time.monotonic()
+            self.last_lag = started - enqueued_at
+            await self._invoke(event)
+            self.busy_seconds += time.monotonic() - started
+            self.delivered += 1
+
+    async def _invoke(self, event: Event):
+        try:
+            if asyncio.iscoroutinefunction(self.callback):
+                if self.timeout > 0:
+                    await asyncio.wait_for(self.callback(event), self.timeout)
+                else:
+                    await self.callback(event)
+            else:
+                self.callback(event)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._logger.warning(f"事件回调超时 [{event.event_type.value}] {self.name}（>{self.timeout}s）")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            self._logger.error(f"事件回调异常 [{event.event_type.value}] {self.name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        heads = [t for t in (self._items.oldest(), self._waiting[0][0] if self._waiting else None) if t is not None]
+        oldest = min(heads) if heads else None
+        return {
+            "name": self.name,
+            "overflow": self.overflow,
+            "depth": len(self._items),
+            "waiting": len(self._waiting),
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "deferred": self.deferred,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "lag_seconds": round(time.monotonic() - oldest, 6) if oldest is not None else 0.0,
+            "last_lag_seconds": round(self.last_lag, 6),
+            "avg_handle_ms": round(self.busy_seconds / self.delivered * 1000, 3) if self.delivered else 0.0,
+        }
+
+
+class _SeqIndex:
+    """只在尾部追加、头部淘汰的序号数组（列表 + 头偏移），支持 O(1) 下标访问与二分"""
+    __slots__ = ("_items", "_head")
+
+    def __init__(self):
+        self._items: List[int] = []
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._items) - self._head
+
+    def __getitem__(self, i: int) -> int:
+        return self._items[self._head + i]
+
+    def append(self, seq: int):
+        self._items.append(seq)
+
+    def popleft(self):
+        self._head += 1
+        # 头部空洞过半时压缩，摊还 O(1)
+        if self._head > 64 and self._head * 2 > len(self._items):
+            del self._items[:self._head]
+            self._head = 0
+
+
+class EventHistory:
+    """
+    定长环形事件历史
+    - 全局环形数组按序号寻址，写入 O(1)，满后覆盖最旧事件
+    - 按事件类型维护序号索引，按类型取最近 N 条为 O(N)
+    - 时间范围查询在时间戳上二分定位，O(log n + limit)
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = max(1, capacity)
+        self._buf: List[Optional[Event]] = [None] * self.capacity
+        self._times: List[float] = [0.0] * self.capacity  # 与 _buf 对应的单调时间键
+        self._first = 0  # 最旧事件序号
+        self._next = 0  # 下一个事件序号
+        self._by_type: Dict[EventType, _SeqIndex] = {}
+
+    def __len__(self) -> int:
+        return self._next - self._first
+
+    def append(self, event: Event):
+        if len(self) == self.capacity:
+            evicted = self._buf[self._first % self.capacity]
+            self._by_type[evicted.event_type].popleft()
+            self._first += 1
+        slot = self._next % self.capacity
+        ts = event.timestamp.timestamp()
+        if self._next > self._first:
+            # 发布顺序与 timestamp 偶有交错，取单调键保证可二分
+            ts = max(ts, self._times[(self._next - 1) % self.capacity])
+        self._buf[slot] = event
+        self._times[slot] = ts
+        self._by_type.setdefault(event.event_type, _SeqIndex()).append(self._next)
+        self._next += 1
+
+    def _event(self, seq: int) -> Event:
+        return self._buf[seq % self.capacity]
+
+    def _time(self, seq: int) -> float:
+        return self._times[seq % self.capacity]
+
+    def _lower_bound(self, index, ts: float) -> int:
+        """在 index（序号序列）中二分第一个时间 >= ts 的位置"""
+        lo, hi = 0, len(index)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time(index[mid]) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, event_type: Optional[EventType] = None, limit: int = 100,
+              since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Event]:
+        """返回满足条件的最近 limit 条事件（按时间正序）；since 含、until 不含"""
+        if event_type is None:
+            index = range(self._first, self._next)
+        else:
+            index = self._by_type.get(event_type)
+            if not index:
+                return []
+        lo, hi = 0, len(index)
+        if since is not None:
+            lo = self._lower_bound(index, since.timestamp())
+        if until is not None:
+            hi = self._lower_bound(index, until.timestamp())
+        lo = max(lo, hi - max(limit, 0))
+        return [self._event(index[i]) for i in range(lo, hi)]
 
 
 class EventBus:
@@ -44,54 +432,126 @@ class EventBus:
     发布/订阅事件总线
     参考 kimi-cli RootWireHub 设计：
     - 支持多订阅者模式
-    - 异步事件分发
-    - 事件历史追踪
+    - 异步事件分发（默认按优先级，dispatch_mode=fifo 时按发布顺序）
+    - 每个订阅者独立信箱与 worker，慢订阅者互不阻塞（超时 / 溢出策略可配置）
+    - 按 (事件类型, target) 建路由索引，点对点消息只投递给目标订阅者
+    - 事件历史追踪（可选持久化事件日志，重启后从日志预热历史并支持按偏移量回放）
     """
 
-    def __init__(self):
+    def __init__(self, config: Optional[EventBusConfig] = None, journal=None):
+        self.config = config or EventBusConfig()
         self._subscribers: Dict[EventType, List[Callable]] = {}
         self._wildcard_subscribers: List[Callable] = []  # 监听所有事件的订阅者
-        self._queue: asyncio.Queue = asyncio.Queue()
-        self._history: List[Event] = []
-        self._max_history = 1000
+        self._keyed_subscribers: Dict[Tuple[EventType, str], List[Callable]] = {}  # {(类型, target): 回调}
+        self._mailboxes: Dict[Callable, _Mailbox] = {}  # {回调: 信箱}，同一回调订阅多个类型时共用
+        self._queue = self._new_queue()
+        self._history = EventHistory(self.config.history_capacity)
+        self.journal = journal  # core.event_journal.EventJournal，None 表示不持久化
+        if journal is not None:
+            for event in journal.tail(self._history.capacity):
+                self._history.append(event)
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self.logger = get_logger("event_bus")
 
-    def subscribe(self, event_type: EventType, callback: Callable):
-        """订阅特定事件类型"""
-        if event_type not in self._subscribers:
-            self._subscribers[event_type] = []
-        self._subscribers[event_type].append(callback)
-        self.logger.debug(f"已订阅事件: {event_type.value}")
+    def subscribe(self, event_type: EventType, callback: Callable, *, target: Optional[str] = None,
+                  mailbox_size: Optional[int] = None, overflow: Optional[str] = None,
+                  timeout: Optional[float] = None):
+        """
+        订阅特定事件类型（mailbox_size / overflow / timeout 缺省取 event_bus_config）
+        timeout 为协程回调单次处理超时，默认不限；超时会取消回调，执行长任务的订阅者不要设置
+        指定 target 时只接收 Event.target 等于该值的事件
+        """
+        self._ensure_mailbox(callback, mailbox_size, overflow, timeout)
+        if target is None:
+            self._subscribers.setdefault(event_type, []).append(callback)
+        else:
+            self._keyed_subscribers.setdefault((event_type, target), []).append(callback)
+        self.logger.debug(f"已订阅事件: {event_type.value}" + (f" -> {target}" if target else ""))
 
-    def subscribe_all(self, callback: Callable):
+    def subscribe_all(self, callback: Callable, *, mailbox_size: Optional[int] = None,
+                      overflow: Optional[str] = None, timeout: Optional[float] = None):
         """订阅所有事件"""
+        self._ensure_mailbox(callback, mailbox_size, overflow, timeout)
         self._wildcard_subscribers.append(callback)
 
     def unsubscribe_all(self, callback: Callable):
         """取消订阅所有事件"""
         if callback in self._wildcard_subscribers:
             self._wildcard_subscribers.remove(callback)
+            self._release_mailbox(callback)
 
-    def unsubscribe(self, event_type: EventType, callback: Callable):
+    def unsubscribe(self, event_type: EventType, callback: Callable, *, target: Optional[str] = None):
         """取消订阅"""
-        if event_type in self._subscribers:
-            self._subscribers[event_type].remove(callback)
+        if target is None:
+            if event_type in self._subscribers:
+                self._subscribers[event_type].remove(callback)
+                self._release_mailbox(callback)
+            return
+        key = (event_type, target)
+        if key in self._keyed_subscribers:
+            self._keyed_subscribers[key].remove(callback)
+            if not self._keyed_subscribers[key]:
+                del self._keyed_subscribers[key]
+            self._release_mailbox(callback)
+
+    def _new_queue(self):
+        if self.config.dispatch_mode == "fifo":
+            return FifoEventQueue()
+        return PriorityEventQueue(self.config.priority_aging_seconds)
 
-    async def publish(self, event: Event):
-        """发布事件（异步）"""
+    def _ensure_mailbox(self, callback: Callable, size: Optional[int], overflow: Optional[str],
+                        timeout: Optional[float]) -> _Mailbox:
+        mailbox = self._mailboxes.get(callback)
+        if mailbox is None:
+            mailbox = _Mailbox(
+                callback,
+                self._new_queue(),
+                size or self.config.subscriber_mailbox_size,
+                overflow or self.config.subscriber_overflow,
+                self.config.subscriber_timeout if timeout is None else timeout,
+                self.logger,
+            )
+            self._mailboxes[callback] = mailbox
+            if self._running:
+                mailbox.start()
+        return mailbox
+
+    def _release_mailbox(self, callback: Callable):
+        """回调已不再订阅任何事件时关闭其信箱"""
+        if callback in self._wildcard_subscribers:
+            return
+        if any(callback in subs for subs in self._subscribers.values()):
+            return
+        if any(callback in subs for subs in self._keyed_subscribers.values()):
+            return
+        mailbox = self._mailboxes.pop(callback, None)
+        if mailbox is not None:
+            mailbox.close()
+
+    async def publish(self, event: Event, *, internal: bool = False):
+        """
+        发布事件（异步）
+        internal=True 用于内部控制消息（如 RPC 请求 / 应答）：只投递给按类型或 target 订阅的回调，
+        不写入内存历史与事件日志，也不推送给通配符订阅者（WebSocket 等）
+        """
+        if internal:
+            event.internal = True
+        if self.journal is not None and not event.internal:
+            self.journal.append(event)
         await self._queue.put(event)
-        self._history.append(event)
-        if len(self._history) > self._max_history:
-            self._history = self._history[-self._max_history:]
+        if not event.internal:
+            self._history.append(event)
 
-    def publish_sync(self, event: Event):
+    def publish_sync(self, event: Event, *, internal: bool = False):
         """同步发布事件（用于非异步上下文）"""
+        if internal:
+            event.internal = True
+        if self.journal is not None and not event.internal:
+            self.journal.append(event)
         self._queue.put_nowait(event)
-        self._history.append(event)
-        if len(self._history) > self._max_history:
-            self._history = self._history[-self._max_history:]
+        if not event.internal:
+            self._history.append(event)
 
     async def _dispatch_loop(self):
         """事件分发循环"""
@@ -105,33 +565,26 @@ class EventBus:
                 self.logger.error(f"事件分发异常: {e}")
 
     async def _dispatch(self, event: Event):
-        """分发单个事件给所有订阅者"""
-        # 通知特定类型订阅者
-        if event.event_type in self._subscribers:
-            for callback in self._subscribers[event.event_type]:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(event)
-                    else:
-                        callback(event)
-                except Exception as e:
-                    self.logger.error(f"事件回调异常 [{event.event_type.value}]: {e}")
-
-        # 通知通配符订阅者
-        for callback in self._wildcard_subscribers:
-            try:
-                if asyncio.iscoroutinefunction(callback):
-                    await callback(event)
-                else:
-                    callback(event)
-            except Exception as e:
-                self.logger.error(f"通配符回调异常: {e}")
+        """
+        将事件投递到订阅者信箱：类型订阅者、目标订阅者（按索引直接定位）、通配符订阅者
+        同一回调以多种方式订阅（如既按类型又按 target）时只投递一次
+        """
+        keyed = self._keyed_subscribers.get((event.event_type, event.target), ()) if event.target else ()
+        wildcard = () if event.internal else self._wildcard_subscribers
+        for callback in dict.fromkeys((*self._subscribers.get(event.event_type, ()), *keyed, *wildcard)):
+            mailbox = self._mailboxes.get(callback)
+            if mailbox is not None:
+                mailbox.offer(event)
 
     async def start(self):
         """启动事件总线"""
         if not self._running:
             self._running = True
+            for mailbox in self._mailboxes.values():
+                mailbox.start()
             self._task = asyncio.create_task(self._dispatch_loop())
+            if self.journal is not None:
+                await self.journal.start()
             self.logger.info("事件总线已启动")
 
     async def stop(self):
@@ -143,13 +596,55 @@ class EventBus:
                 await self._task
             except asyncio.CancelledError:
                 pass
+        for mailbox in list(self._mailboxes.values()):
+            await mailbox.stop()
+        if self.journal is not None:
+            await self.journal.stop()
         self.logger.info("事件总线已停止")
 
-    def get_history(self, event_type: Optional[EventType] = None, limit: int = 100) -> List[Event]:
-        """获取事件历史"""
-        if event_type:
-            return [e for e in self._history if e.event_type == event_type][-limit:]
-        return self._history[-limit:]
+    def get_history(self, event_type: Optional[EventType] = None, limit: int = 100,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Event]:
+        """获取事件历史（最近 limit 条，可按类型与时间范围筛选）"""
+        return self._history.query(event_type, limit, since, until)
+
+    def history_covers(self, since: Optional[datetime]) -> bool:
+        """内存历史是否完整覆盖 since 之后的事件（未覆盖时可改从事件日志读取）"""
+        if since is None or not len(self._history):
+            return True
+        return self._history.query(None, 1, until=since) != [] or len(self._history) < self._history.capacity
+
+    def replay(self, since=None, limit: Optional[int] = None, event_type: Optional[EventType] = None,
+               until: Optional[datetime] = None, latest: bool = False) -> List[Event]:
+        """
+        从事件日志按偏移量顺序回放（未启用 journal 时退回内存历史）
+        since 为 int 时表示最后收到的偏移量，为 datetime 时表示起始时间；latest=True 时取最近的 limit 条
+        """
+        if self.journal is not None:
+            return self.journal.replay(since, limit, event_type, until, latest)
+        if isinstance(since, int):
+            return []
+        return self._history.query(event_type, limit or self._history.capacity, since, until)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """分发统计：积压深度（按优先级）、历史最大深度、已分发数，以及各订阅者信箱的积压与滞后"""
+        stats = {
+            "dispatch_mode": self.config.dispatch_mode,
+            "queue_depth": self._queue.qsize(),
+            "subscribers": sorted(
+                (m.stats() for m in self._mailboxes.values()),
+                key=lambda st: st["lag_seconds"], reverse=True,
+            ),
+        }
+        if isinstance(self._queue, PriorityEventQueue):
+            stats.update({
+                "depth_by_priority": self._queue.depths(),
+                "max_depth_by_priority": dict(self._queue.max_depth),
+                "dispatched_by_priority": dict(self._queue.dispatched),
+                "aged_dispatches": self._queue.aged,
+            })
+        if self.journal is not None:
+            stats["journal"] = self.journal.stats()
+        return stats
 
     @property
     def subscriber_count(self) -> int:
@@ -157,4 +652,6 @@ class EventBus:
         total = len(self._wildcard_subscribers)
         for subs in self._subscribers.values():
             total += len(subs)
+        for subs in self._keyed_subscribers.values():
+            total += len(subs)
         return total
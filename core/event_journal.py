@@ -0,0 +1,375 @@
+"""
+持久化事件日志 - 分段追加写文件 + 后台批量刷盘 + 按偏移量回放
+
+文件布局::
+
+    <journal_dir>/00000000000000000000.log   # 文件名为该段第一条记录的偏移量
+    <journal_dir>/00000000000000052311.log
+
+记录格式（小端）::
+
+    帧:   u32 body 长度 | u32 crc32(body) | body
+    body: u64 offset | f64 时间戳 | i8 priority
+          | u16 长度 + event_type | u16 长度 + event_id | u16 长度 + source | u16 长度 + target
+          | u32 长度 + data（紧凑 JSON）
+
+- append() 只分配偏移量并放入内存待写列表，不做任何 I/O，publish 不会阻塞
+- 后台 writer 每 flush_interval 秒把待写记录一次写入并 fsync（组提交）
+- 段文件超过 segment_bytes 时滚动，按段数 / 时间保留策略删除旧段
+- 启动时校验最后一段，截断崩溃留下的半条记录
+- 写盘失败的批次丢弃并计数（stats 的 failed_batches / failed_events），后续记录另起新段
+"""
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+from utils.logger import get_logger
+from core.event_bus import Event, EventType
+
+_FRAME = struct.Struct("<II")
+_HEAD = struct.Struct("<Qdb")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_SUFFIX = ".log"
+
+
+def encode_event(offset: int, event: Event) -> bytes:
+    """编码为一帧"""
+    parts = [_HEAD.pack(offset, event.timestamp.timestamp(), max(-128, min(127, event.priority)))]
+    for text in (event.event_type.value, event.event_id, event.source, event.target or ""):
+        raw = str(text).encode("utf-8")[:0xFFFF]
+        parts.append(_U16.pack(len(raw)))
+        parts.append(raw)
+    data = json.dumps(event.data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    parts.append(_U32.pack(len(data)))
+    parts.append(data)
+    body = b"".join(parts)
+    return _FRAME.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode_body(body: bytes) -> Tuple[int, Optional[Event]]:
+    """解码 body，返回 (offset, 事件)；未知事件类型返回 (offset, None)"""
+    offset, ts, priority = _HEAD.unpack_from(body, 0)
+    pos = _HEAD.size
+    texts = []
+    for _ in range(4):
+        (n,) = _U16.unpack_from(body, pos)
+        pos += _U16.size
+        texts.append(body[pos:pos + n].decode("utf-8"))
+        pos += n
+    (n,) = _U32.unpack_from(body, pos)
+    pos += _U32.size
+    data = json.loads(body[pos:pos + n])
+    event_type, event_id, source, target = texts
+    try:
+        event_type = EventType(event_type)
+    except ValueError:
+        return offset, None
+    event = Event(
+        event_id=event_id,
+        event_type=event_type,
+        source=source,
+        data=data,
+        timestamp=datetime.fromtimestamp(ts),
+        priority=priority,
+        target=target or None,
+        offset=offset,
+    )
+    return offset, event
+
+
+def _read_frames(path: str):
+    """顺序读取段文件中的完整帧，产出 (帧结束位置, body)；遇到不完整或校验失败的帧即停止"""
+    with open(path, "rb") as f:
+        pos = 0
+        while True:
+            header = f.read(_FRAME.size)
+            if len(header) < _FRAME.size:
+                return
+            length, crc = _FRAME.unpack(header)
+            body = f.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                return
+            pos += _FRAME.size + length
+            yield pos, body
+
+
+class EventJournal:
+    """分段追加写事件日志"""
+
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024, flush_interval: float = 0.05,
+                 fsync: bool = True, retention_segments: int = 20, retention_hours: float = 0.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.retention_segments = retention_segments
+        self.retention_hours = retention_hours
+        self.logger = get_logger("event_journal")
+        self._next_offset = 0
+        self._pending: List[Tuple[int, Event]] = []
+        self._inflight: List[Tuple[int, Event]] = []  # 正在写盘的批次（回放时与磁盘内容合并）
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()  # 串行化写线程与关闭文件
+        self._writing: Optional[asyncio.Future] = None  # 在途的写盘线程
+        self._wakeup = asyncio.Event()
+        self._file = None
+        self._file_size = 0
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.failed_events = 0
+        self._open()
+
+    # ---------- 段文件 ----------
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        """[(段起始偏移量, 路径)]，按偏移量升序"""
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.endswith(_SUFFIX) and name[:-len(_SUFFIX)].isdigit():
+                segments.append((int(name[:-len(_SUFFIX)]), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def _open(self):
+        """恢复：校验最后一段并截断半条记录，确定下一个偏移量"""
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self._segments()
+        if not segments:
+            return
+        base, path = segments[-1]
+        valid_end, last_offset = 0, base - 1
+        for valid_end, body in _read_frames(path):
+            last_offset = _HEAD.unpack_from(body, 0)[0]
+        if valid_end < os.path.getsize(path):
+            self.logger.warning(f"事件日志 {os.path.basename(path)} 尾部存在不完整记录，已截断")
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+        self._next_offset = last_offset + 1
+        self._file = open(path, "ab")
+        self._file_size = valid_end
+
+    def _rotate(self, first_offset: int):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"{first_offset:020d}{_SUFFIX}")
+        self._file = open(path, "ab")
+        self._file_size = 0
+        self._apply_retention()
+
+    def _apply_retention(self):
+        segments = self._segments()
+        doomed = []
+        if self.retention_segments > 0 and len(segments) > self.retention_segments:
+            doomed = segments[:len(segments) - self.retention_segments]
+        if self.retention_hours > 0:
+            cutoff = time.time() - self.retention_hours * 3600
+            # 当前活动段永不删除
+            doomed += [s for s in segments[:-1] if s not in doomed and os.path.getmtime(s[1]) < cutoff]
+        for _, path in doomed:
+            try:
+                os.remove(path)
+            except OSError as e:
+                self.logger.warning(f"删除过期事件日志段失败 {path}: {e}")
+
+    # ---------- 写入 ----------
+
+    @property
+    def next_offset(self) -> int:
+        return self._next_offset
+
+    def append(self, event: Event) -> int:
+        """分配偏移量并排队等待后台写盘（不做 I/O）"""
+        offset = self._next_offset
+        self._next_offset += 1
+        event.offset = offset
+        with self._lock:
+            self._pending.append((offset, event))
+        self._wakeup.set()
+        return offset
+
+    def _write_batch(self, batch: List[Tuple[int, Event]]):
+        """在线程中执行：编码、写入、必要时滚动，整批一次 fsync"""
+        for offset, event in batch:
+            if self._file is None or self._file_size >= self.segment_bytes:
+                self._rotate(offset)
+            frame = encode_event(offset, event)
+            self._file.write(frame)
+            self._file_size += len(frame)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _commit_batch(self, batch: List[Tuple[int, Event]]):
+        """在线程中执行：写入一批并记账；写失败时丢弃该批并关闭当前段，下一批另起新段"""
+        with self._io_lock:
+            try:
+                self._write_batch(batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failed_batches += 1
+                self.failed_events += len(batch)
+                self.logger.error(f"事件日志写入失败，丢弃 {len(batch)} 条"
+                                  f"（偏移量 {batch[0][0]}-{batch[-1][0]}，累计失败 {self.failed_batches} 批）: {e}")
+                # 段尾可能残留半条记录，回放读到此处即停，后续记录写入新段
+                if self._file is not None:
+                    try:
+                        self._file.close()
+                    except OSError:
+                        pass
+                    self._file = None
+            finally:
+                with self._lock:
+                    self._inflight = []
+
+    async def _flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            self._inflight, self._pending = self._pending, []
+            batch = self._inflight
+        self._writing = asyncio.ensure_future(asyncio.to_thread(self._commit_batch, batch))
+        # 写线程无法中断：writer 被取消时该批继续写完，由 stop() 等待
+        await asyncio.shield(self._writing)
+
+    async def _writer_loop(self):
+        while self._running:
+            await self._wakeup.wait()
+            # 等待一个刷盘窗口，把这段时间内的事件合并为一批
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            await self._flush()
+
+    async def start(self):
+        if not self._running:
+            self._running = True
+            self._task = asyncio.create_task(self._writer_loop(), name="event_journal_writer")
+
+    async def stop(self):
+        """停止写入线程并刷出剩余事件"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writing is not None:
+            await self._writing
+        await self._flush()
+        self._writing = None
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ---------- 回放 ----------
+
+    def replay(self, since: Union[int, datetime, None] = None, limit: Optional[int] = None,
+               event_type: Optional[EventType] = None, until: Optional[datetime] = None,
+               latest: bool = False) -> List[Event]:
+        """
+        按偏移量顺序回放事件
+        since 为 int 时返回偏移量大于 since 的事件（客户端传入最后收到的偏移量）；
+        为 datetime 时返回该时间及之后的事件；limit 限制返回条数（从最早一条起，latest=True 时取最近的 limit 条）
+        """
+        def match(offset: int, event: Event) -> bool:
+            return (
+                self._match(offset, event, since)
+                and (event_type is None or event.event_type == event_type)
+                and (until is None or event.timestamp < until)
+            )
+
+        # 先取内存中尚未落盘的记录，再读磁盘，按偏移量去重合并，避免与写线程交错时漏读
+        with self._lock:
+            unflushed = self._inflight + self._pending
+        segments = self._segments()
+        if isinstance(since, int):
+            # 跳过整段都不大于 since 的段
+            start = 0
+            for i, (base, _) in enumerate(segments):
+                if base <= since + 1:
+                    start = i
+            segments = segments[start:]
+
+        events: Dict[int, Event] = {}
+        if latest:
+            # 未落盘的记录最新，先收；再从最新的段往前读，凑够 limit 条即停
+            for offset, event in unflushed:
+                if match(offset, event):
+                    events[offset] = event
+            segments = list(reversed(segments))
+        for _, path in segments:
+            if latest and limit is not None and len(events) >= limit:
+                break
+            try:
+                for _, body in _read_frames(path):
+                    offset, event = decode_body(body)
+                    if event is None or not match(offset, event):
+                        continue
+                    events[offset] = event
+                    if not latest and limit is not None and len(events) >= limit:
+                        break
+            except FileNotFoundError:
+                # 回放期间被保留策略删除的旧段
+                continue
+            if not latest and limit is not None and len(events) >= limit:
+                break
+        if not latest:
+            for offset, event in unflushed:
+                if offset not in events and match(offset, event):
+                    events[offset] = event
+        ordered = [events[o] for o in sorted(events)]
+        if limit is None:
+            return ordered
+        return ordered[-limit:] if latest else ordered[:limit]
+
+    def tail(self, n: int) -> List[Event]:
+        """读取最近 n 条事件（用于重启后预热内存历史）"""
+        collected: List[Event] = []
+        for _, path in reversed(self._segments()):
+            try:
+                chunk = [e for _, e in (decode_body(b) for _, b in _read_frames(path)) if e is not None]
+            except FileNotFoundError:
+                break
+            collected = chunk + collected
+            if len(collected) >= n:
+                break
+        return collected[-n:] if n > 0 else []
+
+    @staticmethod
+    def _match(offset: int, event: Event, since) -> bool:
+        if since is None:
+            return True
+        if isinstance(since, int):
+            return offset > since
+        return event.timestamp >= since
+
+    def stats(self) -> dict:
+        segments = self._segments()
+        size = 0
+        for _, path in segments:
+            try:
+                size += os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        return {
+            "directory": self.directory,
+            "next_offset": self._next_offset,
+            "segments": len(segments),
+            "bytes": size,
+            "pending": len(self._pending) + len(self._inflight),
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "failed_events": self.failed_events,
+        }
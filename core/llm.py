@@ -58,6 +58,19 @@ class LLMConfig:
         return bool(self.api_key)
 
 
+class LLMAPIError(RuntimeError):
+    """LLM 接口返回错误状态码；429 限流时 retry_after 为服务端建议的等待秒数"""
+
+    def __init__(self, message: str, status_code: int | None = None, retry_after: float | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(RuntimeError, TimeoutError):
+    """LLM 请求超时"""
+
+
 class LLMClient:
     """LLM 客户端 — 封装硅基流动 API 调用
 
@@ -229,7 +242,17 @@ class LLMClient:
         except httpx.HTTPStatusError as e:
             error_detail = e.response.text[:500] if e.response else str(e)
             logger.error(f"LLM API 错误 (HTTP {e.response.status_code}): {error_detail}")
-            raise RuntimeError(f"LLM API 错误: {e.response.status_code} - {error_detail}")
+            try:
+                retry_after = float(e.response.headers.get("retry-after", ""))
+            except ValueError:
+                retry_after = None
+            raise LLMAPIError(
+                f"LLM API 错误: {e.response.status_code} - {error_detail}",
+                status_code=e.response.status_code, retry_after=retry_after,
+            )
+        except httpx.TimeoutException as e:
+            logger.error(f"LLM 请求超时: {e}")
+            raise LLMTimeoutError(f"LLM 请求超时: {e}")
         except Exception as e:
             logger.error(f"LLM 请求异常: {e}")
             raise RuntimeError(f"LLM 请求失败: {e}")
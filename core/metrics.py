@@ -0,0 +1,173 @@
+"""
+增量指标聚合器 - 订阅 EventBus 的 TASK_* 事件维护内存计数
+启动时从数据库播种一次，之后只靠事件增量更新，读取快照不访问数据库
+
+- 累计计数：created / completed / failed / retried，按类型、按 Agent 分组
+- 滚动直方图：最近 metrics_window_minutes 分钟，每分钟一个桶
+"""
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from utils.logger import get_logger
+from core.event_bus import Event, EventType
+from core.repository import TaskRepository
+from core.models import TaskStatus
+
+METRICS = ("created", "completed", "failed", "retried")
+
+# 事件类型 -> 指标名
+EVENT_METRICS = {
+    EventType.TASK_CREATED: "created",
+    EventType.TASK_COMPLETED: "completed",
+    EventType.TASK_FAILED: "failed",
+    EventType.TASK_RETRY: "retried",
+}
+
+
+class _MetricSet:
+    """一组指标计数：总数 + 按类型 + 按 Agent"""
+    __slots__ = ("totals", "by_type", "by_agent")
+
+    def __init__(self):
+        self.totals: Counter = Counter()
+        self.by_type: Dict[str, Counter] = {}
+        self.by_agent: Dict[str, Counter] = {}
+
+    def add(self, metric: str, task_type: Optional[str], agent_id: Optional[str], n: int = 1):
+        self.totals[metric] += n
+        if task_type:
+            self.by_type.setdefault(task_type, Counter())[metric] += n
+        if agent_id:
+            self.by_agent.setdefault(agent_id, Counter())[metric] += n
+
+    def to_dict(self) -> dict:
+        return {
+            **{m: self.totals[m] for m in METRICS},
+            "by_type": {k: dict(v) for k, v in self.by_type.items()},
+            "by_agent": {k: dict(v) for k, v in self.by_agent.items()},
+        }
+
+
+class MetricsAggregator:
+    """基于事件的任务指标聚合器"""
+
+    def __init__(self, runtime, window_minutes: Optional[int] = None):
+        self.runtime = runtime
+        self.logger = get_logger("metrics")
+        self._window = window_minutes or runtime.config.api_config.metrics_window_minutes
+        self._totals = _MetricSet()
+        self._buckets: Dict[int, _MetricSet] = {}  # {分钟序号: 该分钟的计数}
+        self._subscribed = False
+        self._seeded_at: Optional[datetime] = None
+        self._started_at = datetime.now()
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        """订阅 TASK_* 事件"""
+        if self._subscribed:
+            return
+        for event_type in EVENT_METRICS:
+            self.runtime.event_bus.subscribe(event_type, self._on_event)
+        self._subscribed = True
+
+    def stop(self):
+        """取消订阅"""
+        if not self._subscribed:
+            return
+        for event_type in EVENT_METRICS:
+            try:
+                self.runtime.event_bus.unsubscribe(event_type, self._on_event)
+            except ValueError:
+                pass
+        self._subscribed = False
+
+    async def seed(self):
+        """从数据库播种累计计数与窗口内直方图（仅启动时调用一次）"""
+        since = datetime.now() - timedelta(minutes=self._window)
+        async with self.runtime.db_manager.session_factory() as session:
+            repo = TaskRepository(session)
+            grouped = await repo.count_grouped()
+            retries = await repo.sum_retries_grouped()
+            activity = await repo.get_activity_since(since)
+
+        for task_type, agent_id, status, count in grouped:
+            self._totals.add("created", task_type, None, count)
+            metric = self._status_metric(status)
+            if metric:
+                self._totals.add(metric, task_type, agent_id, count)
+        for task_type, agent_id, total in retries:
+            self._totals.add("retried", task_type, agent_id, total)
+
+        # 直方图只能还原创建与结束时间；重试发生时间未落库，不做回填
+        for row in activity:
+            if row["create_time"] and row["create_time"] >= since:
+                self._bucket(row["create_time"]).add("created", row["type"], None)
+            metric = self._status_metric(row["status"])
+            if metric and row["end_time"] and row["end_time"] >= since:
+                self._bucket(row["end_time"]).add(metric, row["type"], row["executor_agent_id"])
+
+        self._seeded_at = datetime.now()
+        self.logger.info(f"指标已从数据库播种: {dict(self._totals.totals)}")
+
+    @staticmethod
+    def _status_metric(status) -> Optional[str]:
+        if status in (TaskStatus.COMPLETED, TaskStatus.COMPLETED.value):
+            return "completed"
+        if status in (TaskStatus.FAILED, TaskStatus.FAILED.value):
+            return "failed"
+        return None
+
+    # ---------- 增量更新 ----------
+
+    def _on_event(self, event: Event):
+        metric = EVENT_METRICS.get(event.event_type)
+        if metric is None:
+            return
+        data = event.data or {}
+        agent_id = data.get("agent_id")
+        if data.get("bulk"):
+            # 批量创建只发一条事件，按类型计数展开
+            for task_type, count in (data.get("task_types") or {}).items():
+                self.record(metric, task_type, agent_id, count, event.timestamp)
+            return
+        self.record(metric, data.get("task_type"), agent_id, 1, event.timestamp)
+
+    def record(self, metric: str, task_type: Optional[str] = None, agent_id: Optional[str] = None,
+               n: int = 1, when: Optional[datetime] = None):
+        """记录一次指标变化"""
+        self._totals.add(metric, task_type, agent_id, n)
+        self._bucket(when or datetime.now()).add(metric, task_type, agent_id, n)
+
+    def _bucket(self, when: datetime) -> _MetricSet:
+        minute = int(when.timestamp() // 60)
+        bucket = self._buckets.get(minute)
+        if bucket is None:
+            bucket = self._buckets[minute] = _MetricSet()
+            self._trim(max(minute, int(time.time() // 60)))
+        return bucket
+
+    def _trim(self, current_minute: int):
+        oldest = current_minute - self._window + 1
+        for minute in [m for m in self._buckets if m < oldest]:
+            del self._buckets[minute]
+
+    # ---------- 快照 ----------
+
+    def snapshot(self, minutes: Optional[int] = None) -> dict:
+        """返回累计计数与最近 minutes 分钟（默认整个窗口）的逐分钟直方图"""
+        minutes = min(minutes or self._window, self._window)
+        current = int(time.time() // 60)
+        self._trim(current)
+        histogram = []
+        for minute in range(current - minutes + 1, current + 1):
+            bucket = self._buckets.get(minute) or _MetricSet()
+            histogram.append({"minute": datetime.fromtimestamp(minute * 60).isoformat(), **bucket.to_dict()})
+        return {
+            "totals": self._totals.to_dict(),
+            "per_minute": histogram,
+            "window_minutes": self._window,
+            "seeded_at": self._seeded_at.isoformat() if self._seeded_at else None,
+            "started_at": self._started_at.isoformat(),
+        }
@@ -2,7 +2,7 @@
 SQLAlchemy ORM 模型定义
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Float, DateTime, JSON, Integer, Text, Enum as SAEnum
+from sqlalchemy import Column, String, Float, DateTime, JSON, Integer, Text, Index, Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from .database import Base
 import enum
@@ -43,6 +43,14 @@ class TaskModel(Base):
     end_time: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     error_msg: Mapped[str] = mapped_column(Text, nullable=True)
     result: Mapped[dict] = mapped_column(JSON, nullable=True)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)  # 延迟重试：到期前不被认领
+
+    __table_args__ = (
+        # 队列索引：按状态过滤后直接按 priority DESC, create_time 有序扫描，无需排序
+        Index("ix_tasks_queue", "status", priority.desc(), "create_time"),
+        # 列表分页索引：按 (create_time, task_id) 键集翻页
+        Index("ix_tasks_listing", "create_time", "task_id"),
+    )
 
     def to_dict(self) -> dict:
         return {
@@ -60,6 +68,7 @@ class TaskModel(Base):
             "end_time": self.end_time.isoformat() if self.end_time else None,
             "error_msg": self.error_msg,
             "result": self.result,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None,
         }
 
 
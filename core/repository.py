@@ -1,13 +1,23 @@
 """
 Repository 模式 - 异步数据访问层
 """
-from typing import Optional, List
-from sqlalchemy import select, update, delete, func
+from datetime import datetime
+from typing import Dict, Iterable, Optional, List, Tuple
+from sqlalchemy import select, insert, update, delete, func, case, and_, or_, literal, union_all, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from .models import TaskModel, TaskStatus, AgentStateModel, AgentStatus
 from utils.logger import get_logger
 
 
+# 列表接口默认投影：不含 params / result 两个 JSON 大字段
+TASK_LIST_FIELDS = (
+    "task_id", "name", "type", "status", "priority", "executor_agent_id",
+    "max_retries", "retry_count", "create_time", "start_time", "end_time", "error_msg", "next_attempt_at",
+)
+# 分页游标依赖的列，任何投影都会包含
+TASK_CURSOR_FIELDS = ("create_time", "task_id")
+
+
 class TaskRepository:
     """任务数据仓库"""
 
@@ -23,6 +33,24 @@ class TaskRepository:
         self.logger.info(f"任务已创建: {task.task_id}")
         return task
 
+    async def create_many(self, rows: List[dict], chunk_size: int = 500) -> int:
+        """
+        批量创建任务：按 chunk_size 分块批量 INSERT，整批一次提交
+
+        Args:
+            rows: 任务列字典列表（需包含 task_id/name/type 等必填列）
+            chunk_size: 每批写入的行数
+
+        使用 Core insert + 参数列表（executemany）：同一条已编译语句复用于所有行，
+        比每块编译一条 insert().values([...]) 多行语句快一个数量级。
+        """
+        stmt = insert(TaskModel.__table__)
+        for start in range(0, len(rows), chunk_size):
+            await self.session.execute(stmt, rows[start:start + chunk_size])
+        await self.session.commit()
+        self.logger.info(f"批量创建任务: {len(rows)} 个")
+        return len(rows)
+
     async def get_by_id(self, task_id: str) -> Optional[TaskModel]:
         """按 ID 查询"""
         result = await self.session.execute(
@@ -39,6 +67,89 @@ class TaskRepository:
         result = await self.session.execute(stmt)
         return list(result.scalars().all())
 
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        fields: Optional[Iterable[str]] = None,
+        status: Optional[TaskStatus] = None,
+        task_type: Optional[str] = None,
+        executor_agent_id: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> Tuple[List[dict], Optional[Tuple[datetime, str]]]:
+        """
+        键集分页查询任务（按 create_time, task_id 倒序），只加载 fields 指定的列。
+        after 为上一页最后一条的 (create_time, task_id)；返回 (本页行, 下一页游标)，无更多数据时游标为 None。
+        limit 小于 1 或字段未知时抛出 ValueError。
+        """
+        if limit < 1:
+            raise ValueError(f"limit 必须大于等于 1: {limit}")
+        names = list(dict.fromkeys([*(fields or TASK_LIST_FIELDS), *TASK_CURSOR_FIELDS]))
+        unknown = [n for n in names if n not in TaskModel.__table__.c]
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(unknown)}")
+        columns = [TaskModel.__table__.c[n] for n in names]
+
+        stmt = self._filter_listing(
+            select(*columns), status, task_type, executor_agent_id, created_after, created_before
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(TaskModel.create_time, TaskModel.task_id) < tuple_(*after))
+        # 多取一行用于判断是否还有下一页
+        stmt = stmt.order_by(TaskModel.create_time.desc(), TaskModel.task_id.desc()).limit(limit + 1)
+
+        result = await self.session.execute(stmt)
+        rows = result.mappings().all()
+        next_after = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_after = (rows[-1]["create_time"], rows[-1]["task_id"])
+        return [self._serialize_row(row) for row in rows], next_after
+
+    async def count_listing(
+        self,
+        status: Optional[TaskStatus] = None,
+        task_type: Optional[str] = None,
+        executor_agent_id: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> int:
+        """统计满足 list_page 同一组过滤条件的任务总数（不受游标与 limit 影响）"""
+        stmt = self._filter_listing(
+            select(func.count()).select_from(TaskModel),
+            status, task_type, executor_agent_id, created_after, created_before,
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    @staticmethod
+    def _filter_listing(stmt, status, task_type, executor_agent_id, created_after, created_before):
+        """list_page / count_listing 共用的过滤条件"""
+        if status:
+            stmt = stmt.where(TaskModel.status == status)
+        if task_type:
+            stmt = stmt.where(TaskModel.type == task_type)
+        if executor_agent_id:
+            stmt = stmt.where(TaskModel.executor_agent_id == executor_agent_id)
+        if created_after:
+            stmt = stmt.where(TaskModel.create_time >= created_after)
+        if created_before:
+            stmt = stmt.where(TaskModel.create_time < created_before)
+        return stmt
+
+    @staticmethod
+    def _serialize_row(row) -> dict:
+        """与 TaskModel.to_dict 保持一致的取值格式"""
+        item = {}
+        for key, value in row.items():
+            if isinstance(value, TaskStatus):
+                value = value.value
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            item[key] = value
+        return item
+
     async def get_by_status(self, status: TaskStatus) -> List[TaskModel]:
         """按状态查询"""
         result = await self.session.execute(
@@ -68,6 +179,16 @@ class TaskRepository:
         self.logger.info(f"任务 {task_id} 状态更新为: {status.value}")
         return True
 
+    async def requeue_running(self, task_id: str) -> bool:
+        """仍处于 RUNNING 的任务退回 PENDING（清空执行 Agent 与开始时间）；已回写结果的任务不受影响"""
+        result = await self.session.execute(
+            update(TaskModel)
+            .where(TaskModel.task_id == task_id, TaskModel.status == TaskStatus.RUNNING)
+            .values(status=TaskStatus.PENDING, executor_agent_id=None, start_time=None)
+        )
+        await self.session.commit()
+        return result.rowcount > 0
+
     async def delete(self, task_id: str) -> bool:
         """删除任务"""
         task = await self.get_by_id(task_id)
@@ -85,16 +206,198 @@ class TaskRepository:
         )
         return result.scalar() or 0
 
+    async def count_grouped(self) -> List[Tuple[str, Optional[str], TaskStatus, int]]:
+        """一次 GROUP BY 统计 (type, executor_agent_id, status) 的任务数，供按状态/类型/Agent 汇总"""
+        result = await self.session.execute(
+            select(TaskModel.type, TaskModel.executor_agent_id, TaskModel.status, func.count())
+            .group_by(TaskModel.type, TaskModel.executor_agent_id, TaskModel.status)
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def sum_retries_grouped(self) -> List[Tuple[str, Optional[str], int]]:
+        """按 (type, executor_agent_id) 汇总累计重试次数"""
+        result = await self.session.execute(
+            select(TaskModel.type, TaskModel.executor_agent_id, func.sum(TaskModel.retry_count))
+            .where(TaskModel.retry_count > 0)
+            .group_by(TaskModel.type, TaskModel.executor_agent_id)
+        )
+        return [(row[0], row[1], int(row[2] or 0)) for row in result.all()]
+
+    async def get_activity_since(self, since: datetime) -> List[dict]:
+        """查询 since 之后创建或结束的任务（仅投影统计所需列）"""
+        result = await self.session.execute(
+            select(
+                TaskModel.type, TaskModel.executor_agent_id, TaskModel.status,
+                TaskModel.create_time, TaskModel.end_time,
+            ).where(or_(TaskModel.create_time >= since, TaskModel.end_time >= since))
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def duration_percentiles(self, percents: Iterable[int] = (50, 95)) -> Tuple[int, Dict[int, float]]:
+        """已完成任务耗时（秒）的分位数（最近秩法），返回 (样本数, {百分位: 秒})"""
+        if self.session.bind.dialect.name == "sqlite":
+            duration = (func.julianday(TaskModel.end_time) - func.julianday(TaskModel.start_time)) * 86400.0
+        else:
+            duration = func.extract("epoch", TaskModel.end_time - TaskModel.start_time)
+        duration = duration.label("duration")
+        ranked = (
+            select(
+                duration,
+                func.row_number().over(order_by=duration).label("rn"),
+                func.count().over().label("n"),
+            )
+            .where(
+                TaskModel.status == TaskStatus.COMPLETED,
+                TaskModel.start_time.is_not(None),
+                TaskModel.end_time.is_not(None),
+            )
+            .subquery()
+        )
+        # 整数运算求秩，避免 SQLite / PostgreSQL 的浮点取整差异
+        ranks = {p: (ranked.c.n - 1) * p // 100 + 1 for p in percents}
+        result = await self.session.execute(
+            select(ranked.c.rn, ranked.c.n, ranked.c.duration)
+            .where(or_(*(ranked.c.rn == r for r in ranks.values())))
+        )
+        rows = result.all()
+        if not rows:
+            return 0, {}
+        n = rows[0].n
+        by_rank = {row.rn: float(row.duration) for row in rows}
+        return n, {p: by_rank[(n - 1) * p // 100 + 1] for p in percents}
+
+    @staticmethod
+    def _due(now: datetime):
+        """已到期条件：非延迟重试，或重试时间已到"""
+        return or_(TaskModel.next_attempt_at.is_(None), TaskModel.next_attempt_at <= now)
+
     async def get_next_pending(self) -> Optional[TaskModel]:
-        """获取下一个待执行任务（按优先级和时间排序）"""
+        """获取下一个已到期的待执行任务（按优先级和时间排序）"""
         result = await self.session.execute(
             select(TaskModel)
-            .where(TaskModel.status == TaskStatus.PENDING)
+            .where(TaskModel.status == TaskStatus.PENDING, self._due(datetime.now()))
             .order_by(TaskModel.priority.desc(), TaskModel.create_time.asc())
             .limit(1)
         )
         return result.scalar_one_or_none()
 
+    async def get_delayed_retry_times(self, limit: int = 10000) -> List[datetime]:
+        """尚未到期的延迟重试时间（升序），调度器启动时据此恢复定时唤醒"""
+        result = await self.session.execute(
+            select(TaskModel.next_attempt_at)
+            .where(TaskModel.status == TaskStatus.PENDING, TaskModel.next_attempt_at > datetime.now())
+            .order_by(TaskModel.next_attempt_at.asc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def claim_batch(
+        self,
+        n: int,
+        agent_types: Dict[str, List[str]],
+        type_routes: Dict[str, str],
+        default_agent_type: Optional[str] = None,
+    ) -> List[TaskModel]:
+        """
+        原子认领一批待执行任务：单条 UPDATE ... RETURNING 将任务置为 RUNNING 并写入执行 Agent
+
+        Args:
+            n: 本次最多认领的任务数
+            agent_types: {agent_type: [agent_id, ...]} 各 Agent 类型的空闲槽位，
+                每个元素占一个槽位，按分配先后排列（同一 agent_id 可重复出现）
+            type_routes: {task_type: agent_type} 任务类型到 Agent 类型的路由
+            default_agent_type: 未出现在 type_routes 中的任务类型交给哪类 Agent，None 表示不认领
+
+        Returns:
+            已认领的任务（按优先级降序、创建时间升序）
+
+        延迟重试（next_attempt_at 晚于当前时间）的任务跳过，到期后才参与认领。
+        每类 Agent 只认领其空闲槽位数量的任务，按优先级取队首。
+        多个调度进程不会认领到同一任务：SQLite 下在 BEGIN IMMEDIATE 事务内执行，
+        PostgreSQL 下队首查询使用 SELECT ... FOR UPDATE SKIP LOCKED。
+        """
+        pools: Dict[str, List[str]] = {}
+        remaining = n
+        for agent_type, slots in agent_types.items():
+            if remaining <= 0:
+                break
+            if slots:
+                pools[agent_type] = slots[:remaining]
+                remaining -= len(pools[agent_type])
+        if not pools:
+            return []
+
+        dialect = self.session.bind.dialect.name
+        now = datetime.now()
+        queue_order = (TaskModel.priority.desc(), TaskModel.create_time.asc())
+        parts = []
+        for agent_type, slots in pools.items():
+            task_types = [t for t, a in type_routes.items() if a == agent_type]
+            type_filter = TaskModel.type.in_(task_types)
+            if agent_type == default_agent_type:
+                type_filter = type_filter | TaskModel.type.not_in(list(type_routes))
+            head = (
+                select(TaskModel.task_id, TaskModel.priority, TaskModel.create_time)
+                .where(TaskModel.status == TaskStatus.PENDING, self._due(now), type_filter)
+                .order_by(*queue_order)
+                .limit(len(slots))
+            )
+            if dialect == "postgresql":
+                # 跳过其他调度进程已锁定的行，并发认领互不等待
+                head = head.with_for_update(skip_locked=True)
+            head = head.subquery()
+            parts.append(select(
+                head.c.task_id,
+                literal(agent_type).label("agent_type"),
+                func.row_number().over(
+                    order_by=(head.c.priority.desc(), head.c.create_time.asc())
+                ).label("rn"),
+            ))
+        picked = union_all(*parts).cte("picked")
+
+        # 第 rn 个被认领的任务占用该类 Agent 的第 rn 个槽位
+        executor_id = case(*[
+            (and_(picked.c.agent_type == agent_type, picked.c.rn == i + 1), agent_id)
+            for agent_type, slots in pools.items()
+            for i, agent_id in enumerate(slots)
+        ])
+        stmt = (
+            update(TaskModel)
+            .where(
+                TaskModel.task_id.in_(select(picked.c.task_id)),
+                TaskModel.status == TaskStatus.PENDING,
+            )
+            .values(
+                status=TaskStatus.RUNNING,
+                start_time=now,
+                next_attempt_at=None,
+                executor_agent_id=(
+                    select(executor_id)
+                    .where(picked.c.task_id == TaskModel.task_id)
+                    .scalar_subquery()
+                ),
+            )
+            .returning(TaskModel)
+        )
+
+        if dialect == "sqlite":
+            # 立即获取写锁，避免与其他调度进程交错认领
+            await self.session.execute(text("BEGIN IMMEDIATE"))
+        try:
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False}
+            )
+            tasks = list(result.scalars().all())
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        if tasks:
+            self.logger.info(f"已认领 {len(tasks)} 个任务")
+        tasks.sort(key=lambda t: (-t.priority, t.create_time))
+        return tasks
+
 
 class AgentStateRepository:
     """Agent 状态数据仓库"""
@@ -12,6 +12,7 @@ from __future__ import annotations
 import asyncio
 import time
 import functools
+import random
 from typing import Any, Callable, Optional, TypeVar
 from utils.logger import get_logger
 
@@ -145,6 +146,36 @@ class RetryTemplate:
         raise RetryExhaustedError(task_name, actual_retries, last_error)
 
 
+# ── 退避策略（调度器延迟重试使用） ──
+
+class BackoffPolicy:
+    """
+    重试退避策略：前几次按 delays 列表取间隔（同 RetryTemplate），
+    超出列表后以最后一项为基数按 multiplier 指数增长，不超过 max_delay；
+    jitter 为随机抖动比例，避免大批任务同时到期
+    """
+
+    def __init__(self, delays: list = None, multiplier: float = 2.0, max_delay: float = 300.0,
+                 jitter: float = 0.0):
+        self.delays = list(DEFAULT_RETRY_DELAYS if delays is None else delays)
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次重试（从 1 开始）前的等待秒数"""
+        if not self.delays:
+            return 0.0
+        if attempt <= len(self.delays):
+            delay = self.delays[max(attempt, 1) - 1]
+        else:
+            delay = self.delays[-1] * self.multiplier ** min(attempt - len(self.delays), 64)
+        delay = min(delay, self.max_delay)
+        if self.jitter > 0:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
+
+
 # ── 装饰器方式 ──
 
 def retry(max_retries: int = DEFAULT_MAX_RETRIES, delays: list = None, task_name: str = None):
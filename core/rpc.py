@@ -0,0 +1,210 @@
+"""
+Agent 间请求 / 应答 RPC - 基于 EventBus 的进程内调用
+
+- 调用方发布 RPC_REQUEST（target=被调 Agent，带 correlation_id），在 Future 上等待应答
+- 被调方按 (RPC_REQUEST, agent_id) 键控订阅，每个请求在独立任务中执行处理器，
+  结果以 RPC_RESPONSE 发回，按 correlation_id 唤醒对应 Future
+- 超时或调用方取消时发送取消通知，被调方取消仍在执行的处理器
+- RPC 事件以 priority=1 发布，信箱满时阻塞而不丢弃
+- RPC 事件为内部消息（internal）：不进事件历史 / 事件日志，也不推送给 WebSocket，参数与结果不外泄
+"""
+import asyncio
+import inspect
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from utils.logger import get_logger
+from core.event_bus import Event, EventType
+
+RPC_PRIORITY = 1
+RPC_MAILBOX_SIZE = 10000
+
+
+class RpcError(Exception):
+    """远端处理器抛出异常或方法不存在"""
+
+
+class RpcTimeoutError(RpcError):
+    """等待应答超时"""
+
+
+class RpcManager:
+    """进程内 RPC 管理器（由 Runtime 持有）"""
+
+    def __init__(self, event_bus, default_timeout: float = 30.0):
+        self.event_bus = event_bus
+        self.default_timeout = default_timeout
+        self.logger = get_logger("rpc")
+        self._handlers: Dict[str, Dict[str, Callable]] = {}  # {agent_id: {方法名: 处理器}}
+        self._pending: Dict[str, asyncio.Future] = {}  # {correlation_id: 等待应答的 Future}
+        self._running: Dict[str, asyncio.Task] = {}  # {correlation_id: 被调方正在执行的处理器任务}
+        self._subscribed = False
+        self.calls = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self._latency_total = 0.0
+
+    # ---------- 注册 ----------
+
+    def _ensure_subscribed(self):
+        if not self._subscribed:
+            self.event_bus.subscribe(EventType.RPC_RESPONSE, self._on_response,
+                                     mailbox_size=RPC_MAILBOX_SIZE, overflow="block")
+            self._subscribed = True
+
+    def register(self, agent_id: str, method: str, handler: Callable):
+        """注册 Agent 的 RPC 方法；handler(params: dict) 可为普通函数或协程函数"""
+        self._ensure_subscribed()
+        if agent_id not in self._handlers:
+            self._handlers[agent_id] = {}
+            self.event_bus.subscribe(EventType.RPC_REQUEST, self._on_request, target=agent_id,
+                                     mailbox_size=RPC_MAILBOX_SIZE, overflow="block")
+        self._handlers[agent_id][method] = handler
+        self.logger.debug(f"已注册 RPC 方法: {agent_id}.{method}")
+
+    def unregister(self, agent_id: str, method: Optional[str] = None):
+        """注销 Agent 的某个 RPC 方法（method 为 None 时注销全部）"""
+        methods = self._handlers.get(agent_id)
+        if methods is None:
+            return
+        if method is not None:
+            methods.pop(method, None)
+        if method is None or not methods:
+            del self._handlers[agent_id]
+            self.event_bus.unsubscribe(EventType.RPC_REQUEST, self._on_request, target=agent_id)
+
+    # ---------- 调用方 ----------
+
+    async def call(self, source: str, target: str, method: str, params: Optional[Dict[str, Any]] = None,
+                   timeout: Optional[float] = None) -> Any:
+        """
+        调用 target Agent 的 method 并等待结果
+        超时抛出 RpcTimeoutError，远端异常抛出 RpcError；调用方被取消时通知远端取消
+        """
+        if method not in self._handlers.get(target, {}):
+            raise RpcError(f"Agent {target} 未注册 RPC 方法: {method}")
+        self._ensure_subscribed()
+        correlation_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = future
+        self.calls += 1
+        started = time.perf_counter()
+        await self.event_bus.publish(Event(
+            event_id=correlation_id,
+            event_type=EventType.RPC_REQUEST,
+            source=source,
+            data={"correlation_id": correlation_id, "method": method, "params": params or {}, "reply_to": source},
+            priority=RPC_PRIORITY,
+            target=target,
+        ), internal=True)
+        try:
+            result = await asyncio.wait_for(future, self.default_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._cancel_remote(source, target, correlation_id)
+            raise RpcTimeoutError(f"调用 {target}.{method} 超时") from None
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            self._cancel_remote(source, target, correlation_id)
+            raise
+        finally:
+            self._pending.pop(correlation_id, None)
+        self._latency_total += time.perf_counter() - started
+        return result
+
+    def _cancel_remote(self, source: str, target: str, correlation_id: str):
+        self.event_bus.publish_sync(Event(
+            event_id=f"{correlation_id}:cancel",
+            event_type=EventType.RPC_REQUEST,
+            source=source,
+            data={"correlation_id": correlation_id, "cancel": True},
+            priority=RPC_PRIORITY,
+            target=target,
+        ), internal=True)
+
+    def _on_response(self, event: Event):
+        data = event.data
+        future = self._pending.get(data.get("correlation_id"))
+        if future is None or future.done():
+            return  # 已超时或已取消
+        if "error" in data:
+            self.failed += 1
+            future.set_exception(RpcError(data["error"]))
+        else:
+            self.completed += 1
+            future.set_result(data.get("result"))
+
+    # ---------- 被调方 ----------
+
+    def _on_request(self, event: Event):
+        data = event.data
+        correlation_id = data.get("correlation_id")
+        if data.get("cancel"):
+            task = self._running.pop(correlation_id, None)
+            if task is not None:
+                task.cancel()
+            return
+        # 每个请求独立执行，慢处理器不阻塞同一 Agent 的其他请求
+        self._running[correlation_id] = asyncio.create_task(
+            self._serve(event.target, event.source, data), name=f"rpc:{correlation_id}"
+        )
+
+    async def _serve(self, agent_id: str, caller: str, data: Dict[str, Any]):
+        correlation_id = data["correlation_id"]
+        method = data.get("method")
+        reply: Dict[str, Any] = {"correlation_id": correlation_id}
+        try:
+            handler = self._handlers.get(agent_id, {}).get(method)
+            if handler is None:
+                raise RpcError(f"Agent {agent_id} 未注册 RPC 方法: {method}")
+            result = handler(data.get("params") or {})
+            if inspect.isawaitable(result):
+                result = await result
+            reply["result"] = result
+        except asyncio.CancelledError:
+            self.logger.debug(f"RPC {agent_id}.{method} 已被调用方取消")
+            return
+        except Exception as e:
+            reply["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            self._running.pop(correlation_id, None)
+        await self.event_bus.publish(Event(
+            event_id=f"{correlation_id}:reply",
+            event_type=EventType.RPC_RESPONSE,
+            source=agent_id,
+            data=reply,
+            priority=RPC_PRIORITY,
+            target=data.get("reply_to", caller),
+        ), internal=True)
+
+    # ---------- 生命周期 ----------
+
+    async def stop(self):
+        """取消所有进行中的调用与处理器（已注册的方法保留，由各 Agent 自行注销）"""
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        tasks = list(self._running.values())
+        self._running.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._subscribed:
+            self.event_bus.unsubscribe(EventType.RPC_RESPONSE, self._on_response)
+            self._subscribed = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "methods": {agent_id: sorted(methods) for agent_id, methods in self._handlers.items()},
+            "calls": self.calls,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "in_flight": len(self._pending),
+            "serving": len(self._running),
+            "avg_latency_ms": round(self._latency_total / self.completed * 1000, 3) if self.completed else None,
+        }
@@ -26,6 +26,11 @@ class Runtime:
         self._event_bus = None  # 延迟初始化
         self._db_manager = None  # 延迟初始化
         self._scheduler = None  # 延迟初始化
+        self._task_stats = None  # 延迟初始化
+        self._metrics = None  # 延迟初始化
+        self._ws_hub = None  # 延迟初始化
+        self._rpc = None  # 延迟初始化
+        self._communication = None  # 延迟初始化
         self._lock = asyncio.Lock()
         self._started = False
 
@@ -35,14 +40,33 @@ class Runtime:
     def event_bus(self):
         if self._event_bus is None:
             from core.event_bus import EventBus
-            self._event_bus = EventBus()
+            self._event_bus = EventBus(self.config.event_bus_config, journal=self._create_journal())
         return self._event_bus
 
+    def _create_journal(self):
+        """按配置创建持久化事件日志，未启用时返回 None"""
+        cfg = self.config.event_bus_config
+        if not cfg.journal_enabled:
+            return None
+        import os
+        from core.event_journal import EventJournal
+        directory = cfg.journal_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_storage", "events"
+        )
+        return EventJournal(
+            directory,
+            segment_bytes=cfg.journal_segment_bytes,
+            flush_interval=cfg.journal_flush_interval,
+            fsync=cfg.journal_fsync,
+            retention_segments=cfg.journal_retention_segments,
+            retention_hours=cfg.journal_retention_hours,
+        )
+
     @property
     def db_manager(self):
         if self._db_manager is None:
             from core.database import DatabaseManager
-            self._db_manager = DatabaseManager()
+            self._db_manager = DatabaseManager(config=self.config.database_config)
         return self._db_manager
 
     @property
@@ -52,6 +76,52 @@ class Runtime:
             self._scheduler = TaskScheduler(self)
         return self._scheduler
 
+    @property
+    def task_stats(self):
+        if self._task_stats is None:
+            from core.stats import TaskStatsService
+            self._task_stats = TaskStatsService(self)
+        return self._task_stats
+
+    @property
+    def metrics(self):
+        if self._metrics is None:
+            from core.metrics import MetricsAggregator
+            self._metrics = MetricsAggregator(self)
+        return self._metrics
+
+    @property
+    def ws_hub(self):
+        if self._ws_hub is None:
+            from core.ws_hub import WebSocketHub
+            api = self.config.api_config
+            self._ws_hub = WebSocketHub(
+                self.event_bus,
+                flush_interval=api.ws_flush_interval,
+                queue_size=api.ws_queue_size,
+                overflow=api.ws_overflow,
+            )
+        return self._ws_hub
+
+    @property
+    def rpc(self):
+        if self._rpc is None:
+            from core.rpc import RpcManager
+            self._rpc = RpcManager(self.event_bus, self.config.agent_config.rpc_timeout)
+        return self._rpc
+
+    @property
+    def communication(self):
+        if self._communication is None:
+            from collaboration.communication import CommunicationManager
+            agent = self.config.agent_config
+            self._communication = CommunicationManager(
+                delivered_max=agent.message_delivered_max,
+                delivered_ttl=agent.message_delivered_ttl,
+                spill_path=agent.message_spill_path or None,
+            )
+        return self._communication
+
     @property
     def llm(self):
         """获取全局 LLM 客户端"""
@@ -106,10 +176,19 @@ class Runtime:
     # ---------- 生命周期 ----------
 
     async def start(self):
-        """启动运行时：启动事件总线和调度器"""
+        """启动运行时：启动事件总线、消息投递和调度器"""
         if self._started:
             return
         await self.event_bus.start()
+        self.task_stats.start()
+        self.ws_hub.start()
+        await self.communication.start()
+        # 先订阅再播种：调度器尚未启动，此时不会有任务事件漏计或重计
+        self.metrics.start()
+        try:
+            await self.metrics.seed()
+        except Exception as e:
+            self.logger.warning(f"指标播种失败，将仅统计启动后的事件: {e}")
         await self.scheduler.start()
         self._started = True
         self.logger.info("运行时已启动")
@@ -119,6 +198,11 @@ class Runtime:
         if not self._started:
             return
         await self.scheduler.stop()
+        self.task_stats.stop()
+        self.metrics.stop()
+        await self.ws_hub.stop()
+        await self.rpc.stop()
+        await self.communication.stop()
         await self.event_bus.stop()
         self._started = False
         self.logger.info("运行时已停止")
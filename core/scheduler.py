@@ -1,24 +1,34 @@
 """
 后台任务调度器 - 参考 kimi-cli 的 Agent Loop + FlowRunner 模式
 实现异步任务调度循环，持续从 PENDING 队列取任务并分配执行
+
+调度模式:
+- event（默认）：订阅 TASK_CREATED / TASK_RETRY 事件唤醒，空闲时不查询数据库，
+  仅保留低频兜底扫描（scheduler_sweep_interval）
+- poll：按 scheduler_poll_interval 固定间隔轮询数据库
+
+失败重试按任务类型的退避策略写入 next_attempt_at，到期前不会被认领；
+调度器在内存中维护到期时间小顶堆，空闲等待的超时取最近的到期时间，到期即唤醒
 """
 import asyncio
-from datetime import datetime
-from typing import Optional
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from utils.logger import get_logger
 from core.event_bus import Event, EventType
-from core.repository import TaskRepository, AgentStateRepository
+from core.repository import TaskRepository
 from core.models import TaskStatus, AgentStatus
+from core.retry import BackoffPolicy
 
 
 class TaskScheduler:
     """
     后台任务调度器
-    - 持续轮询 PENDING 任务
+    - 事件唤醒（或轮询）获取 PENDING 任务
     - 调用分配算法选择最优 Agent
-    - 发送任务到目标 Agent 执行
+    - 按 Agent 容量（capacity 槽位）并发执行任务
     - 处理失败重试
-    - 支持优雅停止
+    - 支持优雅停止（取消在途任务并退回 PENDING）
     """
 
     def __init__(self, runtime):
@@ -26,9 +36,26 @@ class TaskScheduler:
         self.logger = get_logger("scheduler")
         self._running = False
         self._task: Optional[asyncio.Task] = None
-        self._poll_interval = 1.0  # 轮询间隔（秒）
+        agent_cfg = runtime.config.agent_config
+        self._event_driven = agent_cfg.scheduler_event_driven
+        self._poll_interval = agent_cfg.scheduler_poll_interval  # 轮询间隔（秒，poll 模式）
+        self._sweep_interval = agent_cfg.scheduler_sweep_interval  # 兜底扫描间隔（秒，event 模式）
+        self._wakeup = asyncio.Event()  # 入队信号
+        self._retry_due: List[datetime] = []  # 延迟重试到期时间（小顶堆）
+        backoff = dict(
+            multiplier=agent_cfg.retry_backoff_multiplier,
+            max_delay=agent_cfg.retry_max_delay,
+            jitter=agent_cfg.retry_jitter,
+        )
+        self._default_backoff = BackoffPolicy(agent_cfg.retry_delays, **backoff)
+        self._backoff_by_type = {
+            task_type: BackoffPolicy(delays, **backoff)
+            for task_type, delays in agent_cfg.retry_delays_by_type.items()
+        }
         self._conflict_check_interval = 10  # 冲突检测间隔（秒）
-        self._conflict_counter = 0
+        self._last_conflict_check = 0.0
+        # 在途任务：{agent_id: {task_id: asyncio.Task}}
+        self._in_flight: Dict[str, Dict[str, asyncio.Task]] = {}
 
         # 任务类型 → Agent 类型映射
         self.task_agent_mapping = {
@@ -42,42 +69,138 @@ class TaskScheduler:
         """启动调度循环"""
         if not self._running:
             self._running = True
+            if self._event_driven:
+                bus = self.runtime.event_bus
+                bus.subscribe(EventType.TASK_CREATED, self._on_task_enqueued)
+                bus.subscribe(EventType.TASK_RETRY, self._on_task_enqueued)
+            self._last_conflict_check = asyncio.get_running_loop().time()
+            await self._restore_retry_timers()
             self._task = asyncio.create_task(self._schedule_loop())
-            self.logger.info("任务调度器已启动")
+            mode = "event" if self._event_driven else "poll"
+            self.logger.info(f"任务调度器已启动（模式: {mode}）")
 
     async def stop(self):
         """停止调度循环"""
         self._running = False
+        if self._event_driven:
+            bus = self.runtime.event_bus
+            for event_type in (EventType.TASK_CREATED, EventType.TASK_RETRY):
+                try:
+                    bus.unsubscribe(event_type, self._on_task_enqueued)
+                except ValueError:
+                    pass
         if self._task:
             self._task.cancel()
             try:
                 await self._task
             except asyncio.CancelledError:
                 pass
+        await self._cancel_in_flight()
         self.logger.info("任务调度器已停止")
 
+    async def _cancel_in_flight(self):
+        """取消所有在途任务并等待其退出"""
+        tasks = [t for running in self._in_flight.values() for t in running.values()]
+        for t in tasks:
+            t.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.logger.info(f"已取消 {len(tasks)} 个在途任务")
+        self._in_flight.clear()
+
+    # ---------- 容量槽位 ----------
+
+    def in_flight_count(self, agent_id: Optional[str] = None) -> int:
+        """在途任务数（指定 agent_id 则只统计该 Agent）"""
+        if agent_id is not None:
+            return len(self._in_flight.get(agent_id, {}))
+        return sum(len(running) for running in self._in_flight.values())
+
+    def free_slots(self, agent) -> int:
+        """Agent 剩余可用槽位数"""
+        return max(0, agent.capacity - self.in_flight_count(agent.agent_id))
+
+    def get_in_flight(self) -> Dict[str, list]:
+        """在途任务快照：{agent_id: [task_id, ...]}"""
+        return {aid: list(running.keys()) for aid, running in self._in_flight.items() if running}
+
+    def notify(self):
+        """唤醒调度循环（有新任务入队时调用）"""
+        self._wakeup.set()
+
+    def _on_task_enqueued(self, event: Event):
+        """TASK_CREATED / TASK_RETRY 事件回调"""
+        self.notify()
+
+    # ---------- 延迟重试 ----------
+
+    def backoff_policy(self, task_type: str) -> BackoffPolicy:
+        """任务类型对应的退避策略（未单独配置时使用默认策略）"""
+        return self._backoff_by_type.get(task_type, self._default_backoff)
+
+    def _schedule_retry(self, due: datetime):
+        """登记一个延迟重试到期时间"""
+        heapq.heappush(self._retry_due, due)
+
+    def _pop_due_retries(self):
+        """弹出已到期的重试时间（对应任务本轮即可被认领）"""
+        now = datetime.now()
+        while self._retry_due and self._retry_due[0] <= now:
+            heapq.heappop(self._retry_due)
+
+    async def _restore_retry_timers(self):
+        """启动时从数据库恢复尚未到期的延迟重试"""
+        try:
+            async with self.runtime.db_manager.session_factory() as session:
+                due_times = await TaskRepository(session).get_delayed_retry_times()
+        except Exception as e:
+            self.logger.warning(f"恢复延迟重试定时失败，将由兜底扫描处理: {e}")
+            return
+        self._retry_due = list(due_times)
+        heapq.heapify(self._retry_due)
+        if due_times:
+            self.logger.info(f"已恢复 {len(due_times)} 个延迟重试定时")
+
+    async def _wait_for_work(self):
+        """
+        空闲等待：入队信号或槽位释放均可唤醒；超时即兜底扫描（poll 模式为轮询间隔），
+        有延迟重试时最迟在最近一个到期时刻醒来
+        """
+        timeout = self._sweep_interval if self._event_driven else self._poll_interval
+        if self._retry_due:
+            timeout = min(timeout, max(0.0, (self._retry_due[0] - datetime.now()).total_seconds()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
     async def _schedule_loop(self):
         """主调度循环"""
         while self._running:
             try:
-                async with self.runtime.db_manager.session_factory() as session:
-                    task_repo = TaskRepository(session)
-                    agent_repo = AgentStateRepository(session)
+                # 先清除信号再查询，查询期间到达的入队信号不会丢失
+                self._wakeup.clear()
+                self._pop_due_retries()
 
-                    # 1. 获取下一个待执行任务
-                    pending_task = await task_repo.get_next_pending()
-                    if pending_task:
-                        await self._assign_task(pending_task, task_repo, agent_repo)
-                        continue
+                # 1. 一次认领填满所有空闲槽位
+                slots, routes = self._plan_slots()
+                capacity = sum(len(s) for s in slots.values())
+                if capacity > 0:
+                    async with self.runtime.db_manager.session_factory() as session:
+                        claimed = await TaskRepository(session).claim_batch(
+                            capacity, slots, routes, default_agent_type="executor"
+                        )
+                    for task in claimed:
+                        await self._dispatch(task)
 
                 # 2. 定期冲突检测
-                self._conflict_counter += 1
-                if self._conflict_counter >= self._conflict_check_interval:
-                    self._conflict_counter = 0
+                now = asyncio.get_running_loop().time()
+                if now - self._last_conflict_check >= self._conflict_check_interval:
+                    self._last_conflict_check = now
                     await self._check_conflicts()
 
-                # 3. 等待下一次轮询
-                await asyncio.sleep(self._poll_interval)
+                # 3. 等待唤醒或下一次轮询
+                await self._wait_for_work()
 
             except asyncio.CancelledError:
                 break
@@ -85,83 +208,129 @@ class TaskScheduler:
                 self.logger.error(f"调度循环异常: {e}")
                 await asyncio.sleep(self._poll_interval)
 
-    async def _assign_task(self, task, task_repo: TaskRepository, agent_repo: AgentStateRepository):
+    def _plan_slots(self):
         """
-        分配任务给最优 Agent
+        规划本轮可用槽位
         参考 kimi-cli 的 TaskAllocator 算法：
-        1. 类型匹配优先
-        2. 负载最低优先
+        1. 类型匹配优先（某类型无在线 Agent 时由 executor 兜底）
+        2. 在途占比最低的 Agent 先获得槽位
+
+        Returns:
+            (slots, routes)：{agent_type: [agent_id, ...]} 与 {task_type: agent_type}
         """
-        target_type = self.task_agent_mapping.get(task.type, "executor")
+        by_type: Dict[str, list] = {}
+        for agent in self.runtime.get_all_agents().values():
+            if agent.state.status in ("idle", "running"):
+                by_type.setdefault(agent.agent_type, []).append(agent)
 
-        # 获取该类型的可用 Agent 状态
-        candidate_states = await agent_repo.get_idle_agents_by_type(target_type)
+        slots: Dict[str, list] = {}
+        for agent_type, agents in by_type.items():
+            used = {a.agent_id: self.in_flight_count(a.agent_id) for a in agents}
+            plan = []
+            while True:
+                free = [a for a in agents if used[a.agent_id] < a.capacity]
+                if not free:
+                    break
+                agent = min(free, key=lambda a: used[a.agent_id] / a.capacity)
+                used[agent.agent_id] += 1
+                plan.append(agent.agent_id)
+            if plan:
+                slots[agent_type] = plan
 
-        # 如果指定类型无可用的，用 executor 作为兜底
-        if not candidate_states and target_type != "executor":
-            candidate_states = await agent_repo.get_idle_agents_by_type("executor")
+        routes = {
+            task_type: agent_type if agent_type in by_type else "executor"
+            for task_type, agent_type in self.task_agent_mapping.items()
+        }
+        return slots, routes
 
-        if not candidate_states:
-            # 无可用的 Agent，任务保持 PENDING（降级为 debug 避免日志洪水）
-            self.logger.debug(f"无可用 Agent 执行任务 {task.task_id}（类型：{task.type}）")
+    async def _dispatch(self, task):
+        """将已认领（RUNNING）的任务交给其执行 Agent，以独立 asyncio.Task 运行"""
+        agent = self.runtime.get_agent(task.executor_agent_id)
+        if agent is None:
+            self.logger.warning(f"Agent {task.executor_agent_id} 不在运行时注册表中")
+            await self._requeue_cancelled(task)
             return
 
-        # 选负载最低的
-        selected = min(candidate_states, key=lambda a: a.load)
-        agent = self.runtime.get_agent(selected.agent_id)
+        self.logger.info(f"任务 {task.task_id}（{task.type}）已分配给 Agent {agent.agent_id}")
+        self._launch(task, agent)
 
-        if not agent:
-            self.logger.warning(f"Agent {selected.agent_id} 不在运行时注册表中")
-            return
+        # 发布事件
+        await self.runtime.event_bus.publish(Event(
+            event_id=f"evt_{task.task_id}_assigned",
+            event_type=EventType.TASK_ASSIGNED,
+            source="scheduler",
+            data={"task_id": task.task_id, "task_type": task.type, "agent_id": agent.agent_id},
+        ))
 
-        # 分配并执行
-        try:
-            task.executor_agent_id = selected.agent_id
-            await task_repo.update_status(
-                task.task_id, TaskStatus.RUNNING,
-                executor_agent_id=selected.agent_id,
-                start_time=datetime.now()
-            )
+    def _launch(self, task, agent):
+        """占用 Agent 槽位并启动执行协程"""
+        running = self._in_flight.setdefault(agent.agent_id, {})
+        exec_task = asyncio.create_task(
+            self._run_task(task, agent), name=f"task_{task.task_id}"
+        )
+        running[task.task_id] = exec_task
+        agent.update_state(status="running", load=len(running) / agent.capacity)
 
-            self.logger.info(
-                f"任务 {task.task_id}（{task.type}）已分配给 Agent {selected.agent_id}"
-            )
+        def _release(_t: asyncio.Task):
+            running.pop(task.task_id, None)
+            if agent.state.status != "stopped":
+                agent.update_state(
+                    status="running" if running else "idle",
+                    load=len(running) / agent.capacity,
+                )
+            self.notify()  # 槽位释放，唤醒调度循环
 
-            # 发布事件
-            await self.runtime.event_bus.publish(Event(
-                event_id=f"evt_{task.task_id}_assigned",
-                event_type=EventType.TASK_ASSIGNED,
-                source="scheduler",
-                data={"task_id": task.task_id, "agent_id": selected.agent_id},
-            ))
+        exec_task.add_done_callback(_release)
 
+    async def _run_task(self, task, agent):
+        """在独立会话中执行任务并回写结果"""
+        task_dict = task.to_dict()
+        try:
             # 执行任务
             if asyncio.iscoroutinefunction(agent.execute_task):
-                result = await agent.execute_task(task.to_dict())
-            else:
-                result = await asyncio.to_thread(agent.execute_task, task.to_dict())
-
-            # 处理结果
-            if result.get("code") == 0:
-                await task_repo.update_status(
-                    task.task_id, TaskStatus.COMPLETED,
-                    end_time=datetime.now(),
-                    result=result,
-                )
-                await self.runtime.event_bus.publish(Event(
-                    event_id=f"evt_{task.task_id}_done",
-                    event_type=EventType.TASK_COMPLETED,
-                    source=selected.agent_id,
-                    data={"task_id": task.task_id, "result": result},
-                ))
+                result = await agent.execute_task(task_dict)
             else:
-                await self._handle_task_failure(task, result, task_repo, selected.agent_id)
-
+                result = await asyncio.to_thread(agent.execute_task, task_dict)
+        except asyncio.CancelledError:
+            await asyncio.shield(self._requeue_cancelled(task))
+            raise
         except Exception as e:
             self.logger.error(f"任务 {task.task_id} 执行异常: {e}")
-            await self._handle_task_failure(
-                task, {"code": -1, "msg": str(e)}, task_repo, selected.agent_id
-            )
+            result = {"code": -1, "msg": str(e)}
+
+        try:
+            async with self.runtime.db_manager.session_factory() as session:
+                task_repo = TaskRepository(session)
+                # 处理结果
+                if result.get("code") == 0:
+                    await task_repo.update_status(
+                        task.task_id, TaskStatus.COMPLETED,
+                        end_time=datetime.now(),
+                        result=result,
+                    )
+                    await self.runtime.event_bus.publish(Event(
+                        event_id=f"evt_{task.task_id}_done",
+                        event_type=EventType.TASK_COMPLETED,
+                        source=agent.agent_id,
+                        data={"task_id": task.task_id, "task_type": task.type, "agent_id": agent.agent_id, "result": result},
+                    ))
+                else:
+                    await self._handle_task_failure(task, result, task_repo, agent.agent_id)
+        except asyncio.CancelledError:
+            # 回写中途被取消（如停止调度器）：尚未写入结果的任务退回队列，不会卡在 RUNNING
+            await asyncio.shield(self._requeue_cancelled(task))
+            raise
+        except Exception as e:
+            self.logger.error(f"任务 {task.task_id} 结果回写失败: {e}")
+
+    async def _requeue_cancelled(self, task):
+        """已认领但未执行完的任务退回 PENDING（调度器停止或 Agent 已离开），不计入重试次数"""
+        try:
+            async with self.runtime.db_manager.session_factory() as session:
+                if await TaskRepository(session).requeue_running(task.task_id):
+                    self.logger.info(f"任务 {task.task_id} 已退回队列")
+        except Exception as e:
+            self.logger.warning(f"任务 {task.task_id} 取消后退回队列失败: {e}")
 
     async def _handle_task_failure(self, task, result: dict, task_repo: TaskRepository, agent_id: str):
         """处理任务失败：重试或标记为失败"""
@@ -171,20 +340,28 @@ class TaskScheduler:
 
         can_retry = task.retry_count < task.max_retries
         if can_retry:
-            # 重试
+            # 延迟重试：按退避策略推迟到 next_attempt_at，到期前不会被再次认领
+            retry = task.retry_count + 1
+            delay = self.backoff_policy(task.type).delay(retry)
+            next_attempt_at = datetime.now() + timedelta(seconds=delay)
             await task_repo.update_status(
                 task.task_id, TaskStatus.PENDING,
-                retry_count=task.retry_count + 1,
+                retry_count=retry,
                 error_msg=result.get("msg", ""),
+                next_attempt_at=next_attempt_at,
             )
+            self._schedule_retry(next_attempt_at)
             self.logger.info(
-                f"任务 {task.task_id} 将重试（{task.retry_count + 1}/{task.max_retries}）"
+                f"任务 {task.task_id} 将在 {delay:.1f}s 后重试（{retry}/{task.max_retries}）"
             )
             await self.runtime.event_bus.publish(Event(
                 event_id=f"evt_{task.task_id}_retry",
                 event_type=EventType.TASK_RETRY,
                 source=agent_id,
-                data={"task_id": task.task_id, "retry": task.retry_count + 1},
+                data={
+                    "task_id": task.task_id, "task_type": task.type, "agent_id": agent_id, "retry": retry,
+                    "delay": round(delay, 3), "next_attempt_at": next_attempt_at.isoformat(),
+                },
             ))
         else:
             # 最终失败
@@ -198,7 +375,7 @@ class TaskScheduler:
                 event_id=f"evt_{task.task_id}_failed",
                 event_type=EventType.TASK_FAILED,
                 source=agent_id,
-                data={"task_id": task.task_id, "error": result.get("msg", "")},
+                data={"task_id": task.task_id, "task_type": task.type, "agent_id": agent_id, "error": result.get("msg", "")},
             ))
 
     async def _check_conflicts(self):
@@ -0,0 +1,125 @@
+"""
+任务统计服务 - 聚合查询 + 事件失效缓存
+为 /system/stats 等仪表盘轮询提供按状态 / 类型 / Agent 的任务数与耗时分位数
+
+- 单条 GROUP BY 查询得到全部计数，另一条窗口函数查询得到 p50/p95 耗时
+- 结果至少缓存 stats_cache_ttl 秒（事件再密集也至多每 TTL 重算一次）；过期后有任务事件才重算，
+  无事件时沿用快照，最长 STATS_MAX_AGE 秒
+- 并发读取共享同一次重算，轮询开销与表大小无关
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from utils.logger import get_logger
+from core.event_bus import Event, EventType
+from core.repository import TaskRepository
+from core.models import TaskStatus
+
+# 会改变任务计数或耗时的事件
+TASK_STATE_EVENTS = (
+    EventType.TASK_CREATED,
+    EventType.TASK_ASSIGNED,
+    EventType.TASK_STARTED,
+    EventType.TASK_COMPLETED,
+    EventType.TASK_FAILED,
+    EventType.TASK_RETRY,
+)
+
+# 无任务事件时快照最长沿用秒数（兜底未发布事件的进程外写入）
+STATS_MAX_AGE = 60.0
+
+
+class TaskStatsService:
+    """任务统计服务（TTL 防抖 + 事件失效的缓存）"""
+
+    def __init__(self, runtime, ttl: Optional[float] = None):
+        self.runtime = runtime
+        self.logger = get_logger("task_stats")
+        self._ttl = runtime.config.api_config.stats_cache_ttl if ttl is None else ttl
+        self._snapshot: Optional[dict] = None
+        self._computed_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self._subscribed = False
+
+    def start(self):
+        """订阅任务状态事件"""
+        if self._subscribed:
+            return
+        for event_type in TASK_STATE_EVENTS:
+            self.runtime.event_bus.subscribe(event_type, self._on_task_event)
+        self._subscribed = True
+
+    def stop(self):
+        """取消订阅"""
+        if not self._subscribed:
+            return
+        for event_type in TASK_STATE_EVENTS:
+            try:
+                self.runtime.event_bus.unsubscribe(event_type, self._on_task_event)
+            except ValueError:
+                pass
+        self._subscribed = False
+
+    def _on_task_event(self, event: Event):
+        self.invalidate()
+
+    def invalidate(self):
+        """标记缓存失效"""
+        self._dirty = True
+
+    def _fresh(self) -> bool:
+        """TTL 内一律复用快照；过期后若无任务事件继续沿用，最长 STATS_MAX_AGE 秒"""
+        if self._snapshot is None:
+            return False
+        age = time.monotonic() - self._computed_at
+        return age < self._ttl or (not self._dirty and age < max(self._ttl, STATS_MAX_AGE))
+
+    async def get(self) -> dict:
+        """获取统计快照，缓存有效时不访问数据库"""
+        if self._fresh():
+            return self._snapshot
+        async with self._lock:
+            # 等锁期间可能已有其他请求完成重算
+            if self._fresh():
+                return self._snapshot
+            # 先清除标记：重算期间到达的事件会让下一次读取再次重算
+            self._dirty = False
+            try:
+                self._snapshot = await self._compute()
+            except Exception:
+                self._dirty = True
+                raise
+            self._computed_at = time.monotonic()
+            return self._snapshot
+
+    async def _compute(self) -> dict:
+        async with self.runtime.db_manager.session_factory() as session:
+            repo = TaskRepository(session)
+            grouped = await repo.count_grouped()
+            samples, percentiles = await repo.duration_percentiles((50, 95))
+
+        by_status = {s.value: 0 for s in TaskStatus}
+        by_type: Dict[str, Dict[str, int]] = {}
+        by_agent: Dict[str, Dict[str, int]] = {}
+        for task_type, agent_id, status, count in grouped:
+            status = status.value if isinstance(status, TaskStatus) else status
+            by_status[status] = by_status.get(status, 0) + count
+            type_counts = by_type.setdefault(task_type, {})
+            type_counts[status] = type_counts.get(status, 0) + count
+            if agent_id:
+                agent_counts = by_agent.setdefault(agent_id, {})
+                agent_counts[status] = agent_counts.get(status, 0) + count
+
+        return {
+            "by_status": by_status,
+            "by_type": by_type,
+            "by_agent": by_agent,
+            "durations": {
+                "samples": samples,
+                "p50_seconds": percentiles.get(50),
+                "p95_seconds": percentiles.get(95),
+            },
+            "generated_at": datetime.now().isoformat(),
+        }
@@ -2,18 +2,34 @@
 SwarmMode 并行批量调度器
 参考 kimi-code SwarmMode + SubagentBatch 设计:
 - 两阶段调度：正常阶段 + 限速阶段
-- 并发控制（max_concurrency）
-- 失败重试（指数退避）
-- 按序收集结果
+- 自适应并发控制（AIMD，上限 max_concurrency）
+- 失败重试（指数退避）；被限流（429）或超时的子任务让出槽位，延迟后重排
+- 协程执行函数直接 await；同步函数在专用线程池（或注入的线程 / 进程池）中执行
+- 按完成顺序流式产出结果，或按原始顺序（有界重排缓冲）产出
 """
 from __future__ import annotations
 import asyncio
+import functools
+import heapq
+import inspect
+import time
 import uuid
+from collections import Counter, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Set
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
 from utils.logger import get_logger
 
+THROTTLE_STATUS_CODES = (429,)
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """默认限流判定：超时（含 LLMTimeoutError），或带 429 状态码的异常（如 LLMAPIError）"""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    return getattr(exc, "status_code", None) in THROTTLE_STATUS_CODES
+
 
 class SwarmStatus(str, Enum):
     PENDING = "pending"
@@ -53,22 +69,96 @@ class SwarmTaskResult:
 class SwarmConfig:
     """Swarm 配置"""
     max_concurrency: int = 5  # 最大并发数
-    initial_launch: int = 5  # 首批启动数
-    launch_interval: float = 0.7  # 启动间隔（秒）
+    initial_launch: int = 5  # 兼容保留：令牌桶默认容量（未设 launch_burst 时）；首批直接按 max_concurrency 启动
+    launch_interval: float = 0.7  # 兼容保留：调度已改为完成即补位，不再按间隔轮询
+    launch_rate: Optional[float] = None  # 令牌桶匀速启动：每秒最多启动数，None 为不限
+    launch_burst: Optional[int] = None  # 令牌桶容量（可瞬时启动数），默认 initial_launch
     retry_base_ms: int = 3000  # 重试基础延迟（毫秒）
     retry_factor: int = 2  # 重试倍数
     max_retries: int = 3  # 最大重试次数
     timeout: int = 600  # 单个子任务超时（秒）
+    # 限速阶段（AIMD 自适应并发）
+    adaptive: bool = True  # 限流 / 超时时收缩并发，False 则固定为 max_concurrency
+    min_concurrency: int = 1  # 收缩下限
+    increase_step: float = 1.0  # 加性增长：每完成约一轮（当前并发数个）子任务，并发上限 +increase_step
+    decrease_factor: float = 0.5  # 乘性收缩：遇到限流时并发上限 × decrease_factor
+    max_throttle_retries: int = 10  # 单个子任务因限流 / 超时重排的最大次数
+    is_throttled: Optional[Callable[[BaseException], bool]] = None  # 限流判定，默认 is_throttled
+
+
+class TokenBucket:
+    """令牌桶：按 rate 个/秒补充令牌，最多积累 capacity 个"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(float(self.capacity), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """距下一个令牌可用的秒数"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 并发控制器（参考 TCP 拥塞控制）
+    - 子任务成功：limit += increase / limit，约每完成一轮并发 +increase
+    - 限流 / 超时：limit *= decrease；同一波拥塞只收缩一次（上次收缩前启动的子任务报错不再收缩）
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, increase: float = 1.0, decrease: float = 0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.epoch = 0  # 收缩次数，子任务启动时记录
+
+    @property
+    def current(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def on_success(self):
+        if self.limit < self.maximum:
+            self.limit = min(float(self.maximum), self.limit + self.increase / self.limit)
+
+    def on_throttle(self, epoch: int) -> bool:
+        """启动于 epoch 的子任务被限流；返回是否收缩了上限"""
+        if epoch != self.epoch:
+            return False
+        self.limit = max(float(self.minimum), self.limit * self.decrease)
+        self.epoch += 1
+        return True
 
 
 class SwarmBatch:
     """
     批量并发调度器
     参考 kimi-code SubagentBatch:
-    - 正常阶段：首批启动 N 个，每 interval 秒补偿 1 个
-    - 限速阶段：指数退避 + 容量收缩/恢复
-    - 按序收集结果
+    - 正常阶段：并发上限即 max_concurrency，首批启满，子任务完成回调即唤醒调度循环补位（无轮询）；
+      可选令牌桶（launch_rate）限制启动速率
+    - 限速阶段：子任务报限流（429）或超时后并发上限乘性收缩，之后随成功加性恢复；
+      被限流的子任务立即让出槽位，按指数退避（或 retry_after）延迟后重排
+    - stream() 按完成顺序（或 ordered=True 按原始顺序）逐个产出结果，run() 收集为列表
     - 支持取消（保留已有结果）
+
+    executor 为协程函数（如 LLMClient.chat 的包装）时直接在事件循环中 await；
+    同步函数默认在本批次专用、大小为 max_concurrency 的线程池中执行，不与全局默认线程池争抢，
+    也可通过 pool 注入线程池或进程池（CPU 密集型，此时 executor 与 spec 须可 pickle）。
     """
 
     def __init__(
@@ -76,82 +166,223 @@ class SwarmBatch:
         specs: List[SwarmTaskSpec],
         executor: Callable[[SwarmTaskSpec], Any],
         config: Optional[SwarmConfig] = None,
+        pool: Optional[Executor] = None,
     ):
         self.specs = specs
         self.executor = executor
         self.config = config or SwarmConfig()
+        self.pool = pool
+        self._is_coroutine = inspect.iscoroutinefunction(executor) or inspect.iscoroutinefunction(
+            getattr(executor, "__call__", None)
+        )
+        self._own_pool: Optional[ThreadPoolExecutor] = None  # 未注入 pool 时按需创建，批次结束时关闭
         self.logger = get_logger("swarm")
-        self._results: Dict[int, SwarmTaskResult] = {}
+        self._is_throttled = self.config.is_throttled or is_throttled
+        # 上限从 max_concurrency 起步，仅在限流后收缩、随成功恢复，未遇限流时与固定并发等价
+        self._limiter = AdaptiveConcurrency(
+            self.config.max_concurrency,
+            self.config.min_concurrency if self.config.adaptive else self.config.max_concurrency,
+            self.config.max_concurrency,
+            self.config.increase_step,
+            self.config.decrease_factor,
+        )
         self._active: Set[asyncio.Task] = set()
+        self._finished: Deque[asyncio.Task] = deque()  # 已结束、待调度循环收集的子任务
+        self._wakeup = asyncio.Event()  # 子任务结束时置位
+        self._bucket = (TokenBucket(self.config.launch_rate, self.config.launch_burst or self.config.initial_launch)
+                        if self.config.launch_rate else None)
+        # {任务: (启动序号, 结果, 启动时的收缩轮次, 已限流次数)}
+        self._inflight: Dict[asyncio.Task, Tuple[int, SwarmTaskResult, int, int]] = {}
+        # 限流延迟重排：[(可重试时刻, 启动序号, 已限流次数, 结果)] 小顶堆
+        self._delayed: List[Tuple[float, int, int, SwarmTaskResult]] = []
+        self._counts: Counter = Counter()  # 已结束子任务按状态计数
+        self._launches = 0
+        self._throttles = 0
+        self._rate_limit_mode = False
+        self._started_at: Optional[float] = None
         self._cancelled = False
         self._cancel_event = asyncio.Event()
 
     async def run(self) -> List[SwarmTaskResult]:
         """
         运行批量任务
-        返回按原始顺序排列的结果列表
+        返回按原始顺序排列的结果列表（取消后未启动的子任务为 PENDING）
         """
-        if not self.specs:
-            return []
-
-        self.logger.info(f"Swarm 启动: {len(self.specs)} 个子任务，最大并发 {self.config.max_concurrency}")
-
-        # 初始化结果占位
-        for spec in self.specs:
-            self._results[spec.index] = SwarmTaskResult(spec=spec)
-
-        queue = list(self.specs)  # 待处理队列
-        launched = 0
-        rate_limit_mode = False
-        rate_limit_capacity = 1
-        retry_intervals: Dict[int, float] = {}  # index -> 下次可重试时间
-
-        # 首批启动
-        initial_count = min(self.config.initial_launch, len(queue))
-        for _ in range(initial_count):
-            spec = queue.pop(0)
-            self._launch_task(spec)
-
-        while not self._all_done():
-            if self._cancelled:
-                break
-
-            # 等待一个任务完成或超时
-            active_tasks = list(self._active)
-            if active_tasks:
-                done, pending = await asyncio.wait(
-                    active_tasks, timeout=self.config.launch_interval,
-                    return_when=asyncio.FIRST_COMPLETED,
-                )
-                self._active = pending
+        results = {}
+        async for result in self.stream():
+            results[result.spec.index] = result
+        return [results.get(spec.index) or SwarmTaskResult(spec=spec)
+                for spec in sorted(self.specs, key=lambda s: s.index)]
 
-            # 启动更多任务
-            if queue and len(self._active) < self.config.max_concurrency:
-                spec = queue.pop(0)
-                self._launch_task(spec)
+    async def stream(self, ordered: bool = False, reorder_buffer: Optional[int] = None) -> AsyncIterator[SwarmTaskResult]:
+        """
+        运行批量任务，子任务一结束即产出其结果（async for result in batch.stream()）
 
-            # 如果没任务在跑且队列为空，退出
-            if not queue and not self._active:
-                break
+        Args:
+            ordered: True 时按 specs 原始顺序产出，先完成的结果在重排缓冲中等待
+            reorder_buffer: 有序模式下"已启动未产出"的子任务上限（默认 4 × max_concurrency），
+                队首未完成而缓冲已满时暂停启动新任务
 
-        # 等待剩余任务
-        if self._active:
-            await asyncio.wait(self._active, timeout=30)
+        已产出的结果不再被本对象持有，内存随并发数而非子任务总数增长；
+        消费者处理较慢时不会启动新任务，提前退出 async for 会取消仍在运行的子任务。
+        """
+        if not self.specs:
+            return
+
+        self.logger.info(f"Swarm 启动: {len(self.specs)} 个子任务，最大并发 {self.config.max_concurrency}"
+                         f"{'（自适应）' if self.config.adaptive else ''}{'（有序产出）' if ordered else ''}")
+
+        loop = asyncio.get_running_loop()
+        self._started_at = time.monotonic()
+        queue: Deque[SwarmTaskSpec] = deque(self.specs)  # 待处理队列
+        window = max(1, reorder_buffer or self.config.max_concurrency * 4)
+        launched = 0  # 已启动的新子任务数（即下一个子任务的启动序号）
+        next_position = 0  # 有序模式下一个应产出的启动序号
+        buffered: Dict[int, SwarmTaskResult] = {}  # 有序模式重排缓冲 {启动序号: 结果}
+
+        def launch_next() -> Optional[float]:
+            """
+            有空闲槽位时启动一个子任务：优先到期的限流重排，其次队列中的新任务
+            返回 0 表示已启动；否则返回最早可再尝试的等待秒数（None 表示只能等子任务结束）
+            """
+            nonlocal launched
+            if self._cancelled or len(self._active) >= self._limiter.current:
+                return None
+            retry_due = self._delayed and self._delayed[0][0] <= loop.time()
+            fresh = queue and (not ordered or launched - next_position < window)
+            if not retry_due and not fresh:
+                return max(0.0, self._delayed[0][0] - loop.time()) if self._delayed else None
+            if self._bucket is not None and not self._bucket.try_acquire():
+                return self._bucket.wait_time()
+            if retry_due:
+                _, position, throttles, result = heapq.heappop(self._delayed)
+                self._launch_task(result.spec, position, result, throttles)
+            else:
+                self._launch_task(queue.popleft(), launched)
+                launched += 1
+            return 0.0
+
+        try:
+            while not self._cancelled:
+                # 补满空闲槽位（并发上限随 AIMD 变化，须一次补足才能真正达到当前上限）
+                wait = launch_next()
+                while wait == 0.0:
+                    wait = launch_next()
+
+                if not self._active and wait is None:
+                    break  # 没任务在跑、队列为空且无待重排，退出
+
+                # 等子任务结束回调唤醒；有待重排或令牌桶限速时最迟在其到期时醒来
+                if not self._finished:
+                    self._wakeup.clear()
+                    if wait is None:
+                        await self._wakeup.wait()
+                    else:
+                        try:
+                            await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                        except asyncio.TimeoutError:
+                            pass
+                done = set()
+                while self._finished:
+                    done.add(self._finished.popleft())
+                self._active.difference_update(done)
+                for position, result in self._collect(done):
+                    if ordered:
+                        buffered[position] = result
+                    else:
+                        yield result
+                while next_position in buffered:
+                    yield buffered.pop(next_position)
+                    next_position += 1
+
+            # 已取消：等待剩余任务收尾，产出其（ABORTED）结果
+            if self._active:
+                done, self._active = await asyncio.wait(self._active, timeout=30)
+                buffered.update(self._collect(done))
+            while self._delayed:
+                _, position, _, result = heapq.heappop(self._delayed)
+                result.status = SwarmStatus.ABORTED
+                result.error = "已取消"
+                self._counts[result.status] += 1
+                buffered[position] = result
+            for _, result in sorted(buffered.items()):
+                yield result
+        finally:
+            # 消费者提前退出或运行被取消：取消仍在运行的子任务
+            for task in self._active:
+                task.cancel()
+            if self._active:
+                await asyncio.gather(*self._active, return_exceptions=True)
+                self._active = set()
+            self._inflight.clear()
+            self._delayed.clear()
+            self._finished.clear()
+            if self._own_pool is not None:
+                self._own_pool.shutdown(wait=False)
+                self._own_pool = None
 
         self.logger.info(f"Swarm 完成: {self._summary()}")
 
-        # 按原始顺序返回
-        return [self._results[i] for i in sorted(self._results.keys())]
-
-    def _launch_task(self, spec: SwarmTaskSpec):
-        """启一个子任务"""
-        task = asyncio.create_task(self._run_one(spec), name=f"swarm_{spec.index}")
+    def _launch_task(self, spec: SwarmTaskSpec, position: int,
+                     result: Optional[SwarmTaskResult] = None, throttles: int = 0):
+        """启一个子任务（result 非空时为限流后的重排）"""
+        result = result or SwarmTaskResult(spec=spec)
+        task = asyncio.create_task(self._run_one(spec, result), name=f"swarm_{spec.index}")
+        task.add_done_callback(self._on_task_done)
         self._active.add(task)
+        self._inflight[task] = (position, result, self._limiter.epoch, throttles)
+        self._launches += 1
+
+    def _on_task_done(self, task: asyncio.Task):
+        """子任务结束回调：交给调度循环收集并立即唤醒其补位"""
+        self._finished.append(task)
+        self._wakeup.set()
+
+    def _collect(self, done: Set[asyncio.Task]):
+        """取出已结束子任务的 (启动序号, 结果)，按启动顺序；被限流的子任务转入延迟重排，不产出"""
+        finished = sorted(((self._inflight.pop(task), task) for task in done), key=lambda item: item[0][0])
+        for (position, result, epoch, throttles), task in finished:
+            throttle = None if task.cancelled() else task.result()
+            if throttle is not None and self._requeue_throttled(position, result, epoch, throttles, throttle):
+                continue
+            if result.status not in (SwarmStatus.COMPLETED, SwarmStatus.FAILED, SwarmStatus.ABORTED):
+                # 在重试退避等待中被取消
+                result.status = SwarmStatus.ABORTED
+                result.error = "已取消"
+            if result.status == SwarmStatus.COMPLETED:
+                self._limiter.on_success()
+                if self._rate_limit_mode and self._limiter.current >= self._limiter.maximum:
+                    self._rate_limit_mode = False
+                    self.logger.info(f"Swarm 并发恢复至 {self._limiter.current}，回到正常阶段")
+            self._counts[result.status] += 1
+            yield position, result
+
+    def _requeue_throttled(self, position: int, result: SwarmTaskResult, epoch: int, throttles: int,
+                           error: BaseException) -> bool:
+        """子任务被限流：收缩并发并延迟重排；返回 False 表示重排次数已用尽（判为失败）"""
+        self._throttles += 1
+        if self.config.adaptive and self._limiter.on_throttle(epoch):
+            self._rate_limit_mode = True
+            self.logger.warning(f"Swarm 子任务 #{result.spec.index} 被限流，并发上限收缩至 {self._limiter.current}")
+        if self._cancelled:
+            result.status = SwarmStatus.ABORTED
+            result.error = "已取消"
+            return False
+        if throttles >= self.config.max_throttle_retries:
+            result.status = SwarmStatus.FAILED
+            return False
+        delay = self.config.retry_base_ms / 1000 * (self.config.retry_factor ** throttles)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, retry_after)
+        due = asyncio.get_running_loop().time() + delay
+        heapq.heappush(self._delayed, (due, position, throttles + 1, result))
+        return True
 
-    async def _run_one(self, spec: SwarmTaskSpec):
-        """执行单个子任务，含重试"""
-        result = self._results[spec.index]
+    async def _run_one(self, spec: SwarmTaskSpec, result: SwarmTaskResult) -> Optional[BaseException]:
+        """执行单个子任务，含重试；被限流 / 超时时立即返回该异常，由调度循环延迟重排"""
         result.state = SwarmState.STARTED
+        result.status = SwarmStatus.RUNNING
 
         for attempt in range(self.config.max_retries + 1):
             try:
@@ -163,17 +394,21 @@ class SwarmBatch:
                 result.status = SwarmStatus.COMPLETED
                 result.result = output if isinstance(output, dict) else {"data": str(output)}
                 self.logger.debug(f"Swarm 子任务 #{spec.index} 完成")
-                return
-            except asyncio.TimeoutError:
-                self.logger.warning(f"Swarm 子任务 #{spec.index} 超时 ({self.config.timeout}s)")
-                result.error = "执行超时"
+                return None
             except asyncio.CancelledError:
                 result.status = SwarmStatus.ABORTED
                 result.error = "已取消"
-                return
+                return None
             except Exception as e:
-                self.logger.error(f"Swarm 子任务 #{spec.index} 失败 (尝试 {attempt + 1}): {e}")
-                result.error = str(e)
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                result.error = "执行超时" if timed_out else str(e)
+                if self._is_throttled(e):
+                    self.logger.warning(f"Swarm 子任务 #{spec.index} 被限流或超时: {result.error}")
+                    return e
+                if timed_out:
+                    self.logger.warning(f"Swarm 子任务 #{spec.index} 超时 ({self.config.timeout}s)")
+                else:
+                    self.logger.error(f"Swarm 子任务 #{spec.index} 失败 (尝试 {attempt + 1}): {e}")
 
             if attempt < self.config.max_retries:
                 # 指数退避
@@ -182,10 +417,20 @@ class SwarmBatch:
                 await asyncio.sleep(delay)
 
         result.status = SwarmStatus.FAILED
+        return None
 
     async def _execute_with_timeout(self, spec: SwarmTaskSpec):
-        """在线程池中执行用户函数（避免阻塞事件循环）"""
-        return await asyncio.to_thread(self.executor, spec)
+        """协程函数直接 await；同步函数在线程 / 进程池中执行（避免阻塞事件循环）"""
+        if self._is_coroutine:
+            return await self.executor(spec)
+        pool = self.pool
+        if pool is None:
+            if self._own_pool is None:
+                self._own_pool = ThreadPoolExecutor(
+                    max_workers=max(1, self.config.max_concurrency), thread_name_prefix="swarm",
+                )
+            pool = self._own_pool
+        return await asyncio.get_running_loop().run_in_executor(pool, functools.partial(self.executor, spec))
 
     def cancel(self):
         """取消批量执行（保留已有结果）"""
@@ -194,31 +439,60 @@ class SwarmBatch:
             task.cancel()
         self.logger.info("Swarm 已取消")
 
-    def _all_done(self) -> bool:
-        """检查所有任务是否都有结果"""
-        for spec in self.specs:
-            result = self._results.get(spec.index)
-            if result and result.status in (SwarmStatus.COMPLETED, SwarmStatus.FAILED, SwarmStatus.ABORTED):
-                continue
-            return False
-        return True
+    def metrics(self) -> Dict[str, Any]:
+        """运行指标：当前并发上限、在途 / 待重排数、各状态计数与有效吞吐（完成数 / 秒）"""
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        completed = self._counts[SwarmStatus.COMPLETED]
+        return {
+            "total": len(self.specs),
+            "concurrency": self._limiter.current,
+            "max_concurrency": self.config.max_concurrency,
+            "rate_limit_mode": self._rate_limit_mode,
+            "active": len(self._active),
+            "delayed": len(self._delayed),
+            "launches": self._launches,
+            "throttled": self._throttles,
+            "decreases": self._limiter.epoch,
+            "completed": completed,
+            "failed": self._counts[SwarmStatus.FAILED],
+            "aborted": self._counts[SwarmStatus.ABORTED],
+            "elapsed": round(elapsed, 3),
+            "goodput": round(completed / elapsed, 2) if elapsed > 0 else 0.0,
+            "executor": "coroutine" if self._is_coroutine else (type(self.pool) if self.pool else ThreadPoolExecutor).__name__,
+        }
 
     def _summary(self) -> str:
         """汇总统计"""
-        completed = sum(1 for r in self._results.values() if r.status == SwarmStatus.COMPLETED)
-        failed = sum(1 for r in self._results.values() if r.status == SwarmStatus.FAILED)
-        aborted = sum(1 for r in self._results.values() if r.status == SwarmStatus.ABORTED)
-        return f"completed={completed}, failed={failed}, aborted={aborted}"
+        completed = self._counts[SwarmStatus.COMPLETED]
+        failed = self._counts[SwarmStatus.FAILED]
+        aborted = self._counts[SwarmStatus.ABORTED]
+        return (f"completed={completed}, failed={failed}, aborted={aborted}, "
+                f"throttled={self._throttles}, concurrency={self._limiter.current}")
 
 
 # ---------- 便捷方法 ----------
 
+def _build_specs(items: List[Any], prompt_template: str, agent_type: str) -> List[SwarmTaskSpec]:
+    """items + prompt_template 生成子任务规格，{{item}} 会被替换为对应项"""
+    return [
+        SwarmTaskSpec(
+            index=i + 1,
+            item=item,
+            prompt=prompt_template.replace("{{item}}", str(item)),
+            task_id=f"swarm_{uuid.uuid4().hex[:8]}",
+            agent_type=agent_type,
+        )
+        for i, item in enumerate(items)
+    ]
+
+
 async def swarm_execute(
     items: List[Any],
     prompt_template: str,
     executor: Callable,
     agent_type: str = "executor",
     max_concurrency: int = 5,
+    pool: Optional[Executor] = None,
 ) -> List[SwarmTaskResult]:
     """
     便捷的批量并行执行方法
@@ -227,24 +501,40 @@ async def swarm_execute(
     Args:
         items: 任务项列表
         prompt_template: 提示词模板，{{item}} 会被替换为对应项
-        executor: 执行函数 Callable[[SwarmTaskSpec], Any]
+        executor: 执行函数 Callable[[SwarmTaskSpec], Any]，可为协程函数
         agent_type: 分配的 Agent 类型
         max_concurrency: 最大并发数
+        pool: 执行同步函数的线程 / 进程池，默认为本批次专用线程池
     """
-    specs = []
-    for i, item in enumerate(items):
-        prompt = prompt_template.replace("{{item}}", str(item))
-        specs.append(SwarmTaskSpec(
-            index=i + 1,
-            item=item,
-            prompt=prompt,
-            task_id=f"swarm_{uuid.uuid4().hex[:8]}",
-            agent_type=agent_type,
-        ))
-
     batch = SwarmBatch(
-        specs=specs,
+        specs=_build_specs(items, prompt_template, agent_type),
         executor=executor,
         config=SwarmConfig(max_concurrency=max_concurrency),
+        pool=pool,
     )
     return await batch.run()
+
+
+async def swarm_stream(
+    items: List[Any],
+    prompt_template: str,
+    executor: Callable,
+    agent_type: str = "executor",
+    max_concurrency: int = 5,
+    ordered: bool = False,
+    pool: Optional[Executor] = None,
+) -> AsyncIterator[SwarmTaskResult]:
+    """
+    swarm_execute 的流式版本：子任务一结束即产出结果，适合边执行边写出的大批量场景
+
+        async for result in swarm_stream(items, "处理 {{item}}", executor, ordered=True):
+            write(result)
+    """
+    batch = SwarmBatch(
+        specs=_build_specs(items, prompt_template, agent_type),
+        executor=executor,
+        config=SwarmConfig(max_concurrency=max_concurrency),
+        pool=pool,
+    )
+    async for result in batch.stream(ordered=ordered):
+        yield result
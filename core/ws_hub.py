@@ -0,0 +1,225 @@
+"""
+WebSocket 事件广播中心 - 所有连接共用一个 EventBus 订阅
+
+- 每个事件只序列化一次，按各客户端的过滤条件（事件类型 / 任务 ID）分发
+- 每个客户端一个有界发送队列 + 独立发送任务，慢连接只影响自己，不阻塞事件总线
+- 发送任务每 flush_interval 秒把队列中的事件合并为一帧：
+  单个事件直接发送事件对象，多个事件发送 {"type": "batch", "events": [...]}
+- 队列满时按 overflow 策略丢弃最旧事件（drop_oldest）或断开该客户端（disconnect）
+"""
+import asyncio
+import json
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+from utils.logger import get_logger
+from core.event_bus import Event, EventType
+
+OVERFLOW_POLICIES = ("drop_oldest", "disconnect")
+CLOSE_TOO_SLOW = 1013  # Try Again Later：客户端消费过慢
+
+
+def event_payload(event: Event) -> Dict[str, Any]:
+    """事件序列化为字典（REST 与 WebSocket 共用）"""
+    return {
+        "event_id": event.event_id,
+        "event_type": event.event_type.value,
+        "source": event.source,
+        "data": event.data,
+        "timestamp": event.timestamp.isoformat(),
+        "offset": event.offset,
+    }
+
+
+def encode_event(event: Event) -> str:
+    return json.dumps({"type": "event", **event_payload(event)},
+                      ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def build_frame(texts: List[str]) -> str:
+    """把已序列化的事件拼成一帧，不再重复序列化"""
+    if len(texts) == 1:
+        return texts[0]
+    return '{"type":"batch","events":[' + ",".join(texts) + "]}"
+
+
+class WsClient:
+    """单个 WebSocket 连接的过滤条件、发送队列与统计"""
+    __slots__ = ("name", "send", "close", "event_types", "task_ids", "queue", "max_queue", "overflow",
+                 "wakeup", "task", "closed", "sent_frames", "sent_events", "dropped", "connected_at")
+
+    def __init__(self, name: str, send: Callable[[str], Awaitable], close: Callable[..., Awaitable],
+                 event_types: Optional[FrozenSet[EventType]], task_ids: Optional[FrozenSet[str]],
+                 max_queue: int, overflow: str):
+        self.name = name
+        self.send = send
+        self.close = close
+        self.event_types = event_types
+        self.task_ids = task_ids
+        self.queue: Deque[Tuple[Optional[int], str]] = deque()  # [(offset, 已序列化事件)]
+        self.max_queue = max(1, max_queue)
+        self.overflow = overflow
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent_frames = 0
+        self.sent_events = 0
+        self.dropped = 0
+        self.connected_at = datetime.now()
+
+    def matches(self, event: Event) -> bool:
+        if self.event_types is not None and event.event_type not in self.event_types:
+            return False
+        if self.task_ids is not None:
+            data = event.data or {}
+            task_id = data.get("task_id")
+            if task_id is None and isinstance(data.get("task"), dict):
+                task_id = data["task"].get("task_id")
+            if task_id not in self.task_ids:
+                return False
+        return True
+
+    def offer(self, offset: Optional[int], text: str) -> bool:
+        """入队；返回 False 表示队列溢出且策略为 disconnect，需断开该客户端"""
+        if len(self.queue) >= self.max_queue:
+            if self.overflow == "disconnect":
+                self.closed = True
+                return False
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append((offset, text))
+        self.wakeup.set()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "event_types": sorted(t.value for t in self.event_types) if self.event_types else None,
+            "task_ids": sorted(self.task_ids) if self.task_ids else None,
+            "queue_depth": len(self.queue),
+            "sent_frames": self.sent_frames,
+            "sent_events": self.sent_events,
+            "dropped": self.dropped,
+            "connected_at": self.connected_at.isoformat(),
+        }
+
+
+class WebSocketHub:
+    """WebSocket 事件广播中心"""
+
+    def __init__(self, event_bus, flush_interval: float = 0.05, queue_size: int = 1000,
+                 overflow: str = "drop_oldest"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的 WebSocket 溢出策略: {overflow}，可选 {OVERFLOW_POLICIES}")
+        self.event_bus = event_bus
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.logger = get_logger("ws_hub")
+        self._clients: List[WsClient] = []
+        self._subscribed = False
+        self._seq = 0
+        self.serialized = 0
+        self.disconnected_slow = 0
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        if not self._subscribed:
+            self.event_bus.subscribe_all(self._on_event)
+            self._subscribed = True
+
+    async def stop(self):
+        if self._subscribed:
+            self.event_bus.unsubscribe_all(self._on_event)
+            self._subscribed = False
+        for client in list(self._clients):
+            await self.disconnect(client)
+
+    # ---------- 连接管理 ----------
+
+    def connect(self, send: Callable[[str], Awaitable], close: Callable[..., Awaitable], *,
+                event_types: Optional[FrozenSet[EventType]] = None, task_ids: Optional[FrozenSet[str]] = None,
+                paused: bool = False) -> WsClient:
+        """
+        注册客户端；paused=True 时事件照常入队但暂不发送（用于先回放历史），随后调用 resume()
+        """
+        self._seq += 1
+        client = WsClient(f"ws-{self._seq}", send, close, event_types, task_ids, self.queue_size, self.overflow)
+        self._clients.append(client)
+        if not paused:
+            self.resume(client)
+        return client
+
+    def resume(self, client: WsClient, after_offset: Optional[int] = None):
+        """开始发送；after_offset 之前（含）的事件已通过回放送达，从队列中剔除"""
+        if after_offset is not None:
+            client.queue = deque(item for item in client.queue if item[0] is None or item[0] > after_offset)
+        if client.task is None:
+            client.task = asyncio.create_task(self._sender(client), name=f"ws_sender:{client.name}")
+
+    async def disconnect(self, client: WsClient):
+        client.closed = True
+        if client in self._clients:
+            self._clients.remove(client)
+        task, client.task = client.task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # ---------- 分发与发送 ----------
+
+    def _on_event(self, event: Event):
+        text = None
+        for client in self._clients:
+            if not client.closed and client.matches(event):
+                if text is None:
+                    text = encode_event(event)
+                    self.serialized += 1
+                if not client.offer(event.offset, text):
+                    asyncio.create_task(self._evict(client))
+
+    async def _evict(self, client: WsClient):
+        """断开消费过慢的客户端（其发送任务可能正阻塞在 send 上，直接取消）"""
+        self.disconnected_slow += 1
+        self.logger.warning(f"WebSocket {client.name} 发送队列溢出，已断开")
+        await self.disconnect(client)
+        try:
+            await client.close(code=CLOSE_TOO_SLOW, reason="发送队列溢出")
+        except Exception:
+            pass
+
+    async def _sender(self, client: WsClient):
+        try:
+            while not client.closed:
+                await client.wakeup.wait()
+                # 等一个合并窗口，窗口内到达的事件一帧发出
+                await asyncio.sleep(self.flush_interval)
+                client.wakeup.clear()
+                if client.closed or not client.queue:
+                    continue
+                texts = [text for _, text in client.queue]
+                client.queue.clear()
+                await client.send(build_frame(texts))
+                client.sent_frames += 1
+                client.sent_events += len(texts)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 连接已断开：交给接收循环清理
+            client.closed = True
+            self.logger.debug(f"WebSocket {client.name} 发送失败: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "serialized_events": self.serialized,
+            "disconnected_slow": self.disconnected_slow,
+            "flush_interval": self.flush_interval,
+            "queue_size": self.queue_size,
+            "overflow": self.overflow,
+            "connections": [c.stats() for c in self._clients],
+        }
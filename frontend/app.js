@@ -50,6 +50,20 @@
     }
   }
 
+  // 任务列表接口分页返回，沿 next_cursor 取完全部页
+  async function apiGetAllTasks() {
+    const tasks = [];
+    let cursor = null;
+    do {
+      const query = cursor ? `?limit=1000&cursor=${encodeURIComponent(cursor)}` : '?limit=1000';
+      const data = await apiGet(`/api/v1/tasks${query}`);
+      if (!data) return null;
+      tasks.push(...(data.tasks || []));
+      cursor = data.next_cursor;
+    } while (cursor);
+    return tasks;
+  }
+
   async function apiPost(path, body) {
     try {
       const res = await fetch(`${API_BASE}${path}`, {
@@ -112,11 +126,10 @@
   }
 
   async function refreshTasks() {
-    const data = await apiGet('/api/v1/tasks');
-    if (!data) return;
+    const list = await apiGetAllTasks();
+    if (!list) return;
 
-    const list = data.data || data.tasks || data || [];
-    tasksList = Array.isArray(list) ? list : [];
+    tasksList = list;
     renderTasks();
   }
 
@@ -388,27 +401,16 @@
       ws.onmessage = (event) => {
         try {
           const msg = JSON.parse(event.data);
-
-          // Event from event bus → add to live feed
-          if (msg.type === 'event' || msg.event_type) {
-            const eventType = msg.event_type || msg.type;
-            const data = msg.data || msg;
-            const stepInfo = data.step;
-            if (stepInfo) {
-              addLiveEvent('step', `${stepInfo.title}: ${stepInfo.status}`);
-            } else if (data.message || data.msg) {
-              addLiveEvent(eventType, data.message || data.msg);
-            }
-          } else if (msg.type === 'track') {
-            // Stream tracker event
-            const step = msg.step || msg;
-            if (step && step.title) {
-              addLiveEvent('track', `${step.title}: ${step.status || 'update'} [${step.progress || 0}%]`);
-            }
-          }
+          // 服务端把同一 flush 窗口内的多个事件合并为一帧
+          const msgs = msg.type === 'batch' ? msg.events : [msg];
+          let taskChanged = false;
+          msgs.forEach(m => {
+            handleWsMessage(m);
+            if (m.event_type && m.event_type.includes('task')) taskChanged = true;
+          });
 
           // Refresh on task-related events
-          if (msg.event_type && msg.event_type.includes('task')) {
+          if (taskChanged) {
             refreshTasks();
           }
         } catch (e) {
@@ -433,6 +435,26 @@
     }
   }
 
+  function handleWsMessage(msg) {
+    // Event from event bus → add to live feed
+    if (msg.type === 'event' || msg.event_type) {
+      const eventType = msg.event_type || msg.type;
+      const data = msg.data || msg;
+      const stepInfo = data.step;
+      if (stepInfo) {
+        addLiveEvent('step', `${stepInfo.title}: ${stepInfo.status}`);
+      } else if (data.message || data.msg) {
+        addLiveEvent(eventType, data.message || data.msg);
+      }
+    } else if (msg.type === 'track') {
+      // Stream tracker event
+      const step = msg.step || msg;
+      if (step && step.title) {
+        addLiveEvent('track', `${step.title}: ${step.status || 'update'} [${step.progress || 0}%]`);
+      }
+    }
+  }
+
   // ── Utilities ──
   function esc(str) {
     if (!str) return '';
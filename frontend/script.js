@@ -6,6 +6,8 @@
     const CONFIG = {
         API_BASE_URL: 'http://localhost:8000',
         MESSAGE_DURATION: 3000,
+        TASK_PAGE_SIZE: 50,
+        TASK_LIST_FIELDS: 'task_id,name,type,status,executor_agent_id,create_time,start_time,end_time',
         I18N: {
             nav: {
                 home: '首页',
@@ -193,10 +195,12 @@
             return this.request(`/agents/${agentId}/stop`, 'POST');
         },
         
-        // 获取任务列表
-        getTasks(status = null) {
-            const endpoint = status ? `/tasks?status=${status}` : '/tasks';
-            return this.request(endpoint);
+        // 获取任务列表（键集分页，cursor 为上一页返回的 next_cursor）
+        getTasks(status = null, cursor = null) {
+            const params = new URLSearchParams({ limit: CONFIG.TASK_PAGE_SIZE, fields: CONFIG.TASK_LIST_FIELDS });
+            if (status) params.set('status', status);
+            if (cursor) params.set('cursor', cursor);
+            return this.request(`/tasks?${params}`);
         },
         
         // 创建任务
@@ -596,6 +600,10 @@
     
     // 任务页面控制器
     const TasksController = {
+        // 已加载的任务与下一页游标
+        tasks: [],
+        nextCursor: null,
+        
         // 初始化任务页面
         async init() {
             this.bindEventListeners();
@@ -610,6 +618,12 @@
                 refreshTasksBtn.addEventListener('click', () => this.loadAndRenderTasks());
             }
             
+            // 加载更多按钮
+            const loadMoreBtn = document.getElementById('loadMoreTasks');
+            if (loadMoreBtn) {
+                loadMoreBtn.addEventListener('click', () => this.loadMoreTasks());
+            }
+            
             // 状态筛选下拉框
             const statusFilter = document.getElementById('statusFilter');
             if (statusFilter) {
@@ -633,7 +647,9 @@
                 const status = statusFilter ? statusFilter.value : null;
                 
                 const tasksData = await APIService.getTasks(status);
-                this.renderTasksTable(tasksData.tasks);
+                this.tasks = tasksData.tasks;
+                this.nextCursor = tasksData.next_cursor;
+                this.renderTasksTable(this.tasks);
                 
                 UIManager.hideLoading('refreshTasks', CONFIG.I18N.actions.refresh);
             } catch (error) {
@@ -643,8 +659,35 @@
             }
         },
         
+        // 按 next_cursor 追加下一页
+        async loadMoreTasks() {
+            if (!this.nextCursor) return;
+            try {
+                UIManager.showLoading('loadMoreTasks', '加载中...');
+                
+                const statusFilter = document.getElementById('statusFilter');
+                const status = statusFilter ? statusFilter.value : null;
+                
+                const tasksData = await APIService.getTasks(status, this.nextCursor);
+                this.tasks = this.tasks.concat(tasksData.tasks);
+                this.nextCursor = tasksData.next_cursor;
+                this.renderTasksTable(this.tasks);
+                
+                UIManager.hideLoading('loadMoreTasks', '加载更多');
+            } catch (error) {
+                console.error('加载更多任务失败:', error);
+                UIManager.showMessage('加载更多任务失败: ' + error.message, 'error');
+                UIManager.hideLoading('loadMoreTasks', '加载更多');
+            }
+        },
+        
         // 渲染任务表格
         renderTasksTable(tasks) {
+            const loadMoreBtn = document.getElementById('loadMoreTasks');
+            if (loadMoreBtn) {
+                loadMoreBtn.style.display = this.nextCursor ? '' : 'none';
+            }
+            
             const tableBody = document.getElementById('tasksTableBody');
             if (!tableBody) return;
             
@@ -211,6 +211,20 @@
     }
   }
 
+  // 任务列表接口分页返回，沿 next_cursor 取完全部页
+  async function apiGetAllTasks() {
+    const tasks = [];
+    let cursor = null;
+    do {
+      const query = cursor ? `?limit=1000&cursor=${encodeURIComponent(cursor)}` : '?limit=1000';
+      const data = await apiGet(`/api/v1/tasks${query}`);
+      if (!data) return null;
+      tasks.push(...(data.tasks || []));
+      cursor = data.next_cursor;
+    } while (cursor);
+    return tasks;
+  }
+
   async function apiPost(path, body) {
     try {
       const res = await fetch(`${API_BASE}${path}`, {
@@ -250,11 +264,10 @@
   }
 
   async function refreshTasks() {
-    const data = await apiGet('/api/v1/tasks');
-    if (!data) return;
+    const list = await apiGetAllTasks();
+    if (!list) return;
 
-    const list = data.data || data.tasks || data || [];
-    state.tasks = Array.isArray(list) ? list : [];
+    state.tasks = list;
     updateTaskBadge();
     updateStepTreeStatus();
     updateProgress();
@@ -76,7 +76,7 @@ async def init_agent_system_async() -> SystemContext:
     ))
 
     # 3. 初始化数据库
-    await init_db()
+    await init_db(config=config.database_config)
     _system_context.runtime = Runtime(config)
 
     # 4. 初始化安全模块
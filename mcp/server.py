@@ -31,6 +31,7 @@ logger = get_logger("mcp.server")
 
 JSONRPC_VERSION = "2.0"
 MCP_PROTOCOL_VERSION = "2024-11-05"
+TASK_LIST_MAX = 1000  # task_list 单次最多返回条数
 
 
 # ── 工具定义 ──
@@ -84,7 +85,7 @@ _TOOLS = [
     },
     {
         "name": "task_list",
-        "description": "列出 MCASys 中的所有任务，可按状态过滤。",
+        "description": "列出 MCASys 中的任务（按创建时间倒序），可按状态过滤。",
         "inputSchema": {
             "type": "object",
             "properties": {
@@ -92,6 +93,13 @@ _TOOLS = [
                     "type": "string",
                     "description": "按状态过滤：pending / running / completed / failed，为空则返回所有",
                 },
+                "limit": {
+                    "type": "integer",
+                    "description": "最多返回条数",
+                    "default": 100,
+                    "minimum": 1,
+                    "maximum": TASK_LIST_MAX,
+                },
             },
         },
     },
@@ -128,6 +136,7 @@ class MCPServer:
         self._running = False
         # 延迟导入，避免循环依赖
         self._app = None
+        self._db = None  # 独立运行时的任务数据库连接，首次使用时创建
 
     @property
     def app(self):
@@ -346,7 +355,10 @@ class MCPServer:
         return {"agents": list(all_states.values())}
 
     async def _tool_task_create(self, arguments: dict[str, Any]) -> dict[str, Any]:
-        """创建新任务"""
+        """创建新任务：写入任务数据库后发布 TASK_CREATED 事件"""
+        from core.models import TaskModel, TaskStatus
+        from core.repository import TaskRepository
+
         task_name = arguments.get("name", "")
         task_type = arguments.get("type", "data_process")
         task_params = arguments.get("params", {})
@@ -354,82 +366,97 @@ class MCPServer:
         import uuid
         task_id = f"task_{uuid.uuid4().hex[:12]}"
 
-        # 保存到 tasks.json
-        tasks_file = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            "data_storage",
-            "tasks.json",
+        task = TaskModel(
+            task_id=task_id,
+            name=task_name,
+            type=task_type,
+            params=task_params,
+            status=TaskStatus.PENDING,
+            executor_agent_id=arguments.get("executor_agent_id"),
         )
 
-        task = {
-            "task_id": task_id,
-            "name": task_name,
-            "type": task_type,
-            "params": task_params,
-            "status": "pending",
-            "create_time": datetime.now().isoformat(),
-            "executor_agent_id": arguments.get("executor_agent_id"),
-        }
+        db = await self._get_db()
+        async with db.session_factory() as session:
+            await TaskRepository(session).create(task)
 
+        logger.info("已创建任务: {name} ({task_id})", name=task_name, task_id=task_id)
+        await self._publish_task_created(task_id, task_type, task_name)
+        return {"task_id": task_id, "message": f"任务 '{task_name}' 已创建", "task": task.to_dict()}
+
+    async def _get_db(self):
+        """任务数据库：与 Agent 系统同进程时复用其连接，独立运行时按配置连接同一数据库"""
+        ctx = self._agent_context()
+        if ctx is not None:
+            return ctx.runtime.db_manager
+        if self._db is None:
+            import contextlib
+            from config.config import load_config
+            from core.database import init_db
+            # 首次运行时 load_config 会向 stdout 打印提示，stdout 是 JSON-RPC 通道
+            with contextlib.redirect_stdout(sys.stderr):
+                config = load_config()
+            self._db = await init_db(config=config.database_config)
+        return self._db
+
+    @staticmethod
+    def _agent_context():
+        """同进程运行的 Agent 系统上下文，独立运行时为 None"""
         try:
-            with open(tasks_file, "r", encoding="utf-8") as f:
-                tasks = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            tasks = {}
-
-        tasks[task_id] = task
+            from main import get_agent_context
+            return get_agent_context()
+        except (ImportError, RuntimeError):
+            return None
 
-        os.makedirs(os.path.dirname(tasks_file), exist_ok=True)
-        with open(tasks_file, "w", encoding="utf-8") as f:
-            json.dump(tasks, f, indent=2, ensure_ascii=False)
+    async def _publish_task_created(self, task_id: str, task_type: str, task_name: str) -> None:
+        """若与 Agent 系统同进程运行，发布 TASK_CREATED 事件唤醒调度器
 
-        logger.info("已创建任务: {name} ({task_id})", name=task_name, task_id=task_id)
-        return {"task_id": task_id, "message": f"任务 '{task_name}' 已创建", "task": task}
+        独立进程运行时（python -m mcp.server）没有可用的事件总线，任务已写入同一数据库，
+        由调度器的兜底扫描（scheduler_sweep_interval）发现。
+        """
+        ctx = self._agent_context()
+        if ctx is None:
+            return
+
+        from core.event_bus import Event, EventType
+        await ctx.runtime.event_bus.publish(Event(
+            event_id=f"evt_{task_id}_created",
+            event_type=EventType.TASK_CREATED,
+            source="mcp",
+            data={"task_id": task_id, "task_type": task_type, "task_name": task_name},
+        ))
 
     async def _tool_task_list(self, arguments: dict[str, Any]) -> dict[str, Any]:
-        """列出所有任务"""
-        status_filter = arguments.get("status")
-
-        tasks_file = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            "data_storage",
-            "tasks.json",
-        )
+        """列出任务（按创建时间倒序，最多 limit 条）"""
+        from core.models import TaskStatus
+        from core.repository import TaskRepository
 
+        status_filter = arguments.get("status")
         try:
-            with open(tasks_file, "r", encoding="utf-8") as f:
-                all_tasks = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {"tasks": [], "count": 0}
-
-        tasks_list = list(all_tasks.values())
-        if status_filter:
-            tasks_list = [t for t in tasks_list if t.get("status") == status_filter]
-
-        # 按创建时间降序排列
-        tasks_list.sort(key=lambda t: t.get("create_time", ""), reverse=True)
-
+            status = TaskStatus(status_filter) if status_filter else None
+        except ValueError:
+            return {"error": f"未知任务状态: {status_filter}"}
+        try:
+            limit = int(arguments.get("limit", 100))
+        except (TypeError, ValueError):
+            limit = 0
+        if not 1 <= limit <= TASK_LIST_MAX:
+            return {"error": f"limit 须为 1~{TASK_LIST_MAX} 的整数: {arguments.get('limit')}"}
+
+        db = await self._get_db()
+        async with db.session_factory() as session:
+            tasks_list, _ = await TaskRepository(session).list_page(limit=limit, status=status)
         return {"tasks": tasks_list, "count": len(tasks_list)}
 
     async def _tool_task_status(self, arguments: dict[str, Any]) -> dict[str, Any]:
         """查询任务状态"""
-        task_id = arguments.get("task_id", "")
+        from core.repository import TaskRepository
 
-        tasks_file = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            "data_storage",
-            "tasks.json",
-        )
-
-        try:
-            with open(tasks_file, "r", encoding="utf-8") as f:
-                all_tasks = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {"error": "没有找到任务数据"}
-
-        task = all_tasks.get(task_id)
+        task_id = arguments.get("task_id", "")
+        db = await self._get_db()
+        async with db.session_factory() as session:
+            task = await TaskRepository(session).get_by_id(task_id)
         if task:
-            return {"task": task}
+            return {"task": task.to_dict()}
         return {"error": f"未找到任务: {task_id}"}
 
 
@@ -1,10 +1,41 @@
+import asyncio
 import unittest
 
+from agents.specialized_agents.executor_agent import ExecutorAgent
+
 
 class MyTestCase(unittest.TestCase):
     def test_something(self):
         self.assertEqual(True, False)  # add assertion here
 
 
+class ExecutorAgentStateTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_state_follows_in_flight_tasks(self):
+        agent = ExecutorAgent("exec_test", capacity=4)
+        release = {"ok": asyncio.Event(), "bad": asyncio.Event()}
+
+        async def dispatch(task_type, params, task_id):
+            await release[task_id].wait()
+            if task_id == "bad":
+                raise RuntimeError("boom")
+            return {"code": 0}
+
+        agent._dispatch = dispatch
+        ok = asyncio.create_task(agent.execute_task({"task_id": "ok"}))
+        bad = asyncio.create_task(agent.execute_task({"task_id": "bad"}))
+        await asyncio.sleep(0)
+        self.assertEqual((agent.state.status, agent.state.load), ("running", 0.5))
+
+        # 一个任务失败时另一个仍在执行：Agent 不应变为 error 或空载
+        release["bad"].set()
+        self.assertEqual((await bad)["code"], -1)
+        self.assertEqual((agent.state.status, agent.state.load), ("running", 0.25))
+        self.assertEqual(agent.state.error_msg, "boom")
+
+        release["ok"].set()
+        self.assertEqual((await ok)["code"], 0)
+        self.assertEqual((agent.state.status, agent.state.load), ("idle", 0.0))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+API_KEY = "test-key"
+HEADERS = {"Authorization": f"Bearer {API_KEY}"}
+
+_tmp = tempfile.TemporaryDirectory()
+_env = mock.patch.dict(os.environ, {
+    "MCASYS_DB_URL": f"sqlite:///{os.path.join(_tmp.name, 'api.db')}",
+    "MCASYS_API_KEY": API_KEY,
+    "MCASYS_LOG_LEVEL": "WARNING",
+    "MCASYS_EVENT_JOURNAL": "true",
+    "MCASYS_EVENT_JOURNAL_DIR": os.path.join(_tmp.name, "events"),
+    "MCASYS_EVENT_JOURNAL_FSYNC": "false",
+})
+
+
+def setUpModule():
+    # app 在导入时读取配置，须先设置环境变量
+    _env.start()
+    global appmod, TestClient
+    import app as appmod
+    from fastapi.testclient import TestClient
+
+
+def tearDownModule():
+    _env.stop()
+    _tmp.cleanup()
+
+
+class ApiTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._client_cm = TestClient(appmod.app)
+        cls.client = cls._client_cm.__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._client_cm.__exit__(None, None, None)
+
+    def url(self, path: str) -> str:
+        return f"{appmod.API_PREFIX}{path}"
+
+
+class TaskListApiTestCase(ApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.created = set()
+        for i in range(7):
+            resp = cls.client.post(f"{appmod.API_PREFIX}/tasks", headers=HEADERS,
+                                   json={"name": f"page-{i}", "type": "analysis"})
+            cls.created.add(resp.json()["task"]["task_id"])
+
+    def test_cursor_pages_through_all_tasks(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, "fields": "task_id,name"}
+            if cursor:
+                params["cursor"] = cursor
+            body = self.client.get(self.url("/tasks"), headers=HEADERS, params=params).json()
+            self.assertLessEqual(body["count"], 3)
+            self.assertGreaterEqual(body["total"], len(self.created))
+            self.assertTrue(all(set(t) == {"task_id", "name", "create_time"} for t in body["tasks"]))
+            seen += [t["task_id"] for t in body["tasks"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertTrue(self.created <= set(seen))
+
+    def test_total_counts_all_matching_tasks(self):
+        body = self.client.get(self.url("/tasks"), headers=HEADERS, params={"limit": 2, "fields": "task_id"}).json()
+        self.assertEqual(body["count"], 2)
+        self.assertGreaterEqual(body["total"], len(self.created))
+        body = self.client.get(self.url("/tasks"), headers=HEADERS,
+                               params={"limit": 2, "type": "no_such_type"}).json()
+        self.assertEqual((body["count"], body["total"]), (0, 0))
+
+    def test_invalid_cursor_and_fields(self):
+        resp = self.client.get(self.url("/tasks"), headers=HEADERS, params={"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get(self.url("/tasks"), headers=HEADERS, params={"fields": "task_id,secret"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_requires_api_key(self):
+        resp = self.client.get(self.url("/tasks"), headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(resp.status_code, 401)
+
+
+class BulkCreateApiTestCase(ApiTestCase):
+    def test_json_array_creates_all_tasks(self):
+        tasks = [{"name": f"bulk-{i}", "type": "analysis", "priority": i % 3} for i in range(5)]
+        resp = self.client.post(self.url("/tasks/bulk"), headers=HEADERS, json=tasks)
+        self.assertEqual(resp.status_code, 201)
+        body = resp.json()
+        self.assertEqual(body["count"], 5)
+        self.assertEqual(len(set(body["task_ids"])), 5)
+        for task_id, spec in zip(body["task_ids"], tasks):
+            task = self.client.get(self.url(f"/tasks/{task_id}"), headers=HEADERS).json()
+            self.assertEqual((task["name"], task["type"], task["priority"]),
+                             (spec["name"], spec["type"], spec["priority"]))
+            self.assertEqual(task["max_retries"], 3)
+
+    def test_ndjson_body(self):
+        lines = [json.dumps({"name": f"nd-{i}", "type": "data_process"}) for i in range(3)]
+        resp = self.client.post(self.url("/tasks/bulk"), content="\n".join(lines) + "\n\n",
+                                headers={**HEADERS, "Content-Type": "application/x-ndjson"})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()["count"], 3)
+
+    def test_rejects_empty_and_invalid_items(self):
+        resp = self.client.post(self.url("/tasks/bulk"), headers=HEADERS, json=[])
+        self.assertEqual(resp.status_code, 422)
+
+        tasks = [{"name": "ok", "type": "analysis"}, {"name": "bad", "type": "no_such_type"}]
+        resp = self.client.post(self.url("/tasks/bulk"), headers=HEADERS, json=tasks)
+        self.assertEqual(resp.status_code, 422)
+        self.assertIn("第 2 条", resp.json()["error"])
+
+        lines = [json.dumps({"name": "ok", "type": "analysis"}), json.dumps({"type": "analysis"})]
+        resp = self.client.post(self.url("/tasks/bulk"), content="\n".join(lines),
+                                headers={**HEADERS, "Content-Type": "application/x-ndjson"})
+        self.assertEqual(resp.status_code, 422)
+        self.assertIn("第 2 条", resp.json()["error"])
+
+        resp = self.client.post(self.url("/tasks/bulk"), content="[{", headers={**HEADERS, "Content-Type": "application/json"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_rejects_batches_over_limit(self):
+        tasks = [{"name": f"big-{i}", "type": "analysis"} for i in range(4)]
+        with mock.patch.object(appmod, "TASK_BULK_MAX", 3):
+            resp = self.client.post(self.url("/tasks/bulk"), headers=HEADERS, json=tasks)
+            self.assertEqual(resp.status_code, 413)
+            resp = self.client.post(self.url("/tasks/bulk"), content="\n".join(json.dumps(t) for t in tasks),
+                                    headers={**HEADERS, "Content-Type": "application/x-ndjson"})
+            self.assertEqual(resp.status_code, 413)
+            resp = self.client.post(self.url("/tasks/bulk"), headers=HEADERS, json=tasks[:3])
+            self.assertEqual(resp.status_code, 201)
+
+    def test_requires_api_key(self):
+        resp = self.client.post(self.url("/tasks/bulk"), json=[{"name": "x", "type": "analysis"}])
+        self.assertEqual(resp.status_code, 401)
+
+
+class RecentEventsApiTestCase(ApiTestCase):
+    def test_journal_fallback_returns_latest_events(self):
+        for i in range(6):
+            self.client.post(self.url("/tasks"), headers=HEADERS, json={"name": f"recent-{i}", "type": "analysis"})
+        params = {"event_type": "task_created", "limit": 3, "since": "2000-01-01T00:00:00"}
+        from_history = self.client.get(self.url("/system/events"), headers=HEADERS, params=params).json()["events"]
+        # 内存历史不覆盖 since 时改从事件日志读取，结果应一致（最近 3 条）
+        with mock.patch.object(appmod.get_agent_context().runtime.event_bus, "history_covers", return_value=False):
+            from_journal = self.client.get(self.url("/system/events"), headers=HEADERS, params=params).json()["events"]
+        self.assertEqual(len(from_history), 3)
+        self.assertEqual([e["event_id"] for e in from_journal], [e["event_id"] for e in from_history])
+
+
+class WebSocketReplayTestCase(ApiTestCase):
+    def test_replay_pages_through_journal_before_going_live(self):
+        created = [
+            self.client.post(self.url("/tasks"), headers=HEADERS, json={"name": f"ws-{i}", "type": "analysis"})
+            .json()["task"]["task_id"]
+            for i in range(12)
+        ]
+        received = []
+        with mock.patch.object(appmod, "WS_REPLAY_PAGE", 5):
+            with self.client.websocket_connect("/ws/events?since_offset=-1&event_types=task_created") as ws:
+                while True:
+                    frame = json.loads(ws.receive_text())
+                    if frame["type"] == "replay_complete":
+                        break
+                    received += frame["events"] if frame["type"] == "batch" else [frame]
+        task_ids = [e["data"]["task_id"] for e in received if "task_id" in e["data"]]
+        self.assertTrue(set(created) <= set(task_ids))
+        offsets = [e["offset"] for e in received]
+        self.assertEqual(offsets, sorted(set(offsets)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from collaboration.communication import CommunicationManager, DeliveredIndex, Message, MessageQueue, MessageSpill
+
+
+def make_message(i: int, receiver_id: str = "agent_1") -> Message:
+    return Message(message_id=f"msg_{i}", sender_id="sender", receiver_id=receiver_id,
+                   message_type="test", content={"i": i})
+
+
+class MessageSpillTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "messages.db")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    async def test_evicted_records_are_queryable_after_flush(self):
+        spill = MessageSpill(self.db_path, flush_interval=0.01)
+        queue = MessageQueue(delivered_max=2, delivered_ttl=0, spill=spill)
+        for i in range(5):
+            queue.send_message(make_message(i))
+            queue.get_message("agent_1")
+        self.assertEqual(await queue.get_delivered("msg_4"), queue.delivered_messages["msg_4"].to_dict())
+        row = await queue.get_delivered("msg_0")
+        self.assertEqual((row["message_id"], row["status"]), ("msg_0", "delivered"))
+        self.assertEqual(spill.spilled, 3)
+        await asyncio.to_thread(spill.close)
+
+    async def test_full_queue_drops_without_blocking(self):
+        spill = MessageSpill(self.db_path, max_pending=1)
+        # 停掉写入线程，队列不再被消费
+        await asyncio.to_thread(spill.close)
+        index = DeliveredIndex(max_entries=1, ttl=0, spill=spill)
+        for i in range(4):
+            index.add(make_message(i))
+        self.assertEqual(index.evicted, 3)
+        self.assertEqual(spill.dropped, 2)
+        self.assertEqual(index.stats()["spill_dropped"], 2)
+
+
+class MessageQueueTestCase(unittest.TestCase):
+    def test_pending_count_does_not_register_unknown_receiver(self):
+        queue = MessageQueue()
+        queue.add_receiver("reader")
+        queue.broadcast_message("sender", "test", {})
+        self.assertEqual(queue.get_pending_messages_count("ghost"), 0)
+        self.assertEqual(queue.get_pending_messages_count("reader"), 1)
+        self.assertIsNone(queue.get_message("ghost"))
+        self.assertNotIn("ghost", queue._receivers)
+
+        # 查询过的未知 id 不应卡住广播日志回收
+        for i in range(MessageQueue._TRIM_THRESHOLD * 2):
+            queue.broadcast_message("sender", "test", {"i": i})
+            queue.get_pending_messages_count("ghost")
+        while queue.get_message("reader") is not None:
+            pass
+        self.assertEqual(queue.unread_broadcast_count, 0)
+        self.assertLess(len(queue._broadcasts[0].items), MessageQueue._TRIM_THRESHOLD)
+
+    def test_requeue_to_removed_receiver_is_dropped(self):
+        queue = MessageQueue()
+        queue.send_message(make_message(1))
+        message = queue.get_message("agent_1")
+        queue.remove_receiver("agent_1")
+        self.assertFalse(queue.requeue("agent_1", message))
+        self.assertNotIn("agent_1", queue._receivers)
+        self.assertEqual(queue.pending_direct_count, 0)
+
+
+class CommunicationManagerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_runtime_wires_spill_from_config(self):
+        from config.config import AgentConfig, AppConfig
+        from core.runtime import Runtime
+        with tempfile.TemporaryDirectory() as tmp:
+            agent = AgentConfig(message_delivered_max=2, message_delivered_ttl=0,
+                                message_spill_path=os.path.join(tmp, "messages.db"))
+            manager = Runtime(AppConfig(agent_config=agent)).communication
+            index = manager.message_queue.delivered_messages
+            self.assertEqual((index.max_entries, index.ttl), (2, 0))
+            self.assertIsNotNone(index.spill)
+            await asyncio.to_thread(index.spill.close)
+        self.assertIsNone(Runtime(AppConfig()).communication.message_queue.delivered_messages.spill)
+
+    async def test_registered_handler_receives_after_start(self):
+        manager = CommunicationManager()
+        received = asyncio.Queue()
+        manager.register_agent_handler("agent_1", received.put_nowait)
+        await manager.start()
+        manager.send_message(make_message(1))
+        message = await asyncio.wait_for(received.get(), 1)
+        self.assertEqual(message.message_id, "msg_1")
+        await manager.stop()
+        self.assertFalse(manager.get_communication_stats()["running"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from config.config import DatabaseConfig
+from core.database import Base, DatabaseManager, engine_options, install_sqlite_pragmas, resolve_database_url, sqlite_pragmas
+from core.models import TaskStatus
+from core.repository import TaskRepository
+
+try:
+    import asyncpg  # noqa: F401
+except ImportError:
+    asyncpg = None
+
+# 指向一个可随意建表删表的 PostgreSQL 库，如 postgresql://postgres@localhost/mcasys_test
+PG_URL = os.environ.get("MCASYS_TEST_PG_URL")
+
+
+class DatabaseUrlTestCase(unittest.TestCase):
+    def test_sync_postgres_urls_get_asyncpg_driver(self):
+        for raw in ("postgresql://u:p@db/mcasys", "postgres://u:p@db/mcasys"):
+            url = resolve_database_url(DatabaseConfig(url=raw))
+            self.assertEqual(url.drivername, "postgresql+asyncpg")
+            self.assertEqual((url.host, url.database), ("db", "mcasys"))
+
+    def test_explicit_driver_and_db_path(self):
+        url = resolve_database_url(DatabaseConfig(url="postgresql+psycopg://u@db/x"))
+        self.assertEqual(url.drivername, "postgresql+psycopg")
+        url = resolve_database_url(DatabaseConfig(url="postgresql://u@db/x"), db_path="/tmp/override.db")
+        self.assertEqual(url.drivername, "sqlite+aiosqlite")
+        self.assertEqual(url.database, "/tmp/override.db")
+
+    def test_engine_options_pooling(self):
+        config = DatabaseConfig(pool_size=7, max_overflow=3)
+        pg = engine_options(resolve_database_url(DatabaseConfig(url="postgresql://u@db/x")), config)
+        self.assertEqual((pg["pool_size"], pg["max_overflow"]), (7, 3))
+        self.assertNotIn("connect_args", pg)
+        memory = engine_options(resolve_database_url(DatabaseConfig(), db_path=":memory:"), config)
+        self.assertNotIn("pool_size", memory)
+        self.assertEqual(memory["connect_args"], {"check_same_thread": False})
+
+    def test_pre_ping_defaults_to_network_backends(self):
+        pg_url = resolve_database_url(DatabaseConfig(url="postgresql://u@db/x"))
+        sqlite_url = resolve_database_url(DatabaseConfig(), db_path="/tmp/x.db")
+        self.assertTrue(engine_options(pg_url, DatabaseConfig())["pool_pre_ping"])
+        self.assertFalse(engine_options(sqlite_url, DatabaseConfig())["pool_pre_ping"])
+        self.assertTrue(engine_options(sqlite_url, DatabaseConfig(pool_pre_ping=True))["pool_pre_ping"])
+        self.assertFalse(engine_options(pg_url, DatabaseConfig(pool_pre_ping=False))["pool_pre_ping"])
+
+
+class SqlitePragmaTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    async def _pragmas(self, config: DatabaseConfig) -> dict:
+        url = resolve_database_url(config, db_path=os.path.join(self._tmp.name, "tuned.db"))
+        engine = create_async_engine(url, **engine_options(url, config))
+        install_sqlite_pragmas(engine, config)
+        try:
+            values = {}
+            # 两个连接都应用了配置（每个新连接建立时执行）
+            async with engine.connect() as first, engine.connect() as second:
+                for conn in (first, second):
+                    for name in ("journal_mode", "synchronous", "busy_timeout", "temp_store", "cache_size", "mmap_size"):
+                        values.setdefault(name, set()).add((await conn.execute(text(f"PRAGMA {name}"))).scalar())
+            return {name: value.pop() if len(value) == 1 else value for name, value in values.items()}
+        finally:
+            await engine.dispose()
+
+    async def test_profile_applied_on_every_connection(self):
+        config = DatabaseConfig(sqlite_busy_timeout=1234, sqlite_mmap_size=1 << 20, sqlite_cache_size=-2048)
+        values = await self._pragmas(config)
+        self.assertEqual(values["journal_mode"], "wal")
+        self.assertEqual(values["synchronous"], 1)  # NORMAL
+        self.assertEqual(values["busy_timeout"], 1234)
+        self.assertEqual(values["temp_store"], 2)  # MEMORY
+        self.assertEqual(values["cache_size"], -2048)
+        self.assertEqual(values["mmap_size"], 1 << 20)
+
+    async def test_tuning_disabled_keeps_sqlite_defaults(self):
+        values = await self._pragmas(DatabaseConfig(sqlite_tuning=False))
+        self.assertEqual(values["journal_mode"], "delete")
+        self.assertEqual(values["synchronous"], 2)  # FULL
+
+    def test_invalid_choice_rejected(self):
+        with self.assertRaises(ValueError):
+            sqlite_pragmas(DatabaseConfig(sqlite_synchronous="SOMETIMES"))
+
+
+@unittest.skipUnless(PG_URL and asyncpg, "需要 asyncpg 与 MCASYS_TEST_PG_URL 指向的 PostgreSQL")
+class PostgresClaimTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        config = DatabaseConfig(url=PG_URL)
+        url = resolve_database_url(config)
+        self.engine = create_async_engine(url, **engine_options(url, config))
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(DatabaseManager._migrate)
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        base = datetime.now() - timedelta(minutes=1)
+        rows = [
+            {
+                "task_id": f"task_{i:03d}",
+                "name": f"n{i}",
+                "type": "analysis" if i % 2 else "data_process",
+                "params": {},
+                "status": TaskStatus.PENDING,
+                "priority": i % 3,
+                "max_retries": 3,
+                "retry_count": 0,
+                "create_time": base + timedelta(seconds=i),
+            }
+            for i in range(40)
+        ]
+        async with self.session_factory() as session:
+            await TaskRepository(session).create_many(rows)
+
+    async def asyncTearDown(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.execute(text("DROP TYPE IF EXISTS task_status_enum"))
+            await conn.execute(text("DROP TYPE IF EXISTS agent_status_enum"))
+        await self.engine.dispose()
+
+    async def _claim(self, agent_id: str, n: int):
+        async with self.session_factory() as session:
+            return await TaskRepository(session).claim_batch(
+                n, {"executor": [agent_id] * n}, {"analysis": "executor"}, default_agent_type="executor",
+            )
+
+    async def test_claim_batch_orders_by_priority_and_assigns_slots(self):
+        claimed = await self._claim("e1", 5)
+        self.assertEqual(len(claimed), 5)
+        self.assertTrue(all(t.status == TaskStatus.RUNNING and t.executor_agent_id == "e1" for t in claimed))
+        self.assertEqual([t.priority for t in claimed], [2] * 5)
+
+    async def test_concurrent_claims_never_overlap(self):
+        batches = await asyncio.gather(*(self._claim(f"e{i}", 6) for i in range(8)))
+        ids = [t.task_id for batch in batches for t in batch]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+import asyncio
+import itertools
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from config.config import EventBusConfig
+from core.event_bus import Event, EventBus, EventHistory, EventType, FifoEventQueue, PriorityEventQueue
+
+_ids = itertools.count()
+
+
+def make_event(event_type: EventType = EventType.TASK_CREATED, priority: int = 0, event_id: str = None,
+               **kwargs) -> Event:
+    return Event(event_id=event_id or f"evt_{next(_ids)}", event_type=event_type, source="test",
+                 priority=priority, **kwargs)
+
+
+class EventBusTestCase(unittest.IsolatedAsyncioTestCase):
+    config = EventBusConfig()
+
+    async def asyncSetUp(self):
+        self.bus = EventBus(self.config)
+
+    async def asyncTearDown(self):
+        await self.bus.stop()
+
+    async def drain(self, timeout: float = 2.0):
+        """等待分发循环与所有信箱处理完积压"""
+        async def idle():
+            while self.bus.get_stats()["queue_depth"] or any(
+                    st["depth"] or st["waiting"] for st in self.bus.get_stats()["subscribers"]):
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(idle(), timeout)
+
+
+class PriorityAgingTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch("core.event_bus.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def drain(self, queue):
+        return [(await queue.get()).event_id for _ in range(len(queue))]
+
+    async def test_higher_priority_first_fifo_within_level(self):
+        queue = PriorityEventQueue(aging_seconds=0)
+        for event_id, priority in [("low1", 0), ("urgent", 2), ("low2", 0), ("high", 1)]:
+            queue.put_nowait(make_event(priority=priority, event_id=event_id))
+        self.assertEqual(queue.depths(), {0: 2, 1: 1, 2: 1})
+        self.assertEqual(await self.drain(queue), ["urgent", "high", "low1", "low2"])
+        self.assertEqual(queue.aged, 0)
+
+    async def test_starved_low_priority_ages_past_urgent_traffic(self):
+        queue = PriorityEventQueue(aging_seconds=1.0)
+        queue.put_nowait(make_event(priority=0, event_id="low"))
+        served = []
+        # 持续的紧急事件流：每 0.5s 到达并立即分发一条
+        for i in range(6):
+            self.now += 0.5
+            queue.put_nowait(make_event(priority=2, event_id=f"urgent{i}"))
+            served.append((await queue.get()).event_id)
+        # 低优先级等待 >= 2s 后有效优先级与紧急事件持平，按 (有效优先级, 原优先级) 仍让出；>= 3s 后先于紧急事件
+        self.assertIn("low", served)
+        self.assertEqual(served.index("low"), 5)
+        self.assertEqual(queue.aged, 1)
+        self.assertEqual(queue.dispatched[0], 1)
+
+    async def test_low_priority_backlog_does_not_preempt_fresh_urgent(self):
+        queue = PriorityEventQueue(aging_seconds=1.0)
+        for i in range(3):
+            queue.put_nowait(make_event(priority=0, event_id=f"low{i}"))
+        self.now += 0.5
+        queue.put_nowait(make_event(priority=2, event_id="urgent"))
+        self.assertEqual((await queue.get()).event_id, "urgent")
+
+    async def test_fifo_mode_keeps_publish_order(self):
+        bus = EventBus(EventBusConfig(dispatch_mode="fifo"))
+        self.assertIsInstance(bus._queue, FifoEventQueue)
+        events = [make_event(priority=i % 3) for i in range(6)]
+        for event in events:
+            await bus.publish(event)
+        self.assertEqual(await self.drain(bus._queue), [e.event_id for e in events])
+
+
+class KeyedRoutingTestCase(EventBusTestCase):
+    async def test_targeted_event_reaches_only_its_target(self):
+        received = {"a1": [], "a2": [], "any": [], "all": []}
+        self.bus.subscribe(EventType.MESSAGE_RECEIVED, lambda e: received["a1"].append(e.event_id), target="a1")
+        self.bus.subscribe(EventType.MESSAGE_RECEIVED, lambda e: received["a2"].append(e.event_id), target="a2")
+        self.bus.subscribe(EventType.MESSAGE_RECEIVED, lambda e: received["any"].append(e.event_id))
+        self.bus.subscribe_all(lambda e: received["all"].append(e.event_id))
+        await self.bus.start()
+
+        await self.bus.publish(make_event(EventType.MESSAGE_RECEIVED, event_id="to_a1", target="a1"))
+        await self.bus.publish(make_event(EventType.MESSAGE_RECEIVED, event_id="broadcast"))
+        await self.bus.publish(make_event(EventType.MESSAGE_RECEIVED, event_id="to_a3", target="a3"))
+        await self.bus.publish(make_event(EventType.MESSAGE_RECEIVED, event_id="internal", target="a2"),
+                               internal=True)
+        await self.drain()
+
+        self.assertEqual(received["a1"], ["to_a1"])
+        self.assertEqual(received["a2"], ["internal"])
+        self.assertEqual(received["any"], ["to_a1", "broadcast", "to_a3", "internal"])
+        self.assertEqual(received["all"], ["to_a1", "broadcast", "to_a3"])
+
+    async def test_callback_subscribed_keyed_and_unkeyed_receives_once(self):
+        received = []
+        callback = received.append
+        self.bus.subscribe(EventType.MESSAGE_RECEIVED, callback)
+        self.bus.subscribe(EventType.MESSAGE_RECEIVED, callback, target="a1")
+        self.bus.subscribe_all(callback)
+        await self.bus.start()
+
+        event = make_event(EventType.MESSAGE_RECEIVED, target="a1")
+        await self.bus.publish(event)
+        await self.drain()
+        self.assertEqual(received, [event])
+
+    async def test_unsubscribe_keyed_keeps_shared_mailbox(self):
+        received = []
+        callback = received.append
+        self.bus.subscribe(EventType.MESSAGE_RECEIVED, callback)
+        self.bus.subscribe(EventType.MESSAGE_RECEIVED, callback, target="a1")
+        self.bus.unsubscribe(EventType.MESSAGE_RECEIVED, callback, target="a1")
+        self.assertNotIn((EventType.MESSAGE_RECEIVED, "a1"), self.bus._keyed_subscribers)
+        await self.bus.start()
+
+        await self.bus.publish(make_event(EventType.MESSAGE_RECEIVED, target="a1"))
+        await self.drain()
+        self.assertEqual(len(received), 1)
+        self.bus.unsubscribe(EventType.MESSAGE_RECEIVED, callback)
+        self.assertEqual(self.bus._mailboxes, {})
+
+
+class MailboxOverflowTestCase(EventBusTestCase):
+    config = EventBusConfig(subscriber_mailbox_size=2)
+
+    def test_default_overflow_is_block(self):
+        self.assertEqual(EventBusConfig().subscriber_overflow, "block")
+
+    async def test_block_stalls_only_the_slow_subscriber(self):
+        release = asyncio.Event()
+        slow, fast = [], []
+
+        async def slow_handler(event):
+            await release.wait()
+            slow.append(event.event_id)
+
+        self.bus.subscribe(EventType.TASK_CREATED, slow_handler)
+        self.bus.subscribe(EventType.TASK_CREATED, lambda e: fast.append(e.event_id))
+        await self.bus.start()
+        events = [make_event() for _ in range(10)]
+        for event in events:
+            await self.bus.publish(event)
+
+        expected = [e.event_id for e in events]
+        await asyncio.wait_for(self._until(lambda: len(fast) == 10), 1)
+        self.assertEqual(fast, expected)
+        self.assertEqual(slow, [])
+        stats = {st["name"]: st for st in self.bus.get_stats()["subscribers"]}
+        slow_stats = next(st for name, st in stats.items() if "slow_handler" in name)
+        self.assertLessEqual(slow_stats["depth"], 2)
+        self.assertGreater(slow_stats["waiting"], 0)
+
+        release.set()
+        await self.drain()
+        self.assertEqual(slow, expected)
+        self.assertEqual(slow_stats["dropped"], 0)
+
+    async def test_drop_oldest_and_coalesce_are_opt_in(self):
+        dropped, coalesced = [], []
+        self.bus.subscribe(EventType.TASK_CREATED, lambda e: dropped.append(e.event_id), overflow="drop_oldest")
+        self.bus.subscribe(EventType.AGENT_HEARTBEAT, lambda e: coalesced.append(e.data["v"]), overflow="coalesce")
+
+        # 总线启动前信箱 worker 未运行，直接投递即可确定性地填满信箱
+        events = [make_event() for _ in range(6)]
+        for event in events:
+            await self.bus._dispatch(event)
+        for v in range(6):
+            await self.bus._dispatch(make_event(EventType.AGENT_HEARTBEAT, event_id="hb_agent_1", data={"v": v}))
+        await self.bus.start()
+        await self.drain()
+
+        self.assertEqual(dropped, [e.event_id for e in events[-2:]])
+        self.assertEqual(coalesced, [0, 5])
+        stats = {st["overflow"]: st for st in self.bus.get_stats()["subscribers"]}
+        self.assertEqual(stats["drop_oldest"]["dropped"], 4)
+        self.assertEqual(stats["coalesce"]["coalesced"], 4)
+
+    async def test_unknown_overflow_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            self.bus.subscribe(EventType.TASK_CREATED, lambda e: None, overflow="spill")
+
+    @staticmethod
+    async def _until(predicate):
+        while not predicate():
+            await asyncio.sleep(0.005)
+
+
+
+class EventHistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.t0 = datetime(2026, 1, 1, 12, 0, 0)
+
+    def fill(self, history, n: int, start: int = 0):
+        events = []
+        for i in range(start, start + n):
+            event_type = EventType.TASK_CREATED if i % 2 == 0 else EventType.TASK_COMPLETED
+            event = make_event(event_type, event_id=f"e{i}", timestamp=self.t0 + timedelta(seconds=i))
+            history.append(event)
+            events.append(event)
+        return events
+
+    @staticmethod
+    def ids(events):
+        return [e.event_id for e in events]
+
+    def test_overwrites_oldest_when_full(self):
+        history = EventHistory(capacity=5)
+        self.fill(history, 12)
+        self.assertEqual(len(history), 5)
+        self.assertEqual(self.ids(history.query()), ["e7", "e8", "e9", "e10", "e11"])
+        self.assertEqual(self.ids(history.query(limit=2)), ["e10", "e11"])
+        self.assertEqual(history.query(limit=0), [])
+
+    def test_type_index_follows_eviction(self):
+        history = EventHistory(capacity=5)
+        self.fill(history, 12)
+        self.assertEqual(self.ids(history.query(EventType.TASK_CREATED)), ["e8", "e10"])
+        self.assertEqual(self.ids(history.query(EventType.TASK_COMPLETED, limit=1)), ["e11"])
+        self.assertEqual(history.query(EventType.AGENT_ERROR), [])
+
+    def test_time_range_is_half_open(self):
+        history = EventHistory(capacity=100)
+        self.fill(history, 10)
+        since, until = self.t0 + timedelta(seconds=3), self.t0 + timedelta(seconds=7)
+        self.assertEqual(self.ids(history.query(since=since, until=until)), ["e3", "e4", "e5", "e6"])
+        self.assertEqual(self.ids(history.query(EventType.TASK_CREATED, since=since, until=until)), ["e4", "e6"])
+        # limit 取时间窗口内最近的 N 条
+        self.assertEqual(self.ids(history.query(since=since, until=until, limit=2)), ["e5", "e6"])
+
+    def test_out_of_order_timestamps_stay_searchable(self):
+        history = EventHistory(capacity=10)
+        history.append(make_event(event_id="a", timestamp=self.t0 + timedelta(seconds=5)))
+        history.append(make_event(event_id="b", timestamp=self.t0 + timedelta(seconds=2)))  # 晚发布、时间戳更早
+        history.append(make_event(event_id="c", timestamp=self.t0 + timedelta(seconds=6)))
+        self.assertEqual(self.ids(history.query(since=self.t0 + timedelta(seconds=5))), ["a", "b", "c"])
+        self.assertEqual(self.ids(history.query(until=self.t0 + timedelta(seconds=6))), ["a", "b"])
+
+    def test_type_index_compacts_after_many_evictions(self):
+        history = EventHistory(capacity=3)
+        self.fill(history, 1000)
+        index = history._by_type[EventType.TASK_CREATED]
+        self.assertLessEqual(len(index._items), 200)
+        self.assertEqual(self.ids(history.query(EventType.TASK_CREATED)), ["e998"])
+
+    def test_bus_history_skips_internal_events_and_reports_coverage(self):
+        bus = EventBus(EventBusConfig(history_capacity=3))
+        self.assertTrue(bus.history_covers(self.t0))
+        for event in self.fill(EventHistory(), 5):
+            bus.publish_sync(event)
+        bus.publish_sync(make_event(EventType.RPC_REQUEST), internal=True)
+        self.assertEqual(self.ids(bus.get_history()), ["e2", "e3", "e4"])
+        self.assertTrue(bus.history_covers(self.t0 + timedelta(seconds=3)))
+        self.assertFalse(bus.history_covers(self.t0 + timedelta(seconds=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
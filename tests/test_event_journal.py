@@ -0,0 +1,157 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from core.event_bus import Event, EventType
+from core.event_journal import EventJournal
+
+
+def make_event(i: int) -> Event:
+    return Event(event_id=f"evt_{i}", event_type=EventType.TASK_CREATED, source="test", data={"i": i})
+
+
+class EventJournalTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def journal(self, **kwargs) -> EventJournal:
+        kwargs.setdefault("flush_interval", 0.001)
+        kwargs.setdefault("fsync", False)
+        return EventJournal(self.directory, **kwargs)
+
+    async def test_replay_since_offset_and_limit(self):
+        journal = self.journal()
+        await journal.start()
+        for i in range(10):
+            journal.append(make_event(i))
+        # 未落盘的记录也能回放
+        self.assertEqual([e.data["i"] for e in journal.replay(since=6)], [7, 8, 9])
+        await journal.stop()
+        self.assertEqual([e.offset for e in journal.replay(since=3, limit=2)], [4, 5])
+        self.assertEqual(len(journal.replay()), 10)
+        self.assertEqual(journal.stats()["written"], 10)
+
+    async def test_replay_latest_reads_newest_segments_first(self):
+        journal = self.journal(segment_bytes=200)
+        await journal.start()
+        events = [make_event(i) for i in range(20)]
+        for event in events[:15]:
+            journal.append(event)
+        await journal.stop()
+        await journal.start()
+        for event in events[15:]:
+            journal.append(event)  # 部分记录尚未落盘
+        since = events[3].timestamp
+        self.assertEqual([e.data["i"] for e in journal.replay(since, limit=4, latest=True)], [16, 17, 18, 19])
+        self.assertEqual([e.data["i"] for e in journal.replay(since, limit=4)], [3, 4, 5, 6])
+        self.assertEqual([e.data["i"] for e in journal.replay(since=10, limit=3, latest=True)], [17, 18, 19])
+        await journal.stop()
+        self.assertEqual(len(journal.replay(since, latest=True)), 17)
+
+    async def test_restart_continues_offsets(self):
+        journal = self.journal(segment_bytes=200)
+        await journal.start()
+        for i in range(20):
+            journal.append(make_event(i))
+        await journal.stop()
+        self.assertGreater(journal.stats()["segments"], 1)
+
+        reopened = self.journal(segment_bytes=200)
+        self.assertEqual(reopened.next_offset, 20)
+        await reopened.start()
+        reopened.append(make_event(20))
+        await reopened.stop()
+        self.assertEqual([e.offset for e in reopened.replay()], list(range(21)))
+        self.assertEqual([e.data["i"] for e in reopened.tail(3)], [18, 19, 20])
+
+    async def test_restart_truncates_partial_record(self):
+        journal = self.journal()
+        await journal.start()
+        for i in range(3):
+            journal.append(make_event(i))
+        await journal.stop()
+        _, path = journal._segments()[-1]
+        with open(path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00garbage")
+
+        reopened = self.journal()
+        self.assertEqual(reopened.next_offset, 3)
+        self.assertEqual(len(reopened.replay()), 3)
+
+    async def test_stop_waits_for_inflight_write(self):
+        journal = self.journal()
+        write_batch = journal._write_batch
+        writers = 0
+        peak = 0
+        entered = threading.Event()
+
+        def slow_write(batch):
+            nonlocal writers, peak
+            writers += 1
+            peak = max(peak, writers)
+            entered.set()
+            time.sleep(0.2)
+            try:
+                write_batch(batch)
+            finally:
+                writers -= 1
+
+        journal._write_batch = slow_write
+        await journal.start()
+        journal.append(make_event(0))
+        await asyncio.to_thread(entered.wait, 5)
+        journal.append(make_event(1))
+        await journal.stop()
+
+        self.assertEqual(peak, 1)
+        self.assertEqual(journal.stats()["written"], 2)
+        self.assertEqual([e.offset for e in self.journal().replay()], [0, 1])
+
+    async def test_failed_batch_is_counted_and_next_batch_written(self):
+        journal = self.journal()
+        write_batch = journal._write_batch
+        calls = 0
+
+        def flaky_write(batch):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise OSError("disk full")
+            write_batch(batch)
+
+        journal._write_batch = flaky_write
+        await journal.start()
+        journal.append(make_event(0))
+        await journal._flush()
+        journal.append(make_event(1))
+        await journal.stop()
+
+        stats = journal.stats()
+        self.assertEqual((stats["failed_batches"], stats["failed_events"], stats["written"]), (1, 1, 1))
+        self.assertEqual([e.offset for e in journal.replay()], [1])
+
+    async def test_replay_skips_segment_removed_by_retention(self):
+        journal = self.journal(segment_bytes=200)
+        await journal.start()
+        for i in range(20):
+            journal.append(make_event(i))
+        await journal.stop()
+        segments = journal._segments()
+        real_segments = journal._segments
+        journal._segments = lambda: segments
+        os.remove(segments[0][1])
+        events = journal.replay()
+        journal._segments = real_segments
+        self.assertTrue(events)
+        self.assertEqual(events[-1].offset, 19)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from core.models import TaskStatus
+from core.repository import TaskRepository
+from mcp.server import MCPServer, TASK_LIST_MAX
+from tests.test_repository import RepositoryTestCase
+
+
+class TaskListToolTestCase(RepositoryTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        async with self.session_factory() as session:
+            await TaskRepository(session).create_many([
+                {"task_id": f"task_{i}", "name": f"n{i}", "type": "analysis", "params": {}, "status": TaskStatus.PENDING}
+                for i in range(3)
+            ])
+        self.server = MCPServer()
+        db = SimpleNamespace(session_factory=self.session_factory)
+        self.server._get_db = mock.AsyncMock(return_value=db)
+
+    async def call(self, **arguments) -> dict:
+        result = await self.server._handle_tools_call({"name": "task_list", "arguments": arguments})
+        return json.loads(result["content"][0]["text"])
+
+    async def test_limit(self):
+        self.assertEqual((await self.call(limit=2))["count"], 2)
+        self.assertEqual((await self.call())["count"], 3)
+
+    async def test_invalid_limit_returns_error(self):
+        for limit in (0, -1, "abc", None, TASK_LIST_MAX + 1):
+            self.assertIn("error", await self.call(limit=limit))
+        self.server._get_db.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import itertools
+import unittest
+from types import SimpleNamespace
+
+from config.config import AppConfig
+from core.event_bus import Event, EventBus, EventType
+from core.metrics import MetricsAggregator
+
+_ids = itertools.count()
+
+
+class MetricsAggregatorTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        config = AppConfig()
+        self.bus = EventBus(config.event_bus_config)
+        self.metrics = MetricsAggregator(SimpleNamespace(config=config, event_bus=self.bus))
+        self.metrics.start()
+        await self.bus.start()
+
+    async def asyncTearDown(self):
+        self.metrics.stop()
+        await self.bus.stop()
+
+    async def publish(self, event_type: EventType, **data):
+        await self.bus.publish(Event(event_id=f"evt_{next(_ids)}", event_type=event_type, source="test", data=data))
+
+    async def settle(self):
+        async def idle():
+            while self.bus.get_stats()["queue_depth"] or any(
+                    st["depth"] for st in self.bus.get_stats()["subscribers"]):
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(idle(), 2)
+
+    async def test_single_and_bulk_events_update_counters(self):
+        await self.publish(EventType.TASK_CREATED, task_id="t1", task_type="analysis")
+        await self.publish(EventType.TASK_CREATED, bulk=True, task_ids=["t2", "t3", "t4", "t5"],
+                           task_types={"analysis": 1, "data_process": 3})
+        await self.publish(EventType.TASK_COMPLETED, task_id="t1", task_type="analysis", agent_id="e1")
+        await self.publish(EventType.TASK_COMPLETED, task_id="t2", task_type="data_process", agent_id="e2")
+        await self.publish(EventType.TASK_FAILED, task_id="t3", task_type="data_process", agent_id="e2")
+        await self.publish(EventType.TASK_RETRY, task_id="t3", task_type="data_process", agent_id="e2")
+        await self.settle()
+
+        totals = self.metrics.snapshot()["totals"]
+        self.assertEqual({m: totals[m] for m in ("created", "completed", "failed", "retried")},
+                         {"created": 5, "completed": 2, "failed": 1, "retried": 1})
+        self.assertEqual(totals["by_type"]["analysis"], {"created": 2, "completed": 1})
+        self.assertEqual(totals["by_type"]["data_process"],
+                         {"created": 3, "completed": 1, "failed": 1, "retried": 1})
+        self.assertEqual(totals["by_agent"], {"e1": {"completed": 1}, "e2": {"completed": 1, "failed": 1, "retried": 1}})
+
+    async def test_events_land_in_recent_minute_buckets(self):
+        await self.publish(EventType.TASK_CREATED, bulk=True, task_types={"analysis": 2})
+        await self.publish(EventType.TASK_FAILED, task_type="analysis", agent_id="e1")
+        await self.settle()
+
+        histogram = self.metrics.snapshot(minutes=2)["per_minute"]
+        self.assertEqual(len(histogram), 2)
+        # 发布时若恰好跨分钟，计数落在前一个桶
+        self.assertEqual((sum(b["created"] for b in histogram), sum(b["failed"] for b in histogram)), (2, 1))
+        self.assertEqual(sum(b["by_agent"].get("e1", {}).get("failed", 0) for b in histogram), 1)
+
+    async def test_stop_unsubscribes(self):
+        self.metrics.stop()
+        await self.publish(EventType.TASK_CREATED, task_type="analysis")
+        await self.settle()
+        self.assertEqual(self.metrics.snapshot()["totals"]["created"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core.database import Base, DatabaseManager
+from core.models import TaskStatus
+from core.repository import TaskRepository
+
+
+class RepositoryTestCase(unittest.IsolatedAsyncioTestCase):
+    """每个用例一个临时 SQLite 库（绕过 DatabaseManager 单例）"""
+
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(self._tmp.name, 'test.db')}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self._tmp.cleanup()
+
+
+class MigrationTestCase(RepositoryTestCase):
+    async def test_migrate_drops_obsolete_pending_index(self):
+        async with self.engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE INDEX ix_tasks_pending_queue ON tasks (priority DESC, create_time) WHERE status = 'PENDING'"
+            ))
+            await conn.run_sync(DatabaseManager._migrate)
+            rows = await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+            names = {row[0] for row in rows}
+        self.assertNotIn("ix_tasks_pending_queue", names)
+        self.assertIn("ix_tasks_queue", names)
+
+
+class ListPageTestCase(RepositoryTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        base = datetime(2026, 1, 1)
+        # 每 3 个任务共用一个创建时间，验证 (create_time, task_id) 平局时翻页不重不漏
+        self.rows = [
+            {
+                "task_id": f"task_{i:03d}",
+                "name": f"n{i}",
+                "type": "analysis" if i % 2 else "data_process",
+                "params": {"i": i},
+                "status": TaskStatus.COMPLETED if i % 5 == 0 else TaskStatus.PENDING,
+                "priority": 0,
+                "max_retries": 3,
+                "retry_count": 0,
+                "create_time": base + timedelta(seconds=i // 3),
+            }
+            for i in range(25)
+        ]
+        async with self.session_factory() as session:
+            await TaskRepository(session).create_many(self.rows)
+
+    async def _all_pages(self, limit: int, **filters):
+        pages, after = [], None
+        while True:
+            async with self.session_factory() as session:
+                rows, after = await TaskRepository(session).list_page(limit, after=after, **filters)
+            pages.append(rows)
+            if after is None:
+                return pages
+
+    async def test_pages_cover_all_rows_in_order(self):
+        pages = await self._all_pages(10)
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+        ids = [row["task_id"] for page in pages for row in page]
+        expected = [r["task_id"] for r in sorted(self.rows, key=lambda r: (r["create_time"], r["task_id"]), reverse=True)]
+        self.assertEqual(ids, expected)
+
+    async def test_exact_multiple_has_no_empty_trailing_page(self):
+        pages = await self._all_pages(5)
+        self.assertEqual([len(p) for p in pages], [5] * 5)
+
+    async def test_filters_apply_across_pages(self):
+        pages = await self._all_pages(4, status=TaskStatus.PENDING, task_type="analysis")
+        rows = [row for page in pages for row in page]
+        expected = {r["task_id"] for r in self.rows if r["status"] == TaskStatus.PENDING and r["type"] == "analysis"}
+        self.assertEqual({row["task_id"] for row in rows}, expected)
+        self.assertTrue(all(row["status"] == "pending" for row in rows))
+
+    async def test_field_projection(self):
+        async with self.session_factory() as session:
+            repo = TaskRepository(session)
+            rows, _ = await repo.list_page(3, fields=["name"])
+            self.assertEqual(set(rows[0]), {"name", "task_id", "create_time"})
+            self.assertNotIn("params", (await repo.list_page(1))[0][0])
+            with self.assertRaises(ValueError):
+                await repo.list_page(1, fields=["no_such_column"])
+
+    async def test_non_positive_limit_rejected(self):
+        async with self.session_factory() as session:
+            for limit in (0, -5):
+                with self.assertRaises(ValueError):
+                    await TaskRepository(session).list_page(limit)
+
+
+class ClaimBatchTestCase(RepositoryTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        base = datetime(2026, 1, 1)
+        async with self.session_factory() as session:
+            await TaskRepository(session).create_many([
+                {
+                    "task_id": f"task_{i:03d}",
+                    "name": f"n{i}",
+                    "type": "analysis" if i % 2 else "data_process",
+                    "params": {},
+                    "status": TaskStatus.PENDING,
+                    "priority": i % 3,
+                    "create_time": base + timedelta(seconds=i),
+                }
+                for i in range(60)
+            ])
+
+    async def _claim(self, agent_id: str, n: int):
+        async with self.session_factory() as session:
+            return await TaskRepository(session).claim_batch(
+                n, {"executor": [agent_id] * n}, {"analysis": "executor"}, default_agent_type="executor",
+            )
+
+    async def test_claims_in_priority_order(self):
+        claimed = await self._claim("e1", 10)
+        self.assertEqual(len(claimed), 10)
+        self.assertEqual([t.priority for t in claimed], [2] * 10)
+        self.assertEqual([t.create_time for t in claimed], sorted(t.create_time for t in claimed))
+        self.assertTrue(all(t.status == TaskStatus.RUNNING and t.executor_agent_id == "e1" for t in claimed))
+
+    async def test_concurrent_claimers_never_overlap(self):
+        # 每个认领方一个独立连接（aiosqlite 各自一个线程），BEGIN IMMEDIATE 串行化写事务
+        batches = await asyncio.gather(*(self._claim(f"e{i}", 7) for i in range(12)))
+        ids = [t.task_id for batch in batches for t in batch]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 60)
+        for i, batch in enumerate(batches):
+            self.assertTrue(all(t.executor_agent_id == f"e{i}" for t in batch))
+
+    async def test_slots_split_across_agent_types(self):
+        async with self.session_factory() as session:
+            claimed = await TaskRepository(session).claim_batch(
+                5, {"analyzer": ["a1", "a1"], "executor": ["e1", "e2", "e1"]},
+                {"analysis": "analyzer", "data_process": "executor"},
+            )
+        by_agent = {}
+        for task in claimed:
+            by_agent.setdefault(task.executor_agent_id, []).append(task.type)
+        self.assertEqual(sorted(by_agent["a1"]), ["analysis", "analysis"])
+        self.assertEqual(len(by_agent["e1"]), 2)
+        self.assertEqual(by_agent["e2"], ["data_process"])
+
+
+if __name__ == '__main__':
+    unittest.main()
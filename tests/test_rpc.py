@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+
+from config.config import EventBusConfig
+from core.event_bus import EventBus
+from core.rpc import RpcError, RpcManager, RpcTimeoutError
+
+
+class RpcTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bus = EventBus(EventBusConfig())
+        await self.bus.start()
+        self.rpc = RpcManager(self.bus, default_timeout=5)
+
+    async def asyncTearDown(self):
+        await self.rpc.stop()
+        await self.bus.stop()
+
+    async def test_call_returns_result_and_error(self):
+        self.rpc.register("analyzer", "echo", lambda params: params)
+
+        async def boom(params):
+            raise ValueError("bad input")
+
+        self.rpc.register("analyzer", "boom", boom)
+        self.assertEqual(await self.rpc.call("coordinator", "analyzer", "echo", {"x": 1}), {"x": 1})
+        with self.assertRaises(RpcError):
+            await self.rpc.call("coordinator", "analyzer", "boom")
+        with self.assertRaises(RpcError):
+            await self.rpc.call("coordinator", "analyzer", "missing")
+
+    async def test_timeout_cancels_remote_handler(self):
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow(params):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        self.rpc.register("analyzer", "slow", slow)
+        with self.assertRaises(RpcTimeoutError):
+            await self.rpc.call("coordinator", "analyzer", "slow", timeout=0.1)
+        self.assertTrue(started.is_set())
+        await asyncio.wait_for(cancelled.wait(), 2)
+        self.assertEqual(self.rpc.timeouts, 1)
+        self.assertFalse(self.rpc._pending)
+
+    async def test_caller_cancellation_propagates(self):
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow(params):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        self.rpc.register("analyzer", "slow", slow)
+        call = asyncio.create_task(self.rpc.call("coordinator", "analyzer", "slow"))
+        await asyncio.wait_for(started.wait(), 2)
+        call.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await call
+        await asyncio.wait_for(cancelled.wait(), 2)
+        self.assertEqual(self.rpc.cancelled, 1)
+        self.assertFalse(self.rpc._running)
+
+    async def test_rpc_events_are_not_recorded_or_broadcast(self):
+        seen = []
+        self.bus.subscribe_all(seen.append)
+        self.rpc.register("analyzer", "echo", lambda params: {"secret": params["token"]})
+        await self.rpc.call("coordinator", "analyzer", "echo", {"token": "s3cret"})
+        await asyncio.sleep(0.05)
+        self.assertEqual(seen, [])
+        self.assertEqual(self.bus.get_history(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+import asyncio
+import time
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from agents.base_agent import BaseAgent
+from config.config import AgentConfig, AppConfig
+from core.event_bus import Event, EventBus, EventType
+from core.models import TaskModel, TaskStatus
+from core.repository import TaskRepository
+from core.scheduler import TaskScheduler
+from tests.test_repository import RepositoryTestCase
+
+
+class StubAgent(BaseAgent):
+    """记录并发峰值的执行 Agent；fail=True 时每次返回失败结果"""
+
+    def __init__(self, agent_id: str, capacity: int = 1, delay: float = 0.05, fail: bool = False):
+        super().__init__(agent_id, "executor", capacity)
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.peak = 0
+        self.started_at = []  # [(task_id, monotonic 时间)]
+
+    async def execute_task(self, task: dict) -> dict:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.started_at.append((task["task_id"], time.monotonic()))
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if self.fail:
+            return {"code": -1, "msg": "boom"}
+        return {"code": 0, "msg": "ok"}
+
+
+class StubRuntime:
+    """调度器所需的最小运行时：真实事件总线 + 临时 SQLite 会话工厂"""
+
+    def __init__(self, session_factory, **agent_options):
+        self.config = AppConfig(agent_config=AgentConfig(**agent_options))
+        self.event_bus = EventBus(self.config.event_bus_config)
+        self.db_manager = SimpleNamespace(session_factory=session_factory)
+        self._agents = {}
+
+    def register_agent(self, agent):
+        self._agents[agent.agent_id] = agent
+        agent.runtime = self
+
+    def get_agent(self, agent_id: str):
+        return self._agents.get(agent_id)
+
+    def get_all_agents(self):
+        return dict(self._agents)
+
+
+class SchedulerTestCase(RepositoryTestCase):
+    agent_options = {"retry_jitter": 0.0}
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.runtime = StubRuntime(self.session_factory, **self.agent_options)
+        await self.runtime.event_bus.start()
+        self.scheduler = TaskScheduler(self.runtime)
+
+    async def asyncTearDown(self):
+        await self.scheduler.stop()
+        await self.runtime.event_bus.stop()
+        await super().asyncTearDown()
+
+    async def insert_tasks(self, n: int, task_type: str = "data_process", **columns):
+        task_ids = [f"task_{uuid.uuid4().hex[:12]}" for _ in range(n)]
+        async with self.session_factory() as session:
+            await TaskRepository(session).create_many([
+                {"task_id": task_id, "name": task_id, "type": task_type, "params": {},
+                 "status": TaskStatus.PENDING, **columns}
+                for task_id in task_ids
+            ])
+        return task_ids
+
+    async def enqueue(self, n: int, **columns):
+        """写入任务并发布 TASK_CREATED（与 API 创建任务的路径一致）"""
+        task_ids = await self.insert_tasks(n, **columns)
+        await self.runtime.event_bus.publish(Event(
+            event_id=f"evt_{uuid.uuid4().hex[:8]}", event_type=EventType.TASK_CREATED,
+            source="test", data={"task_ids": task_ids},
+        ))
+        return task_ids
+
+    async def task(self, task_id: str) -> TaskModel:
+        async with self.session_factory() as session:
+            return await TaskRepository(session).get_by_id(task_id)
+
+    async def wait_for(self, task_ids, status: TaskStatus, timeout: float = 3.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            tasks = [await self.task(task_id) for task_id in task_ids]
+            if all(t.status == status for t in tasks):
+                return tasks
+            if time.monotonic() > deadline:
+                self.fail(f"任务未在 {timeout}s 内进入 {status.value}: {[t.status.value for t in tasks]}")
+            await asyncio.sleep(0.02)
+
+
+class SchedulerWakeupTestCase(SchedulerTestCase):
+    async def test_task_created_event_wakes_idle_scheduler(self):
+        agent = StubAgent("e1")
+        self.runtime.register_agent(agent)
+        await self.scheduler.start()
+        await asyncio.sleep(0.1)  # 首轮认领结束，调度器进入空闲等待（兜底扫描 30s）
+
+        started = time.monotonic()
+        task_ids = await self.enqueue(1)
+        await self.wait_for(task_ids, TaskStatus.COMPLETED)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    async def test_idle_scheduler_does_not_poll(self):
+        self.runtime.register_agent(StubAgent("e1"))
+        await self.scheduler.start()
+        await asyncio.sleep(0.1)
+
+        # 绕过事件直接写库：事件模式下不会被发现，直到兜底扫描
+        task_ids = await self.insert_tasks(1)
+        await asyncio.sleep(0.3)
+        self.assertEqual((await self.task(task_ids[0])).status, TaskStatus.PENDING)
+        self.scheduler.notify()
+        await self.wait_for(task_ids, TaskStatus.COMPLETED)
+
+
+class SchedulerCapacityTestCase(SchedulerTestCase):
+    async def test_concurrency_never_exceeds_agent_capacity(self):
+        agents = [StubAgent("e1", capacity=3, delay=0.05), StubAgent("e2", capacity=1, delay=0.05)]
+        for agent in agents:
+            self.runtime.register_agent(agent)
+        task_ids = await self.enqueue(16)
+        await self.scheduler.start()
+        tasks = await self.wait_for(task_ids, TaskStatus.COMPLETED)
+
+        self.assertEqual([a.peak for a in agents], [3, 1])
+        self.assertEqual(sum(len(a.started_at) for a in agents), 16)
+        self.assertEqual({t.executor_agent_id for t in tasks}, {"e1", "e2"})
+        self.assertEqual([a.state.status for a in agents], ["idle", "idle"])
+
+    async def test_stop_requeues_running_tasks(self):
+        self.runtime.register_agent(StubAgent("e1", capacity=2, delay=10))
+        task_ids = await self.enqueue(2)
+        await self.scheduler.start()
+        await self.wait_for(task_ids, TaskStatus.RUNNING)
+        await self.scheduler.stop()
+
+        tasks = [await self.task(task_id) for task_id in task_ids]
+        self.assertTrue(all(t.status == TaskStatus.PENDING and t.executor_agent_id is None for t in tasks))
+        self.assertTrue(all(t.retry_count == 0 for t in tasks))
+
+    async def test_cancel_during_result_write_back_requeues(self):
+        self.runtime.register_agent(StubAgent("e1", delay=0.01, fail=True))
+        writing = asyncio.Event()
+
+        async def hang(*args, **kwargs):
+            writing.set()
+            await asyncio.Event().wait()
+
+        self.scheduler._handle_task_failure = hang
+        task_ids = await self.enqueue(1)
+        await self.scheduler.start()
+        await asyncio.wait_for(writing.wait(), 3)
+        await self.scheduler.stop()
+
+        task = await self.task(task_ids[0])
+        self.assertEqual((task.status, task.executor_agent_id), (TaskStatus.PENDING, None))
+
+    async def test_cancel_after_completion_keeps_result(self):
+        self.runtime.register_agent(StubAgent("e1", delay=0.01))
+        publish = self.runtime.event_bus.publish
+        published = asyncio.Event()
+
+        async def hang_on_completed(event, **kwargs):
+            if event.event_type == EventType.TASK_COMPLETED:
+                published.set()
+                await asyncio.Event().wait()
+            await publish(event, **kwargs)
+
+        self.runtime.event_bus.publish = hang_on_completed
+        task_ids = await self.enqueue(1)
+        await self.scheduler.start()
+        await asyncio.wait_for(published.wait(), 3)
+        await self.scheduler.stop()
+        self.assertEqual((await self.task(task_ids[0])).status, TaskStatus.COMPLETED)
+
+
+
+class SchedulerBackoffTestCase(SchedulerTestCase):
+    agent_options = {"retry_jitter": 0.0, "retry_delays": [0.3, 0.6], "retry_delays_by_type": {"analysis": [0.1]}}
+
+    async def test_failed_task_waits_for_backoff_before_retry(self):
+        agent = StubAgent("e1", delay=0.01, fail=True)
+        self.runtime.register_agent(agent)
+        retries = []
+        self.runtime.event_bus.subscribe(EventType.TASK_RETRY, lambda e: retries.append((e.data, e.timestamp)))
+        task_ids = await self.enqueue(1, max_retries=2)
+        await self.scheduler.start()
+
+        # 第一次失败后：retry_count 与 next_attempt_at 落库，到期前保持 PENDING
+        deadline = time.monotonic() + 3
+        while not retries and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        task = await self.task(task_ids[0])
+        self.assertEqual((task.status, task.retry_count), (TaskStatus.PENDING, 1))
+        data, published = retries[0]
+        self.assertEqual((data["retry"], data["delay"]), (1, 0.3))
+        self.assertEqual(task.next_attempt_at.isoformat(), data["next_attempt_at"])
+        self.assertAlmostEqual((task.next_attempt_at - published).total_seconds(), 0.3, delta=0.05)
+
+        task = (await self.wait_for(task_ids, TaskStatus.FAILED))[0]
+        self.assertEqual(task.retry_count, 2)
+        self.assertEqual([(d["retry"], d["delay"]) for d, _ in retries], [(1, 0.3), (2, 0.6)])
+        starts = [t for _, t in agent.started_at]
+        self.assertEqual(len(starts), 3)
+        for gap, delay in zip((b - a for a, b in zip(starts, starts[1:])), (0.3, 0.6)):
+            self.assertGreaterEqual(gap, delay)
+            self.assertLess(gap, delay + 0.5)
+
+    async def test_backoff_policy_per_task_type(self):
+        self.assertEqual(self.scheduler.backoff_policy("analysis").delay(1), 0.1)
+        self.assertEqual(self.scheduler.backoff_policy("data_process").delay(2), 0.6)
+        # 超出列表后按倍数增长
+        self.assertEqual(self.scheduler.backoff_policy("data_process").delay(3), 1.2)
+
+    async def test_delayed_retry_is_not_claimed_early(self):
+        self.runtime.register_agent(StubAgent("e1", delay=0.01))
+        task_ids = await self.enqueue(1, retry_count=1, next_attempt_at=datetime.now() + timedelta(seconds=0.4))
+        await self.scheduler.start()
+        await asyncio.sleep(0.2)
+        self.assertEqual((await self.task(task_ids[0])).status, TaskStatus.PENDING)
+        await self.wait_for(task_ids, TaskStatus.COMPLETED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from core import stats
+from core.stats import TaskStatsService
+
+
+class FakeStatsService(TaskStatsService):
+    def __init__(self, ttl: float):
+        super().__init__(SimpleNamespace(), ttl=ttl)
+        self.computed = 0
+
+    async def _compute(self) -> dict:
+        self.computed += 1
+        return {"computed": self.computed}
+
+
+class TaskStatsCacheTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_events_within_ttl_are_debounced(self):
+        service = FakeStatsService(ttl=60)
+        await service.get()
+        for _ in range(100):
+            service._on_task_event(None)
+            await service.get()
+        self.assertEqual(service.computed, 1)
+
+    async def test_recompute_after_ttl_only_when_dirty(self):
+        service = FakeStatsService(ttl=0)
+        await service.get()
+        await service.get()
+        self.assertEqual(service.computed, 1)
+        service.invalidate()
+        await service.get()
+        self.assertEqual(service.computed, 2)
+
+    async def test_clean_snapshot_expires_after_max_age(self):
+        service = FakeStatsService(ttl=0)
+        with mock.patch.object(stats, "STATS_MAX_AGE", 0):
+            await service.get()
+            await service.get()
+        self.assertEqual(service.computed, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
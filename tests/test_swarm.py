@@ -0,0 +1,354 @@
+import asyncio
+import contextlib
+import io
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+
+from core.swarm import SwarmBatch, SwarmConfig, SwarmStatus, SwarmTaskSpec, TokenBucket, is_throttled
+
+
+class ConcurrencyProbe:
+    """协程 executor：记录同时在跑的子任务峰值"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, spec: SwarmTaskSpec) -> dict:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            return {"index": spec.index}
+        finally:
+            self.running -= 1
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class CapacityService:
+    """同时在跑的请求超过 capacity 时立即抛 429"""
+
+    def __init__(self, capacity: int, delay: float = 0.01):
+        self.capacity = capacity
+        self.delay = delay
+        self.running = 0
+        self.rejected = 0
+
+    async def __call__(self, spec: SwarmTaskSpec) -> dict:
+        if self.running >= self.capacity:
+            self.rejected += 1
+            raise RateLimited("429 Too Many Requests")
+        self.running += 1
+        try:
+            await asyncio.sleep(self.delay)
+            return {"index": spec.index}
+        finally:
+            self.running -= 1
+
+
+def process_square(spec: SwarmTaskSpec) -> dict:
+    """进程池执行的同步函数（须为模块级以便 pickle）"""
+    return {"value": spec.item * spec.item, "pid": os.getpid()}
+
+
+def make_specs(n: int):
+    return [SwarmTaskSpec(i + 1, i, "") for i in range(n)]
+
+
+class SwarmRampTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_default_config_reaches_max_concurrency(self):
+        probe = ConcurrencyProbe()
+        batch = SwarmBatch(make_specs(64), probe, SwarmConfig(max_concurrency=16))
+        results = await batch.run()
+        self.assertTrue(all(r.status == SwarmStatus.COMPLETED for r in results))
+        self.assertEqual(probe.peak, 16)
+        self.assertEqual(batch.metrics()["concurrency"], 16)
+
+    async def test_adaptive_matches_fixed_without_throttling(self):
+        probe = ConcurrencyProbe()
+        await SwarmBatch(make_specs(32), probe, SwarmConfig(max_concurrency=8, adaptive=False)).run()
+        fixed_peak = probe.peak
+        probe = ConcurrencyProbe()
+        await SwarmBatch(make_specs(32), probe, SwarmConfig(max_concurrency=8)).run()
+        self.assertEqual(probe.peak, fixed_peak)
+
+
+class SwarmThrottleTestCase(unittest.IsolatedAsyncioTestCase):
+    def test_is_throttled_for_429_and_timeouts(self):
+        from core.llm import LLMTimeoutError
+        self.assertTrue(is_throttled(RateLimited()))
+        self.assertTrue(is_throttled(asyncio.TimeoutError()))
+        self.assertTrue(is_throttled(TimeoutError()))
+        self.assertTrue(is_throttled(LLMTimeoutError("timeout")))
+        self.assertFalse(is_throttled(ValueError("boom")))
+
+    async def test_throttling_shrinks_limit_and_requeues(self):
+        service = CapacityService(capacity=4)
+        config = SwarmConfig(max_concurrency=16, retry_base_ms=5, max_throttle_retries=50)
+        batch = SwarmBatch(make_specs(40), service, config)
+        results = await batch.run()
+        self.assertTrue(all(r.status == SwarmStatus.COMPLETED for r in results))
+        metrics = batch.metrics()
+        self.assertGreater(metrics["throttled"], 0)
+        self.assertGreater(metrics["decreases"], 0)
+        self.assertLess(metrics["concurrency"], 16)
+
+    async def test_throttle_retries_exhausted_fails(self):
+        async def always_429(spec):
+            raise RateLimited("429")
+
+        config = SwarmConfig(max_concurrency=2, retry_base_ms=1, max_throttle_retries=2)
+        batch = SwarmBatch(make_specs(2), always_429, config)
+        results = await batch.run()
+        self.assertTrue(all(r.status == SwarmStatus.FAILED for r in results))
+        self.assertEqual(batch.metrics()["throttled"], 6)
+
+    async def test_window_shrinks_on_429_and_on_timeout(self):
+        async def rate_limited(spec):
+            raise RateLimited("429")
+
+        async def slow(spec):
+            await asyncio.sleep(1)
+
+        for executor in (rate_limited, slow):
+            with self.subTest(executor=executor.__name__):
+                config = SwarmConfig(max_concurrency=8, timeout=0.01, retry_base_ms=1, max_throttle_retries=1)
+                batch = SwarmBatch(make_specs(8), executor, config)
+                results = await batch.run()
+                self.assertTrue(all(r.status == SwarmStatus.FAILED for r in results))
+                metrics = batch.metrics()
+                self.assertEqual(metrics["throttled"], 16)
+                self.assertGreater(metrics["decreases"], 0)
+                self.assertLess(metrics["concurrency"], 8)
+
+    async def test_timeout_requeues_then_completes(self):
+        attempts = []
+
+        async def slow_once(spec):
+            attempts.append(spec.index)
+            if len(attempts) == 1:
+                await asyncio.sleep(1)
+            return {"index": spec.index}
+
+        config = SwarmConfig(max_concurrency=4, timeout=0.01, retry_base_ms=1, max_retries=0)
+        batch = SwarmBatch(make_specs(1), slow_once, config)
+        results = await batch.run()
+        self.assertEqual(results[0].status, SwarmStatus.COMPLETED)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(batch.metrics()["throttled"], 1)
+
+
+class SwarmStreamTestCase(unittest.IsolatedAsyncioTestCase):
+    @staticmethod
+    def delayed(delays):
+        async def executor(spec):
+            await asyncio.sleep(delays[spec.index - 1])
+            return {"index": spec.index}
+        return executor
+
+    async def test_stream_yields_in_completion_order(self):
+        batch = SwarmBatch(make_specs(4), self.delayed([0.08, 0.02, 0.06, 0.04]), SwarmConfig(max_concurrency=4))
+        order = [r.spec.index async for r in batch.stream()]
+        self.assertEqual(order, [2, 4, 3, 1])
+
+    async def test_ordered_stream_yields_in_spec_order(self):
+        batch = SwarmBatch(make_specs(6), self.delayed([0.06, 0.01, 0.03, 0.01, 0.02, 0.01]),
+                           SwarmConfig(max_concurrency=3))
+        results = [r async for r in batch.stream(ordered=True)]
+        self.assertEqual([r.spec.index for r in results], [1, 2, 3, 4, 5, 6])
+        self.assertTrue(all(r.status == SwarmStatus.COMPLETED for r in results))
+
+    async def test_reorder_buffer_bounds_launches_ahead_of_slow_head(self):
+        release = asyncio.Event()
+        started = []
+
+        async def executor(spec):
+            started.append(spec.index)
+            if spec.index == 1:
+                await release.wait()
+            return {"index": spec.index}
+
+        batch = SwarmBatch(make_specs(10), executor, SwarmConfig(max_concurrency=8))
+        stream = batch.stream(ordered=True, reorder_buffer=3)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.05)
+        # 队首未完成：已启动未产出的子任务不超过重排缓冲
+        self.assertEqual(sorted(started), [1, 2, 3])
+        self.assertFalse(first.done())
+        release.set()
+        self.assertEqual((await first).spec.index, 1)
+        rest = [r.spec.index async for r in stream]
+        self.assertEqual(rest, list(range(2, 11)))
+
+    async def test_breaking_out_cancels_running_tasks(self):
+        cancelled = []
+
+        async def executor(spec):
+            try:
+                await asyncio.sleep(0 if spec.index == 1 else 10)
+            except asyncio.CancelledError:
+                cancelled.append(spec.index)
+                raise
+            return {"index": spec.index}
+
+        batch = SwarmBatch(make_specs(4), executor, SwarmConfig(max_concurrency=4))
+        stream = batch.stream()
+        async for result in stream:
+            self.assertEqual(result.spec.index, 1)
+            break
+        await stream.aclose()
+        self.assertEqual(sorted(cancelled), [2, 3, 4])
+        self.assertEqual(batch.metrics()["active"], 0)
+
+    async def test_run_keeps_spec_order_after_cancel(self):
+        batch = SwarmBatch(make_specs(5), self.delayed([0.01, 10, 10, 10, 10]), SwarmConfig(max_concurrency=2))
+
+        async def cancel_soon():
+            await asyncio.sleep(0.05)
+            batch.cancel()
+
+        canceller = asyncio.ensure_future(cancel_soon())
+        results = await batch.run()
+        await canceller
+        self.assertEqual([r.spec.index for r in results], [1, 2, 3, 4, 5])
+        # #1 完成后 #3 补位启动；#4、#5 未启动
+        self.assertEqual([r.status for r in results],
+                         [SwarmStatus.COMPLETED, SwarmStatus.ABORTED, SwarmStatus.ABORTED] + [SwarmStatus.PENDING] * 2)
+
+
+
+class SwarmExecutorTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_coroutine_executor_runs_on_event_loop(self):
+        loop_thread = threading.get_ident()
+        threads = set()
+
+        async def executor(spec):
+            threads.add(threading.get_ident())
+            return {"index": spec.index}
+
+        batch = SwarmBatch(make_specs(8), executor, SwarmConfig(max_concurrency=4))
+        results = await batch.run()
+        self.assertTrue(all(r.status == SwarmStatus.COMPLETED for r in results))
+        self.assertEqual(threads, {loop_thread})
+        self.assertEqual(batch.metrics()["executor"], "coroutine")
+
+    async def test_async_callable_object_is_awaited(self):
+        probe = ConcurrencyProbe(delay=0)
+        batch = SwarmBatch(make_specs(3), probe, SwarmConfig(max_concurrency=2))
+        self.assertEqual([r.result for r in await batch.run()], [{"index": i} for i in range(1, 4)])
+        self.assertEqual(batch.metrics()["executor"], "coroutine")
+
+    async def test_sync_executor_uses_dedicated_pool_sized_to_concurrency(self):
+        threads = set()
+        barrier = threading.Barrier(6, timeout=2)
+
+        def executor(spec):
+            threads.add(threading.current_thread().name)
+            barrier.wait()  # 6 个同时在跑才放行：线程池不小于 max_concurrency
+            return {"index": spec.index}
+
+        batch = SwarmBatch(make_specs(6), executor, SwarmConfig(max_concurrency=6))
+        results = await batch.run()
+        self.assertTrue(all(r.status == SwarmStatus.COMPLETED for r in results))
+        self.assertEqual(len(threads), 6)
+        self.assertTrue(all(name.startswith("swarm") for name in threads))
+        self.assertIsNone(batch._own_pool)  # 批次结束即关闭
+        self.assertEqual(batch.metrics()["executor"], "ThreadPoolExecutor")
+
+    async def test_injected_thread_pool_is_used_and_left_open(self):
+        threads = set()
+
+        def executor(spec):
+            threads.add(threading.current_thread().name)
+            return {"index": spec.index}
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="injected") as pool:
+            batch = SwarmBatch(make_specs(5), executor, SwarmConfig(max_concurrency=4), pool=pool)
+            await batch.run()
+            self.assertTrue(threads and all(name.startswith("injected") for name in threads))
+            self.assertIsNone(batch._own_pool)
+            # 注入的池由调用方管理，批次结束后仍可用
+            self.assertEqual(pool.submit(lambda: 1).result(), 1)
+
+    async def test_injected_process_pool(self):
+        specs = [SwarmTaskSpec(i + 1, i, "") for i in range(6)]
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            batch = SwarmBatch(specs, process_square, SwarmConfig(max_concurrency=2), pool=pool)
+            results = await batch.run()
+        self.assertEqual([r.result["value"] for r in results], [i * i for i in range(6)])
+        self.assertNotIn(os.getpid(), {r.result["pid"] for r in results})
+        self.assertEqual(batch.metrics()["executor"], "ProcessPoolExecutor")
+
+
+
+class SwarmLaunchTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_completion_refills_slots_without_launch_interval(self):
+        finished_at_start = []
+        finished = 0
+
+        async def executor(spec):
+            nonlocal finished
+            finished_at_start.append(finished)
+            await asyncio.sleep(0.01)
+            finished += 1
+            return {"index": spec.index}
+
+        # launch_interval 仅兼容保留：即使设为 5s，结束的子任务也立即补位
+        config = SwarmConfig(max_concurrency=4, initial_launch=1, launch_interval=5)
+        t0 = time.monotonic()
+        results = await SwarmBatch(make_specs(40), executor, config).run()
+        elapsed = time.monotonic() - t0
+        self.assertTrue(all(r.status == SwarmStatus.COMPLETED for r in results))
+        self.assertLess(elapsed, 1.0)  # 10 轮 × 10ms；轮询启动需 36 × 5s
+        # 首批直接启满 max_concurrency，之后有子任务结束才补位
+        self.assertEqual(finished_at_start[:4], [0, 0, 0, 0])
+        self.assertGreaterEqual(finished_at_start[4], 1)
+
+    async def test_token_bucket_paces_launches(self):
+        starts = []
+
+        async def executor(spec):
+            starts.append(time.monotonic())
+            return {"index": spec.index}
+
+        config = SwarmConfig(max_concurrency=8, launch_rate=50, launch_burst=2)
+        batch = SwarmBatch(make_specs(6), executor, config)
+        await batch.run()
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        self.assertLess(gaps[0], 0.01)  # 桶内 2 个令牌可瞬时启动
+        self.assertTrue(all(g >= 0.015 for g in gaps[1:]), gaps)  # 之后每 20ms 一个
+        self.assertEqual(batch.metrics()["launches"], 6)
+
+    def test_token_bucket_refill(self):
+        with mock.patch("core.swarm.time.monotonic", side_effect=[0.0, 0.0, 0.0, 0.0, 0.05, 0.1]):
+            bucket = TokenBucket(rate=10, capacity=2)
+            self.assertTrue(bucket.try_acquire())
+            self.assertTrue(bucket.try_acquire())
+            self.assertFalse(bucket.try_acquire())
+            self.assertAlmostEqual(bucket.wait_time(), 0.05)
+            self.assertTrue(bucket.try_acquire())
+
+
+class SwarmLaunchBenchmarkTestCase(unittest.TestCase):
+    def test_benchmark_runs_with_small_arguments(self):
+        from benchmarks import bench_swarm_launch
+        argv = ["bench_swarm_launch", "--items", "40", "--task-ms", "1", "--max-concurrency", "8",
+                "--launch-interval", "0.01", "--launch-rate", "5000"]
+        out = io.StringIO()
+        with mock.patch("sys.argv", argv), contextlib.redirect_stdout(out):
+            bench_swarm_launch.main()
+        lines = out.getvalue().splitlines()
+        self.assertIn("40 个 1ms 子任务", lines[0])
+        self.assertEqual(sum("总耗时" in line for line in lines), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()